@@ -19,10 +19,11 @@ from app.core.database import Base
 
 # Import all models
 from app.models import (
-    User, Product, ProductVariant, Category, ProductAttribute,
+    User, Product, ProductVariant, Category, CategoryClosure, ProductAttribute, ProductAttributeValue,
     Order, OrderItem, Invoice, InvoiceItem, Payment,
     Reservation, PickupDocument, ReturnDocument,
-    RentalPeriodConfig, CompanySettings, Coupon, Notification
+    RentalPeriodConfig, CompanySettings, Coupon, Notification,
+    InventoryMovement, InventoryBalance, SequenceCounter
 )
 
 # this is the Alembic Config object
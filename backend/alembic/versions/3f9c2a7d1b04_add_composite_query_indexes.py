@@ -0,0 +1,62 @@
+"""add composite query indexes
+
+Revision ID: 3f9c2a7d1b04
+Revises:
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a7d1b04'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns) - mirrors __table_args__ on the models
+INDEXES = [
+    (
+        "ix_reservations_availability",
+        "reservations",
+        ["product_id", "status", "start_date", "end_date", "variant_id", "quantity"],
+    ),
+    ("ix_reservations_order_id", "reservations", ["order_id"]),
+    ("ix_orders_customer_status", "orders", ["customer_id", "status"]),
+    ("ix_orders_vendor_status_end", "orders", ["vendor_id", "status", "rental_end_date"]),
+    ("ix_orders_status_updated", "orders", ["status", "updated_at"]),
+    ("ix_payments_status_date", "payments", ["status", "payment_date"]),
+    ("ix_invoices_vendor_status", "invoices", ["vendor_id", "status"]),
+]
+
+
+def _index_state(name: str, table: str) -> Union[bool, None]:
+    """
+    Whether an index exists; None when unknown (offline mode)
+    Tables not created yet count as indexed: create_all adds them with
+    their indexes.
+    """
+    if op.get_context().as_sql:
+        return None
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return True
+    return any(index["name"] == name for index in inspector.get_indexes(table))
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        if not _index_state(name, table):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        if op.get_context().as_sql or (
+            sa.inspect(op.get_bind()).has_table(table) and _index_state(name, table)
+        ):
+            op.drop_index(name, table_name=table)
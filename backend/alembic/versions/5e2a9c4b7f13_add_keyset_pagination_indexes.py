@@ -0,0 +1,55 @@
+"""add keyset pagination indexes
+
+Revision ID: 5e2a9c4b7f13
+Revises: c7d5e0a94f21
+Create Date: 2026-10-17 17:24:51.093385
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a9c4b7f13'
+down_revision: Union[str, None] = 'c7d5e0a94f21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns) - the (created_at, id) cursor order of each list
+INDEXES = [
+    ("ix_products_created_id", "products", ["created_at", "id"]),
+    ("ix_orders_created_id", "orders", ["created_at", "id"]),
+    ("ix_invoices_created_id", "invoices", ["created_at", "id"]),
+    ("ix_payments_created_id", "payments", ["created_at", "id"]),
+]
+
+
+def _index_state(name: str, table: str) -> Union[bool, None]:
+    """
+    Whether an index exists; None when unknown (offline mode)
+    Tables not created yet count as indexed: create_all adds them with
+    their indexes.
+    """
+    if op.get_context().as_sql:
+        return None
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return True
+    return any(index["name"] == name for index in inspector.get_indexes(table))
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        if not _index_state(name, table):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        if op.get_context().as_sql or (
+            sa.inspect(op.get_bind()).has_table(table) and _index_state(name, table)
+        ):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,72 @@
+"""add inventory ledger
+
+Revision ID: 8b41d6e2c915
+Revises: 3f9c2a7d1b04
+Create Date: 2026-10-17 14:36:05.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b41d6e2c915'
+down_revision: Union[str, None] = '3f9c2a7d1b04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MOVEMENT_TYPES = sa.Enum(
+    "OPENING", "RECEIPT", "ADJUSTMENT", "RESERVE", "RELEASE", "FULFILL", "EXPIRE",
+    name="movementtype"
+)
+
+
+def _has_table(name: str) -> bool:
+    """Tables may already exist when the app created them with create_all"""
+    if op.get_context().as_sql:
+        return False
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    # Balances are opened from the existing product counters on first use
+    # (or by reconcile_inventory.py), so no data is copied here
+    if not _has_table("inventory_movements"):
+        op.create_table(
+            "inventory_movements",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("variant_id", sa.Integer(), nullable=True),
+            sa.Column("movement_type", MOVEMENT_TYPES, nullable=False),
+            sa.Column("on_hand_delta", sa.Integer(), nullable=False),
+            sa.Column("reserved_delta", sa.Integer(), nullable=False),
+            sa.Column("reference_type", sa.String(length=50), nullable=True),
+            sa.Column("reference_id", sa.Integer(), nullable=True),
+            sa.Column("note", sa.String(length=255), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_inventory_movements_id", "inventory_movements", ["id"])
+        op.create_index("ix_inventory_movements_sku", "inventory_movements", ["product_id", "variant_id", "id"])
+
+    if not _has_table("inventory_balances"):
+        op.create_table(
+            "inventory_balances",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("variant_id", sa.Integer(), nullable=False),
+            sa.Column("quantity_on_hand", sa.Integer(), nullable=False),
+            sa.Column("quantity_reserved", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("product_id", "variant_id", name="uq_inventory_balances_sku"),
+        )
+        op.create_index("ix_inventory_balances_id", "inventory_balances", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("inventory_balances")
+    op.drop_table("inventory_movements")
@@ -0,0 +1,66 @@
+"""add category closure
+
+Revision ID: 9d3f6b1e2a58
+Revises: 5e2a9c4b7f13
+Create Date: 2026-10-17 18:02:37.415208
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3f6b1e2a58'
+down_revision: Union[str, None] = '5e2a9c4b7f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Every (ancestor, descendant) pair, each category being its own ancestor at
+# depth 0; the depth cap stops the walk on a (corrupt) parent cycle
+POPULATE = """
+INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM categories
+    UNION ALL
+    SELECT tree.ancestor_id, categories.id, tree.depth + 1
+    FROM tree JOIN categories ON categories.parent_id = tree.descendant_id
+    WHERE tree.depth < 64
+)
+SELECT ancestor_id, descendant_id, depth FROM tree
+"""
+
+
+def _has_table(name: str) -> bool:
+    """Tables may already exist when the app created them with create_all"""
+    if op.get_context().as_sql:
+        return False
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    # Without categories yet, create_all adds both tables (the app fills the
+    # closure on startup)
+    if _has_table("category_closure"):
+        return
+    if not op.get_context().as_sql and not _has_table("categories"):
+        return
+
+    op.create_table(
+        "category_closure",
+        sa.Column("ancestor_id", sa.Integer(), nullable=False),
+        sa.Column("descendant_id", sa.Integer(), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["ancestor_id"], ["categories.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["descendant_id"], ["categories.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("ancestor_id", "descendant_id"),
+    )
+    op.create_index("ix_category_closure_descendant", "category_closure", ["descendant_id", "depth"])
+    op.execute(POPULATE)
+
+
+def downgrade() -> None:
+    if op.get_context().as_sql or _has_table("category_closure"):
+        op.drop_table("category_closure")
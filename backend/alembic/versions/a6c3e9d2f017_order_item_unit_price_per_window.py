@@ -0,0 +1,103 @@
+"""order item unit price per window
+
+Revision ID: a6c3e9d2f017
+Revises: e4a7c1f9b352
+Create Date: 2026-10-17 23:12:48.530611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c3e9d2f017'
+down_revision: Union[str, None] = 'e4a7c1f9b352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Orders whose lines are never recomputed again (enum names, as stored)
+FINAL_STATUSES = ("COMPLETED", "CANCELLED")
+
+order_items = sa.table(
+    "order_items",
+    sa.column("id", sa.Integer),
+    sa.column("order_id", sa.Integer),
+    sa.column("quantity", sa.Integer),
+    sa.column("unit_price", sa.Float),
+    sa.column("line_subtotal", sa.Float),
+    sa.column("rental_period_type", sa.String),
+    sa.column("rental_start_date", sa.DateTime),
+    sa.column("rental_end_date", sa.DateTime)
+)
+orders = sa.table("orders", sa.column("id", sa.Integer), sa.column("status", sa.String))
+
+
+def _has_table(name: str) -> bool:
+    """Whether a table exists (assumed in offline mode); empty databases get theirs from create_all"""
+    if op.get_context().as_sql:
+        return True
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _open_order_ids():
+    """Ids of orders that are not finalised"""
+    return sa.select(orders.c.id).where(orders.c.status.notin_(FINAL_STATUSES))
+
+
+def _periods(period_type: str, start_date, end_date) -> int:
+    """Billed periods of a line under the old per-period pricing"""
+    if not start_date or not end_date:
+        return 1
+    delta = end_date - start_date
+    if period_type == "hourly":
+        return max(1, int(delta.total_seconds() / 3600))
+    if period_type == "weekly":
+        return max(1, delta.days // 7)
+    if period_type == "monthly":
+        return max(1, delta.days // 30)
+    return max(1, delta.days)
+
+
+def upgrade() -> None:
+    # unit_price used to be a per-period rate that calculate_total multiplied
+    # by the duration, so line_subtotal / quantity is the price for the whole
+    # window. Lines written since already have line_subtotal = quantity *
+    # unit_price, so the rewrite leaves them unchanged.
+    if not _has_table("order_items"):
+        return
+
+    op.execute(
+        order_items.update().where(
+            order_items.c.quantity > 0,
+            order_items.c.line_subtotal > 0,
+            order_items.c.order_id.in_(_open_order_ids())
+        ).values(unit_price=order_items.c.line_subtotal / order_items.c.quantity)
+    )
+
+
+def downgrade() -> None:
+    if op.get_context().as_sql or not _has_table("order_items"):
+        return
+
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(
+            order_items.c.id, order_items.c.unit_price, order_items.c.rental_period_type,
+            order_items.c.rental_start_date, order_items.c.rental_end_date
+        ).where(order_items.c.order_id.in_(_open_order_ids()))
+    ).all()
+    if rows:
+        bind.execute(
+            order_items.update().where(order_items.c.id == sa.bindparam("item_id")).values(
+                unit_price=sa.bindparam("per_period")
+            ),
+            [
+                {"item_id": row.id, "per_period": row.unit_price / _periods(
+                    row.rental_period_type, row.rental_start_date, row.rental_end_date
+                )}
+                for row in rows
+            ]
+        )
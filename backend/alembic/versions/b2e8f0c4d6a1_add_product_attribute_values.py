@@ -0,0 +1,55 @@
+"""add product attribute values
+
+Revision ID: b2e8f0c4d6a1
+Revises: 9d3f6b1e2a58
+Create Date: 2026-10-17 19:24:51.608143
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e8f0c4d6a1'
+down_revision: Union[str, None] = '9d3f6b1e2a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    """Tables may already exist when the app created them with create_all"""
+    if op.get_context().as_sql:
+        return False
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    # Without products yet, create_all adds both tables. Existing attribute
+    # JSON is copied in by `python rebuild_attribute_index.py`
+    if _has_table("product_attribute_values"):
+        return
+    if not op.get_context().as_sql and not _has_table("products"):
+        return
+
+    op.create_table(
+        "product_attribute_values",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("variant_id", sa.Integer(), nullable=True),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("value", sa.String(length=255), nullable=False),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["variant_id"], ["product_variants.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_product_attribute_values_lookup", "product_attribute_values", ["name", "value", "product_id"]
+    )
+    op.create_index("ix_product_attribute_values_product", "product_attribute_values", ["product_id"])
+
+
+def downgrade() -> None:
+    if op.get_context().as_sql or _has_table("product_attribute_values"):
+        op.drop_table("product_attribute_values")
@@ -0,0 +1,67 @@
+"""add product search index
+
+Revision ID: c7d5e0a94f21
+Revises: 8b41d6e2c915
+Create Date: 2026-10-17 16:02:18.440671
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d5e0a94f21'
+down_revision: Union[str, None] = '8b41d6e2c915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Mirrors app/services/search_index.py
+FTS_TABLE = "product_search"
+FULLTEXT_INDEX = "ix_products_fulltext"
+
+
+def _has_products() -> bool:
+    """Tables not created yet are indexed at startup instead"""
+    if op.get_context().as_sql:
+        return True
+    return sa.inspect(op.get_bind()).has_table("products")
+
+
+def _has_fulltext_index() -> bool:
+    if op.get_context().as_sql:
+        return False
+    indexes = sa.inspect(op.get_bind()).get_indexes("products")
+    return any(index["name"] == FULLTEXT_INDEX for index in indexes)
+
+
+def upgrade() -> None:
+    dialect = op.get_context().dialect.name
+
+    if dialect == "sqlite":
+        op.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "name, description, sku, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        if _has_products():
+            op.execute(f"DELETE FROM {FTS_TABLE}")
+            op.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description, sku) "
+                "SELECT id, name, COALESCE(description, ''), COALESCE(sku, '') FROM products"
+            )
+    elif dialect == "mysql":
+        if _has_products() and not _has_fulltext_index():
+            op.execute(f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} ON products (name, description, sku)")
+
+
+def downgrade() -> None:
+    dialect = op.get_context().dialect.name
+
+    if dialect == "sqlite":
+        op.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif dialect == "mysql":
+        if _has_products() and (op.get_context().as_sql or _has_fulltext_index()):
+            op.execute(f"ALTER TABLE products DROP INDEX {FULLTEXT_INDEX}")
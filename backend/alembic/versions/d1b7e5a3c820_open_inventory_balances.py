@@ -0,0 +1,128 @@
+"""open inventory balances
+
+Revision ID: d1b7e5a3c820
+Revises: a6c3e9d2f017
+Create Date: 2026-10-17 23:58:04.217395
+
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1b7e5a3c820'
+down_revision: Union[str, None] = 'a6c3e9d2f017'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+products = sa.table(
+    "products",
+    sa.column("id", sa.Integer),
+    sa.column("quantity_on_hand", sa.Integer),
+    sa.column("quantity_reserved", sa.Integer)
+)
+variants = sa.table(
+    "product_variants",
+    sa.column("id", sa.Integer),
+    sa.column("product_id", sa.Integer),
+    sa.column("quantity_on_hand", sa.Integer),
+    sa.column("quantity_reserved", sa.Integer)
+)
+movements = sa.table(
+    "inventory_movements",
+    sa.column("product_id", sa.Integer),
+    sa.column("variant_id", sa.Integer),
+    sa.column("movement_type", sa.String),
+    sa.column("on_hand_delta", sa.Integer),
+    sa.column("reserved_delta", sa.Integer),
+    sa.column("reference_type", sa.String),
+    sa.column("reference_id", sa.Integer),
+    sa.column("created_at", sa.DateTime)
+)
+balances = sa.table(
+    "inventory_balances",
+    sa.column("product_id", sa.Integer),
+    sa.column("variant_id", sa.Integer),
+    sa.column("quantity_on_hand", sa.Integer),
+    sa.column("quantity_reserved", sa.Integer),
+    sa.column("updated_at", sa.DateTime)
+)
+
+
+def _has_table(name: str) -> bool:
+    """Whether a table exists (assumed in offline mode); empty databases get theirs from create_all"""
+    if op.get_context().as_sql:
+        return True
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    # Open the ledger of every product without movements from its counters,
+    # as InventoryLedger.open_balances does, so stock reads never write
+    if op.get_context().as_sql or not _has_table("products"):
+        return
+
+    bind = op.get_bind()
+    unopened = bind.execute(
+        sa.select(products.c.id, products.c.quantity_on_hand, products.c.quantity_reserved).where(
+            ~sa.exists().where(movements.c.product_id == products.c.id)
+        )
+    ).all()
+    if not unopened:
+        return
+
+    skus = [(row.id, None, row.quantity_on_hand or 0, row.quantity_reserved or 0) for row in unopened]
+    ids = [row.id for row in unopened]
+    for offset in range(0, len(ids), 500):
+        skus += [
+            (row.product_id, row.id, row.quantity_on_hand or 0, row.quantity_reserved or 0)
+            for row in bind.execute(
+                sa.select(
+                    variants.c.product_id, variants.c.id, variants.c.quantity_on_hand, variants.c.quantity_reserved
+                ).where(variants.c.product_id.in_(ids[offset:offset + 500]))
+            )
+        ]
+
+    # Product counters already include variant reservations
+    variant_reserved = defaultdict(int)
+    for product_id, variant_id, _, reserved in skus:
+        if variant_id:
+            variant_reserved[product_id] += reserved
+
+    now = datetime.utcnow()
+    rows = []
+    totals = defaultdict(lambda: [0, 0])
+    for product_id, variant_id, on_hand, reserved in skus:
+        if not variant_id:
+            reserved -= variant_reserved[product_id]
+        if not on_hand and not reserved:
+            continue
+        rows.append({
+            "product_id": product_id, "variant_id": variant_id, "movement_type": "OPENING",
+            "on_hand_delta": on_hand, "reserved_delta": reserved,
+            "reference_type": "product", "reference_id": product_id, "created_at": now
+        })
+        totals[(product_id, variant_id or 0)][0] += on_hand
+        totals[(product_id, variant_id or 0)][1] += reserved
+        if variant_id:
+            totals[(product_id, 0)][1] += reserved
+
+    for offset in range(0, len(ids), 500):
+        bind.execute(balances.delete().where(balances.c.product_id.in_(ids[offset:offset + 500])))
+    if rows:
+        bind.execute(movements.insert(), rows)
+        bind.execute(balances.insert(), [
+            {"product_id": product_id, "variant_id": variant_id,
+             "quantity_on_hand": on_hand, "quantity_reserved": reserved, "updated_at": now}
+            for (product_id, variant_id), (on_hand, reserved) in totals.items()
+        ])
+
+
+def downgrade() -> None:
+    # Opening movements match the counters they were taken from, so they stay
+    pass
@@ -0,0 +1,45 @@
+"""add sequence counters
+
+Revision ID: e4a7c1f9b352
+Revises: b2e8f0c4d6a1
+Create Date: 2026-10-17 20:41:09.127384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c1f9b352'
+down_revision: Union[str, None] = 'b2e8f0c4d6a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    """Tables may already exist when the app created them with create_all"""
+    if op.get_context().as_sql:
+        return False
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    # Counters start after the highest existing number of their period when
+    # first used, so no data is copied here
+    if _has_table("sequence_counters"):
+        return
+
+    op.create_table(
+        "sequence_counters",
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("next_value", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    if op.get_context().as_sql or _has_table("sequence_counters"):
+        op.drop_table("sequence_counters")
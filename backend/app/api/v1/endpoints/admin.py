@@ -265,6 +265,45 @@ async def validate_coupon(
     )
 
 
+# Maintenance
+
+@router.get("/maintenance/sweeper")
+async def get_sweeper_metrics(
+    current_user: User = Depends(require_admin)
+):
+    """Get reservation sweeper counters (Admin only)"""
+    from app.services.reservation_sweeper import sweeper_metrics
+    
+    return sweeper_metrics.snapshot()
+
+
+@router.post("/maintenance/sweeper/run")
+async def run_sweeper(
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Run one reservation sweep now (Admin only)"""
+    from app.services.reservation_sweeper import ReservationSweeper
+    
+    return ReservationSweeper(db).run_once()
+
+
+@router.get("/maintenance/cache")
+async def get_cache_stats(
+    current_user: User = Depends(require_admin)
+):
+    """Get availability, HTTP response and cart store counters (Admin only)"""
+    from app.services.availability_cache import availability_cache
+    from app.core.http_cache import response_cache
+    from app.services.cart_store import cart_store
+    
+    return {
+        **availability_cache.snapshot(),
+        "responses": response_cache.snapshot(),
+        "carts": cart_store.snapshot()
+    }
+
+
 # Export Endpoints
 
 @router.get("/export/orders")
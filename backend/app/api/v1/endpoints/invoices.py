@@ -60,6 +60,8 @@ async def get_invoices(
     end_date: Optional[str] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: str = Query("exact", pattern="^(exact|estimate|none)$"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -69,32 +71,42 @@ async def get_invoices(
     start = datetime.fromisoformat(start_date) if start_date else None
     end = datetime.fromisoformat(end_date) if end_date else None
     
-    if current_user.role.value == "customer":
-        result = service.get_invoices(
-            customer_id=current_user.id,
-            status=status,
-            start_date=start,
-            end_date=end,
-            page=page,
-            per_page=per_page
-        )
-    elif current_user.role.value == "vendor":
-        result = service.get_invoices(
-            vendor_id=current_user.id,
-            status=status,
-            start_date=start,
-            end_date=end,
-            page=page,
-            per_page=per_page
-        )
-    else:  # admin
-        result = service.get_invoices(
-            status=status,
-            start_date=start,
-            end_date=end,
-            page=page,
-            per_page=per_page
-        )
+    try:
+        if current_user.role.value == "customer":
+            result = service.get_invoices(
+                customer_id=current_user.id,
+                status=status,
+                start_date=start,
+                end_date=end,
+                page=page,
+                per_page=per_page,
+                cursor=cursor,
+                count=count
+            )
+        elif current_user.role.value == "vendor":
+            result = service.get_invoices(
+                vendor_id=current_user.id,
+                status=status,
+                start_date=start,
+                end_date=end,
+                page=page,
+                per_page=per_page,
+                cursor=cursor,
+                count=count
+            )
+        else:  # admin
+            result = service.get_invoices(
+                status=status,
+                start_date=start,
+                end_date=end,
+                page=page,
+                per_page=per_page,
+                cursor=cursor,
+                count=count
+            )
+    except ValueError as e:
+        # Malformed cursor ("status" is shadowed by the query parameter here)
+        raise HTTPException(status_code=400, detail=str(e))
     
     return InvoiceListResponse(**result)
 
@@ -259,16 +271,24 @@ async def get_payments(
     status: Optional[str] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: str = Query("exact", pattern="^(exact|estimate|none)$"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get payments"""
     service = InvoiceService(db)
-    result = service.get_payments(
-        invoice_id=invoice_id,
-        status=status,
-        page=page,
-        per_page=per_page
-    )
+    try:
+        result = service.get_payments(
+            invoice_id=invoice_id,
+            status=status,
+            page=page,
+            per_page=per_page,
+            cursor=cursor,
+            count=count
+        )
+    except ValueError as e:
+        # Malformed cursor ("status" is shadowed by the query parameter here)
+        raise HTTPException(status_code=400, detail=str(e))
     
     return PaymentListResponse(**result)
@@ -4,17 +4,19 @@ Order API Routes
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 
 from app.core.database import get_db
 from app.core.security import get_current_user, require_vendor
 from app.services.order_service import OrderService
+from app.services.cart_service import CartService
 from app.schemas.order import (
-    OrderCreate, OrderUpdate, OrderResponse, OrderListResponse,
+    OrderCreate, OrderItemCreate, OrderUpdate, OrderResponse, OrderListResponse,
     OrderConfirm, OrderStatusUpdate, PickupConfirm, ReturnConfirm,
-    AddToCartRequest, CartResponse
+    AddToCartRequest, CartResponse, OrderBulkTransition, OrderBulkTransitionResponse
 )
+from app.services.order_lifecycle import OrderEvent, TRANSITIONS
 from app.models.user import User
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
@@ -27,20 +29,8 @@ async def get_cart(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get current user's cart (active quotation)"""
-    service = OrderService(db)
-    cart = service.get_customer_cart(current_user.id)
-    
-    if not cart:
-        return CartResponse(order=None, item_count=0, subtotal=0, tax_amount=0, total_amount=0)
-    
-    return CartResponse(
-        order=OrderResponse.model_validate(cart),
-        item_count=len(cart.items),
-        subtotal=cart.subtotal,
-        tax_amount=cart.tax_amount,
-        total_amount=cart.total_amount
-    )
+    """Get current user's cart (active quotation); reads never write"""
+    return CartService(db).get_cart(current_user.id)
 
 
 @router.post("/cart/add", response_model=CartResponse)
@@ -50,11 +40,9 @@ async def add_to_cart(
     db: Session = Depends(get_db)
 ):
     """Add product to cart"""
-    service = OrderService(db)
+    service = CartService(db)
     
     try:
-        from app.schemas.order import OrderItemCreate
-        
         item = OrderItemCreate(
             product_id=data.product_id,
             variant_id=data.variant_id,
@@ -64,15 +52,7 @@ async def add_to_cart(
             rental_period_type=data.rental_period_type
         )
         
-        cart = service.add_to_cart(current_user.id, item)
-        
-        return CartResponse(
-            order=OrderResponse.model_validate(cart),
-            item_count=len(cart.items),
-            subtotal=cart.subtotal,
-            tax_amount=cart.tax_amount,
-            total_amount=cart.total_amount
-        )
+        return service.add_item(current_user.id, item)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
@@ -84,19 +64,10 @@ async def remove_from_cart(
     db: Session = Depends(get_db)
 ):
     """Remove item from cart"""
-    service = OrderService(db)
-    cart = service.remove_from_cart(current_user.id, item_id)
-    
-    if not cart:
-        return CartResponse(order=None, item_count=0, subtotal=0, tax_amount=0, total_amount=0)
-    
-    return CartResponse(
-        order=OrderResponse.model_validate(cart),
-        item_count=len(cart.items),
-        subtotal=cart.subtotal,
-        tax_amount=cart.tax_amount,
-        total_amount=cart.total_amount
-    )
+    try:
+        return CartService(db).remove_item(current_user.id, item_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 # Order Routes
@@ -107,7 +78,7 @@ async def create_order(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Create a new order (quotation)"""
+    """Create a new order (quotation); a multi-vendor cart returns its first order, see /orders/checkout"""
     service = OrderService(db)
     
     try:
@@ -117,6 +88,59 @@ async def create_order(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post("/checkout", response_model=List[OrderResponse], status_code=status.HTTP_201_CREATED)
+async def checkout(
+    data: OrderCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Create one quotation per vendor for the whole cart in a single transaction"""
+    service = OrderService(db)
+    
+    try:
+        orders = service.checkout(current_user.id, data)
+        return [OrderResponse.model_validate(order) for order in orders]
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/transitions", response_model=OrderBulkTransitionResponse)
+async def bulk_transition(
+    data: OrderBulkTransition,
+    current_user: User = Depends(require_vendor),
+    db: Session = Depends(get_db)
+):
+    """
+    Pick up, return or cancel many orders in one transaction (Vendor only)
+    Either every order moves or none does; the error names the first order
+    that cannot.
+    """
+    service = OrderService(db)
+    order_ids = list(dict.fromkeys(data.order_ids))
+    
+    vendors = service.get_order_vendors(order_ids)
+    missing = [order_id for order_id in order_ids if order_id not in vendors]
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Orders not found: {missing}")
+    
+    if current_user.role.value != "admin" and any(vendor_id != current_user.id for vendor_id in vendors.values()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    
+    event = OrderEvent(data.event.value)
+    context = data.model_dump(exclude={"event", "order_ids"})
+    try:
+        service.transition(order_ids, event, **context)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return OrderBulkTransitionResponse(
+        event=event.value,
+        status=TRANSITIONS[event].target.value,
+        order_ids=order_ids,
+        count=len(order_ids)
+    )
+
+
 @router.get("", response_model=OrderListResponse)
 async def get_orders(
     status: Optional[str] = None,
@@ -124,6 +148,8 @@ async def get_orders(
     end_date: Optional[str] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: str = Query("exact", pattern="^(exact|estimate|none)$"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -134,27 +160,35 @@ async def get_orders(
     start = datetime.fromisoformat(start_date) if start_date else None
     end = datetime.fromisoformat(end_date) if end_date else None
     
-    if current_user.role.value == "customer":
-        result = service.get_orders(
-            customer_id=current_user.id,
-            status=status,
-            start_date=start,
-            end_date=end,
-            page=page,
-            per_page=per_page
-        )
-    elif current_user.role.value in ["vendor", "admin"]:
-        vendor_id = current_user.id if current_user.role.value == "vendor" else None
-        result = service.get_orders(
-            vendor_id=vendor_id,
-            status=status,
-            start_date=start,
-            end_date=end,
-            page=page,
-            per_page=per_page
-        )
-    else:
-        result = {"items": [], "total": 0, "page": 1, "per_page": 20, "pages": 0}
+    try:
+        if current_user.role.value == "customer":
+            result = service.get_orders(
+                customer_id=current_user.id,
+                status=status,
+                start_date=start,
+                end_date=end,
+                page=page,
+                per_page=per_page,
+                cursor=cursor,
+                count=count
+            )
+        elif current_user.role.value in ["vendor", "admin"]:
+            vendor_id = current_user.id if current_user.role.value == "vendor" else None
+            result = service.get_orders(
+                vendor_id=vendor_id,
+                status=status,
+                start_date=start,
+                end_date=end,
+                page=page,
+                per_page=per_page,
+                cursor=cursor,
+                count=count
+            )
+        else:
+            result = {"items": [], "total": 0, "page": 1, "per_page": 20, "pages": 0}
+    except ValueError as e:
+        # Malformed cursor ("status" is shadowed by the query parameter here)
+        raise HTTPException(status_code=400, detail=str(e))
     
     return OrderListResponse(**result)
 
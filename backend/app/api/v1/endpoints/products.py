@@ -2,26 +2,49 @@
 Product API Routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Request, Response
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Dict
+from datetime import datetime
+import asyncio
 import uuid
 import shutil
 import os
 
 from app.core.database import get_db
 from app.core.security import get_current_user, require_vendor, require_admin
+from app.core.http_cache import response_cache
 from app.services.product_service import ProductService
+from app.services.product_bulk import ProductBulkService, MEDIA_TYPES
 from app.schemas.product import (
-    CategoryCreate, CategoryResponse,
+    CategoryCreate, CategoryUpdate, CategoryResponse, CategoryTreeNode,
     ProductAttributeCreate, ProductAttributeResponse,
     ProductCreate, ProductUpdate, ProductResponse, ProductListResponse,
-    ProductAvailabilityCheck, ProductAvailabilityResponse
+    ProductCardListResponse,
+    ProductAvailabilityCheck, ProductAvailabilityResponse,
+    ProductAvailabilityBatchCheck, ProductAvailabilityBatchResponse,
+    PriceQuoteRequest, PriceQuoteResponse,
+    ProductFacetsResponse, ProductImportResponse
 )
 from app.models.user import User
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+# Serializers for cached list responses
+category_list = TypeAdapter(List[CategoryResponse])
+category_tree_list = TypeAdapter(List[CategoryTreeNode])
+attribute_list = TypeAdapter(List[ProductAttributeResponse])
+
+
+def attribute_filters(request: Request) -> Dict[str, List[str]]:
+    """attr.<name>=<value> query parameters; repeating a name matches any of its values"""
+    filters: Dict[str, List[str]] = {}
+    for key, value in request.query_params.multi_items():
+        if key.startswith("attr.") and len(key) > len("attr."):
+            filters.setdefault(key[len("attr."):], []).append(value)
+    return filters
+
 
 @router.post("/upload-image")
 async def upload_product_image(
@@ -51,10 +74,13 @@ async def upload_product_image(
 # Category Routes
 
 @router.get("/categories", response_model=List[CategoryResponse])
-async def get_categories(db: Session = Depends(get_db)):
-    """Get all categories"""
-    service = ProductService(db)
-    return service.get_categories()
+async def get_categories(request: Request, db: Session = Depends(get_db)):
+    """Get all categories (cacheable, honours If-None-Match)"""
+    def render() -> bytes:
+        categories = ProductService(db).get_categories()
+        return category_list.dump_json(category_list.validate_python(categories, from_attributes=True))
+    
+    return response_cache.respond(request, ["categories"], render)
 
 
 @router.post("/categories", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
@@ -65,21 +91,64 @@ async def create_category(
 ):
     """Create a new category (Admin only)"""
     service = ProductService(db)
-    return service.create_category(
-        name=data.name,
-        description=data.description,
-        parent_id=data.parent_id,
-        image_url=data.image_url
-    )
+    try:
+        return service.create_category(
+            name=data.name,
+            description=data.description,
+            parent_id=data.parent_id,
+            image_url=data.image_url
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/categories/tree", response_model=List[CategoryTreeNode])
+async def get_category_tree(
+    request: Request,
+    root_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Get the nested category hierarchy, optionally only the subtree under root_id"""
+    def render() -> bytes:
+        tree = ProductService(db).get_category_tree(root_id)
+        if tree is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+        return category_tree_list.dump_json(category_tree_list.validate_python(tree))
+    
+    return response_cache.respond(request, ["categories"], render)
+
+
+@router.put("/categories/{category_id}", response_model=CategoryResponse)
+async def update_category(
+    category_id: int,
+    data: CategoryUpdate,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Rename or move a category (Admin only)"""
+    service = ProductService(db)
+    
+    try:
+        category = service.update_category(category_id, data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    if not category:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+    
+    return category
 
 
 # Product Attribute Routes
 
 @router.get("/attributes", response_model=List[ProductAttributeResponse])
-async def get_attributes(db: Session = Depends(get_db)):
-    """Get all product attributes"""
-    service = ProductService(db)
-    return service.get_attributes()
+async def get_attributes(request: Request, db: Session = Depends(get_db)):
+    """Get all product attributes (cacheable, honours If-None-Match)"""
+    def render() -> bytes:
+        attributes = ProductService(db).get_attributes()
+        return attribute_list.dump_json(attribute_list.validate_python(attributes, from_attributes=True))
+    
+    return response_cache.respond(request, ["attributes"], render)
 
 
 @router.post("/attributes", response_model=ProductAttributeResponse, status_code=status.HTTP_201_CREATED)
@@ -97,64 +166,224 @@ async def create_attribute(
 
 @router.get("", response_model=ProductListResponse)
 async def get_products(
+    request: Request,
     category_id: Optional[int] = None,
+    include_subcategories: bool = True,
     brand: Optional[str] = None,
     color: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     search: Optional[str] = None,
+    available_from: Optional[datetime] = None,
+    available_to: Optional[datetime] = None,
+    min_quantity: int = Query(1, ge=1),
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: str = Query("exact", pattern="^(exact|estimate|none)$"),
     db: Session = Depends(get_db)
 ):
-    """Get published products (public)"""
+    """
+    Get published products (public)
+    Pass available_from and available_to to list only products bookable
+    for that whole window (at least min_quantity units). category_id
+    includes its subcategories unless include_subcategories=false.
+    attr.<name>=<value> filters on product or variant attributes
+    (e.g. attr.size=L; repeat a name to match any of several values)
+    """
+    def render() -> bytes:
+        service = ProductService(db)
+        try:
+            result = service.get_products(
+                is_published=True,
+                is_rentable=True,
+                category_id=category_id,
+                include_subcategories=include_subcategories,
+                brand=brand,
+                color=color,
+                attributes=attribute_filters(request),
+                min_price=min_price,
+                max_price=max_price,
+                search=search,
+                available_from=available_from,
+                available_to=available_to,
+                min_quantity=min_quantity,
+                page=page,
+                per_page=per_page,
+                cursor=cursor,
+                count=count
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return ProductListResponse(**result).model_dump_json().encode()
+    
+    return response_cache.respond(request, ["catalog", "categories"], render)
+
+
+@router.get("/cards", response_model=ProductCardListResponse)
+async def get_product_cards(
+    request: Request,
+    category_id: Optional[int] = None,
+    include_subcategories: bool = True,
+    brand: Optional[str] = None,
+    color: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    search: Optional[str] = None,
+    available_from: Optional[datetime] = None,
+    available_to: Optional[datetime] = None,
+    min_quantity: int = Query(1, ge=1),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: str = Query("exact", pattern="^(exact|estimate|none)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get published products as lean listing cards (public)
+    Same filters (attr.<name>=<value> included) and pagination as
+    GET /products, returning only the fields a catalog grid shows
+    """
+    def render() -> bytes:
+        service = ProductService(db)
+        try:
+            result = service.get_product_cards(
+                is_published=True,
+                is_rentable=True,
+                category_id=category_id,
+                include_subcategories=include_subcategories,
+                brand=brand,
+                color=color,
+                attributes=attribute_filters(request),
+                min_price=min_price,
+                max_price=max_price,
+                search=search,
+                available_from=available_from,
+                available_to=available_to,
+                min_quantity=min_quantity,
+                page=page,
+                per_page=per_page,
+                cursor=cursor,
+                count=count
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return ProductCardListResponse(**result).model_dump_json().encode()
+    
+    return response_cache.respond(request, ["catalog", "categories"], render)
+
+
+@router.get("/facets", response_model=ProductFacetsResponse)
+async def get_product_facets(
+    category_id: Optional[int] = None,
+    brand: Optional[str] = None,
+    color: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    search: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Facet counts for the storefront catalog (public)
+    Takes the same filters as GET /products; each facet is counted with
+    every filter applied except its own
+    """
     service = ProductService(db)
-    result = service.get_products(
-        is_published=True,
-        is_rentable=True,
+    return service.get_facets(
         category_id=category_id,
         brand=brand,
         color=color,
         min_price=min_price,
         max_price=max_price,
-        search=search,
-        page=page,
-        per_page=per_page
+        search=search
     )
-    return ProductListResponse(**result)
 
 
 @router.get("/vendor", response_model=ProductListResponse)
 async def get_vendor_products(
+    request: Request,
     is_published: Optional[bool] = None,
     search: Optional[str] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: str = Query("exact", pattern="^(exact|estimate|none)$"),
     current_user: User = Depends(require_vendor),
     db: Session = Depends(get_db)
 ):
-    """Get vendor's own products"""
+    """Get vendor's own products (accepts attr.<name>=<value> filters)"""
     service = ProductService(db)
-    result = service.get_products(
-        vendor_id=current_user.id,
-        is_published=is_published,
-        search=search,
-        page=page,
-        per_page=per_page
-    )
+    try:
+        result = service.get_products(
+            vendor_id=current_user.id,
+            is_published=is_published,
+            search=search,
+            attributes=attribute_filters(request),
+            page=page,
+            per_page=per_page,
+            cursor=cursor,
+            count=count
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return ProductListResponse(**result)
 
 
-@router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(product_id: int, db: Session = Depends(get_db)):
-    """Get product by ID"""
-    service = ProductService(db)
-    product = service.get_product(product_id)
+@router.post("/import", response_model=ProductImportResponse)
+async def import_products(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|xlsx|ndjson)$"),
+    current_user: User = Depends(require_vendor),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk-create products from a CSV, XLSX or NDJSON file (Vendor only)
+    Columns follow ProductCreate (variants, attributes and gallery_images as
+    JSON in CSV/XLSX cells); the format comes from the file extension unless
+    given. Returns a per-row error report; valid rows are imported.
+    """
+    service = ProductBulkService(db)
     
-    if not product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    try:
+        # Large files take a while; keep the event loop free
+        report = await asyncio.to_thread(
+            service.import_products, current_user.id, file.file, file.filename, format
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    return ProductResponse.model_validate(product)
+    return ProductImportResponse(**report)
+
+
+@router.get("/export")
+async def export_products(
+    format: str = Query("csv", pattern="^(csv|xlsx|ndjson)$"),
+    current_user: User = Depends(require_vendor),
+    db: Session = Depends(get_db)
+):
+    """Export products in the import layout (vendors get their own, admins all)"""
+    service = ProductBulkService(db)
+    vendor_id = None if current_user.role.value == "admin" else current_user.id
+    
+    content = await asyncio.to_thread(service.export_products, format, vendor_id)
+    
+    return Response(
+        content=content,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=products_export.{format}"}
+    )
+
+
+@router.get("/{product_id}", response_model=ProductResponse)
+async def get_product(product_id: int, request: Request, db: Session = Depends(get_db)):
+    """Get product by ID (cacheable, honours If-None-Match)"""
+    def render() -> bytes:
+        product = ProductService(db).get_product(product_id)
+        if not product:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        return ProductResponse.model_validate(product).model_dump_json().encode()
+    
+    return response_cache.respond(request, [f"product:{product_id}", "categories"], render)
 
 
 @router.post("", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
@@ -248,14 +477,59 @@ async def check_availability(
     return ProductAvailabilityResponse(**result)
 
 
+@router.post("/check-availability/batch", response_model=ProductAvailabilityBatchResponse)
+async def check_availability_batch(
+    data: ProductAvailabilityBatchCheck,
+    db: Session = Depends(get_db)
+):
+    """Check availability for every line of a cart in one request"""
+    service = ProductService(db)
+    results = service.check_availability_bulk(data.items)
+    return ProductAvailabilityBatchResponse(
+        is_available=all(r["is_available"] for r in results),
+        items=[ProductAvailabilityResponse(**r) for r in results]
+    )
+
+
+@router.post("/quote", response_model=PriceQuoteResponse)
+async def quote_prices(
+    data: PriceQuoteRequest,
+    db: Session = Depends(get_db)
+):
+    """Price every line of a cart with the cheapest combination of rental periods"""
+    service = ProductService(db)
+    try:
+        return PriceQuoteResponse(**service.quote_prices(data.items))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/{product_id}/stock")
+async def get_product_stock(product_id: int, db: Session = Depends(get_db)):
+    """Get on-hand, reserved and available stock per SKU from the inventory balances"""
+    service = ProductService(db)
+    stock = service.get_stock(product_id)
+    
+    if stock is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    
+    return stock
+
+
 @router.get("/{product_id}/availability-calendar")
 async def get_availability_calendar(
     product_id: int,
     start_date: str,
     end_date: str,
+    granularity: Optional[str] = Query(None, pattern="^(day|hour)$"),
+    variant_id: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    """Get product availability calendar"""
+    """
+    Get product availability calendar
+    Without granularity returns reservation rows; with granularity=day|hour
+    returns per-bucket reserved and available quantity arrays
+    """
     from datetime import datetime
     
     service = ProductService(db)
@@ -266,4 +540,15 @@ async def get_availability_calendar(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format")
     
+    if granularity:
+        try:
+            calendar = service.get_availability_buckets(product_id, start, end, granularity, variant_id)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        
+        if calendar is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        
+        return calendar
+    
     return service.get_availability_calendar(product_id, start, end)
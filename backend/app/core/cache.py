@@ -0,0 +1,238 @@
+"""
+Cache Module
+Pluggable key/value cache backends (in-process LRU or shared Redis) with hit/miss stats
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero all counters"""
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.invalidations = 0
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """Increase one counter"""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a copy of the counters with the hit ratio"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "sets": self.sets,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None
+            }
+
+
+class CacheBackend:
+    """Interface every cache backend implements"""
+
+    name = "base"
+    # Whether every process sees the same data
+    shared = False
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value, or None when missing or expired"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        """Store a JSON-serializable value"""
+        raise NotImplementedError
+
+    def add(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> bool:
+        """Store a value only if the key is absent; returns whether it was stored"""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Remove a key"""
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        """Atomically increment an integer counter (created at 0) and return it"""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Drop everything"""
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU with per-entry TTL (counters never expire or get evicted)"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._counters:
+                return self._counters[key]
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def add(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or time.monotonic() < entry[0]):
+                return False
+        self.set(key, value, ttl_seconds)
+        return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._counters.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class LocalRedisStandIn:
+    """
+    Minimal in-process stand-in for the redis client calls used here
+    Stores bytes like Redis does, so serialization is exercised in
+    development and tests without a Redis server.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        if not isinstance(value, bytes):
+            value = str(value).encode()
+        with self._lock:
+            entry = self._data.get(key)
+            if nx and entry is not None and (entry[0] is None or time.monotonic() < entry[0]):
+                return None
+            self._data[key] = (time.monotonic() + ex if ex else None, value)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            _, value = self._data.get(key, (None, b"0"))
+            value = int(value) + 1
+            self._data[key] = (None, str(value).encode())
+            return value
+
+    def flushdb(self) -> bool:
+        with self._lock:
+            self._data.clear()
+        return True
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared cache over Redis (or the local stand-in); values are stored as JSON"""
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "rental:"):
+        self.client = client
+        self.prefix = prefix
+        self.shared = not isinstance(client, LocalRedisStandIn)
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl_seconds or None)
+
+    def add(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> bool:
+        return bool(self.client.set(self.prefix + key, json.dumps(value), ex=ttl_seconds or None, nx=True))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(self.prefix + key))
+
+    def clear(self) -> None:
+        self.client.flushdb()
+
+
+def create_cache_backend(backend: Optional[str] = None) -> CacheBackend:
+    """
+    Build the configured backend
+    CACHE_BACKEND=memory (default) keeps everything in-process. With
+    CACHE_BACKEND=redis, REDIS_URL selects the server; without a URL the
+    local stand-in is used.
+    """
+    backend = (backend or settings.CACHE_BACKEND).lower()
+
+    if backend == "memory":
+        return MemoryCacheBackend(max_entries=settings.CACHE_MAX_ENTRIES)
+
+    if backend == "redis":
+        if not settings.REDIS_URL:
+            return RedisCacheBackend(LocalRedisStandIn())
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package (pip install redis)")
+        return RedisCacheBackend(redis.Redis.from_url(settings.REDIS_URL))
+
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -43,6 +43,59 @@ class Settings(BaseSettings):
     # Database Toggle
     USE_SQLITE: str = os.getenv("USE_SQLITE", "true")
     
+    # Availability Caching
+    OCCUPANCY_CACHE_TTL_SECONDS: int = int(os.getenv("OCCUPANCY_CACHE_TTL_SECONDS", "300"))
+    OCCUPANCY_CACHE_MAX_PRODUCTS: int = int(os.getenv("OCCUPANCY_CACHE_MAX_PRODUCTS", "1000"))
+    AVAILABILITY_CACHE_ENABLED: str = os.getenv("AVAILABILITY_CACHE_ENABLED", "true")
+    AVAILABILITY_CACHE_TTL_SECONDS: int = int(os.getenv("AVAILABILITY_CACHE_TTL_SECONDS", "30"))
+    # Interval index: "auto" (only with shared generations), "true" (single process) or "false"
+    AVAILABILITY_INDEX_ENABLED: str = os.getenv("AVAILABILITY_INDEX_ENABLED", "auto")
+    
+    # Result Cache Backend ("memory" per process, or "redis" shared)
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
+    
+    # HTTP Caching (public catalog GETs)
+    HTTP_CACHE_MAX_AGE_SECONDS: int = int(os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", "60"))
+    RESPONSE_CACHE_ENABLED: str = os.getenv("RESPONSE_CACHE_ENABLED", "true")
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+    
+    # Reservation Sweeper
+    RESERVATION_SWEEPER_ENABLED: str = os.getenv("RESERVATION_SWEEPER_ENABLED", "true")
+    RESERVATION_SWEEP_INTERVAL_SECONDS: int = int(os.getenv("RESERVATION_SWEEP_INTERVAL_SECONDS", "300"))
+    RESERVATION_HOLD_TTL_HOURS: int = int(os.getenv("RESERVATION_HOLD_TTL_HOURS", "24"))
+    CART_TTL_HOURS: int = int(os.getenv("CART_TTL_HOURS", "72"))
+    SWEEP_BATCH_SIZE: int = int(os.getenv("SWEEP_BATCH_SIZE", "500"))
+    
+    # Cart Store (active carts cached in the cache backend over orders)
+    CART_STORE_TTL_SECONDS: int = int(os.getenv("CART_STORE_TTL_SECONDS", "3600"))
+    
+    # Catalog Facets (daily price bucket lower bounds)
+    FACET_PRICE_BUCKETS: str = os.getenv("FACET_PRICE_BUCKETS", "0,500,1000,2500,5000,10000")
+    FACET_INDEX_REFRESH_SECONDS: int = int(os.getenv("FACET_INDEX_REFRESH_SECONDS", "300"))
+    
+    # Bulk Product Import (rows per transaction)
+    IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+    
+    # Category Tree Cache
+    CATEGORY_TREE_TTL_SECONDS: int = int(os.getenv("CATEGORY_TREE_TTL_SECONDS", "300"))
+    
+    # Rental Pricing (per-SKU price table cache)
+    PRICE_TABLE_TTL_SECONDS: int = int(os.getenv("PRICE_TABLE_TTL_SECONDS", "300"))
+    # Longest window a single quote may cover (cost arrays grow with it)
+    MAX_RENTAL_WINDOW_DAYS: int = int(os.getenv("MAX_RENTAL_WINDOW_DAYS", "366"))
+    
+    # Document Numbers (values each worker reserves at a time; 1 keeps numbers in allocation order)
+    SEQUENCE_BLOCK_SIZE: int = int(os.getenv("SEQUENCE_BLOCK_SIZE", "50"))
+    
+    # Pagination (count=estimate stops counting here)
+    PAGINATION_COUNT_CAP: int = int(os.getenv("PAGINATION_COUNT_CAP", "10000"))
+    
+    # Inventory Ledger (reconcile_inventory.py --loop)
+    INVENTORY_RECONCILE_INTERVAL_SECONDS: int = int(os.getenv("INVENTORY_RECONCILE_INTERVAL_SECONDS", "3600"))
+    
     @property
     def DATABASE_URL(self) -> str:
         """Construct database URL with SQLite fallback"""
@@ -0,0 +1,143 @@
+"""
+HTTP Cache Module
+Conditional GET support (strong ETag / Last-Modified / Cache-Control) and an
+in-process response cache for public catalog endpoints
+"""
+
+import hashlib
+from collections import namedtuple
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.cache import CacheBackend, CacheStats, MemoryCacheBackend, create_cache_backend
+from app.core.config import settings
+
+# One serialized response: body, strong ETag and when it was rendered
+CachedResponse = namedtuple("CachedResponse", ["body", "etag", "last_modified"])
+
+
+def strong_etag(body: bytes) -> str:
+    """Strong validator: a digest of the exact response bytes"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison (weak comparison, as RFC 9110 requires for GET)"""
+    if header.strip() == "*":
+        return True
+    candidates = [value.strip() for value in header.split(",")]
+    return any(value.removeprefix("W/") == etag for value in candidates)
+
+
+def is_not_modified(request: Request, entry: CachedResponse) -> bool:
+    """Whether the client's validators still match (If-None-Match wins over If-Modified-Since)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, entry.etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return entry.last_modified.replace(microsecond=0) <= since
+    return False
+
+
+class ResponseCache:
+    """
+    Rendered JSON bodies of public GETs, keyed by URL and scope generations
+    A response depends on one or more scopes ("catalog", "product:<id>",
+    "categories", "attributes"). Writes bump a scope's generation after they
+    commit, which orphans every cached body built on it; orphans age out
+    through the TTL and LRU. Generations live in the shared cache backend
+    (so a redis backend invalidates all workers), bodies in this process.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 60,
+        max_entries: int = 2000,
+        enabled: bool = True,
+        generation_backend: Optional[CacheBackend] = None
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.bodies = MemoryCacheBackend(max_entries=max_entries)
+        self._generation_backend = generation_backend
+        self.stats = CacheStats()
+
+    @property
+    def generation_backend(self) -> CacheBackend:
+        """Backend holding generations, created from settings on first use"""
+        if self._generation_backend is None:
+            self._generation_backend = create_cache_backend()
+        return self._generation_backend
+
+    def generations(self, scopes: Iterable[str]) -> Tuple[int, ...]:
+        """Current generation of each scope"""
+        return tuple(int(self.generation_backend.get(f"http:gen:{scope}") or 0) for scope in scopes)
+
+    def invalidate(self, *scopes: str) -> None:
+        """Bump scope generations (call after the write commits)"""
+        for scope in scopes:
+            self.generation_backend.incr(f"http:gen:{scope}")
+        self.stats.incr("invalidations")
+
+    def invalidate_product(self, product_id: int) -> None:
+        """A product changed: its detail page and every product list"""
+        self.invalidate(f"product:{product_id}", "catalog")
+
+    def respond(self, request: Request, scopes: Iterable[str], render: Callable[[], bytes]) -> Response:
+        """
+        Serve a JSON GET with validators, from cache when possible
+        render() builds the body; exceptions it raises (e.g. 404) pass
+        through and are never cached. Generations are read before rendering
+        so a write committing meanwhile is never hidden behind the new entry.
+        """
+        entry = None
+        key = None
+        if self.enabled:
+            query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+            key = f"{request.url.path}?{query}:{self.generations(scopes)}"
+            entry = self.bodies.get(key)
+            self.stats.incr("hits" if entry is not None else "misses")
+
+        if entry is None:
+            body = render()
+            entry = CachedResponse(body, strong_etag(body), datetime.now(timezone.utc))
+            if key is not None:
+                self.bodies.set(key, entry, self.ttl_seconds)
+                self.stats.incr("sets")
+
+        headers = {
+            "ETag": entry.etag,
+            "Last-Modified": format_datetime(entry.last_modified, usegmt=True),
+            "Cache-Control": f"public, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}"
+        }
+        if is_not_modified(request, entry):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def snapshot(self) -> dict:
+        """Get the generation backend name, settings and counters"""
+        return {
+            "enabled": self.enabled,
+            "backend": self.generation_backend.name,
+            "ttl_seconds": self.ttl_seconds,
+            **self.stats.snapshot()
+        }
+
+
+# Process-wide response cache
+response_cache = ResponseCache(
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    enabled=settings.RESPONSE_CACHE_ENABLED.lower() == "true"
+)
@@ -0,0 +1,62 @@
+"""
+Locking Module
+Per-product critical sections for validate-and-reserve flows
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator
+
+from sqlalchemy.orm import Session
+
+# In-process locks standing in for row locks on SQLite
+_local_locks: Dict[int, threading.Lock] = {}
+_local_locks_guard = threading.Lock()
+
+
+def _local_lock(product_id: int) -> threading.Lock:
+    """Get (or create) the in-process lock for a product"""
+    with _local_locks_guard:
+        lock = _local_locks.get(product_id)
+        if lock is None:
+            lock = _local_locks[product_id] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def lock_products(db: Session, product_ids: Iterable[int]) -> Iterator[Dict[int, "Product"]]:
+    """
+    Lock product inventory rows for the duration of the block
+    Issues SELECT ... FOR UPDATE on the products (row locks on MySQL). SQLite
+    has no row locks, so a per-process lock per product stands in for it.
+    Locks are taken in id order to avoid deadlocks. Callers must commit inside
+    the block; on error the transaction is rolled back to release the rows.
+    Yields the locked products keyed by id.
+    """
+    from app.models.product import Product
+
+    ids = sorted(set(product_ids))
+    held = []
+
+    try:
+        if db.get_bind().dialect.name == "sqlite":
+            for product_id in ids:
+                lock = _local_lock(product_id)
+                lock.acquire()
+                held.append(lock)
+
+        products = {}
+        if ids:
+            products = {
+                p.id: p for p in db.query(Product).filter(
+                    Product.id.in_(ids)
+                ).order_by(Product.id).with_for_update().populate_existing().all()
+            }
+
+        yield products
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        for lock in reversed(held):
+            lock.release()
@@ -0,0 +1,108 @@
+"""
+Pagination Module
+Page-number and keyset (cursor) pagination over (created_at, id) with optional counts
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+
+# How the total is computed: exact COUNT(*), counted up to a cap, or skipped
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor pointing just after a row"""
+    raw = json.dumps([created_at.isoformat() if created_at else None, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Decode a cursor from encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def count_rows(query: Query, count: str = "exact") -> Tuple[Optional[int], bool]:
+    """
+    Total rows of a query as (total, is_estimate)
+    "estimate" stops counting at PAGINATION_COUNT_CAP rows, so deep
+    result sets cost a bounded scan and report a lower bound.
+    """
+    if count not in COUNT_MODES:
+        raise ValueError(f"count must be one of: {', '.join(COUNT_MODES)}")
+
+    if count == "none":
+        return None, False
+
+    if count == "estimate":
+        cap = settings.PAGINATION_COUNT_CAP
+        total = query.session.query(query.order_by(None).limit(cap + 1).subquery()).count()
+        return min(total, cap), total > cap
+
+    return query.order_by(None).count(), False
+
+
+def paginate(
+    query: Query,
+    model,
+    page: int = 1,
+    per_page: int = 20,
+    cursor: Optional[str] = None,
+    count: str = "exact",
+    ordering: Optional[list] = None
+) -> Dict[str, Any]:
+    """
+    Paginate a query newest first
+    With a cursor, rows after it in (created_at, id) order are returned and
+    page is ignored; every response carries next_cursor for the following
+    batch, so clients can switch to cursors after any page. A custom
+    ordering (e.g. search relevance) applies to page mode only and yields
+    no next_cursor, since cursors follow (created_at, id).
+    """
+    total, estimated = count_rows(query, count)
+    keyset = [model.created_at.desc(), model.id.desc()]
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # NULL created_at sorts last in descending order (MySQL and SQLite),
+        # and those rows page by id alone
+        if created_at is None:
+            query = query.filter(model.created_at.is_(None), model.id < row_id)
+        else:
+            query = query.filter(
+                or_(
+                    model.created_at < created_at,
+                    and_(model.created_at == created_at, model.id < row_id),
+                    model.created_at.is_(None)
+                )
+            )
+        rows = query.order_by(*keyset).limit(per_page + 1).all()
+        page = None
+    else:
+        rows = query.order_by(*(ordering or keyset)).offset((page - 1) * per_page).limit(per_page + 1).all()
+
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page and (cursor or not ordering):
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+
+    return {
+        "items": items,
+        "total": total,
+        "total_estimated": estimated,
+        "page": page,
+        "per_page": per_page,
+        "pages": (total + per_page - 1) // per_page if total is not None else None,
+        "next_cursor": next_cursor
+    }
@@ -0,0 +1,134 @@
+"""
+Sequences Module
+Contention-free allocation of per-period document numbers
+"""
+
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.sequence import SequenceCounter
+
+
+def highest_suffix(db: Session, column, prefix: str) -> int:
+    """Largest numeric suffix among existing `column` values starting with prefix (0 if none)"""
+    values = db.query(column).filter(column.like(f"{prefix}%")).all()
+    suffixes = [value[len(prefix):] for (value,) in values]
+    return max((int(suffix) for suffix in suffixes if suffix.isdigit()), default=0)
+
+
+def _increment(conn: Connection, name: str, size: int) -> Optional[int]:
+    """Take the next `size` values of an existing counter; first value, or None if it does not exist"""
+    result = conn.execute(
+        update(SequenceCounter)
+        .where(SequenceCounter.name == name)
+        .values(next_value=SequenceCounter.next_value + size, updated_at=datetime.utcnow())
+    )
+    if not result.rowcount:
+        return None
+    end = conn.execute(select(SequenceCounter.next_value).where(SequenceCounter.name == name)).scalar_one()
+    return end - size
+
+
+def _create(conn: Connection, name: str, size: int, start: int) -> int:
+    """Create a counter with its first `size` values taken"""
+    conn.execute(insert(SequenceCounter).values(name=name, next_value=start + size, updated_at=datetime.utcnow()))
+    return start
+
+
+class SequenceAllocator:
+    """
+    Allocates increasing values of named sequences from sequence_counters
+    On MySQL each worker reserves a block of block_size values in its own
+    short transaction (hi/lo) and hands them out from memory, so callers
+    never hold the counter row lock; values are unique across workers but
+    interleave between them, and unused values of a block (worker restart,
+    rolled-back caller) are skipped. SQLite allows one writer, so a second
+    connection would wait on the caller's open transaction; there the
+    counter is incremented by one inside the caller's transaction instead
+    and rolls back with it.
+    """
+
+    def __init__(self, block_size: int = 50, transactional: Optional[bool] = None):
+        self.block_size = max(1, block_size)
+        self.transactional = transactional
+        # (database, sequence) -> [next value, end of block]
+        self._blocks: Dict[Tuple[str, str], List[int]] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def next_value(self, db: Session, name: str, floor: Optional[Callable[[], int]] = None) -> int:
+        """
+        Next value of a sequence
+        floor() gives the highest value already in use and is only called
+        when the counter is created, so existing numbers are never reissued.
+        """
+        engine = db.get_bind()
+        transactional = self.transactional
+        if transactional is None:
+            transactional = engine.dialect.name == "sqlite"
+
+        if transactional:
+            conn = db.connection()
+            value = _increment(conn, name, 1)
+            if value is None:
+                value = _create(conn, name, 1, (floor() if floor else 0) + 1)
+            return value
+
+        key = (str(engine.url), name)
+        with self._lock(key):
+            block = self._blocks.get(key)
+            if block is None or block[0] >= block[1]:
+                start = self._reserve(engine, name, floor)
+                block = self._blocks[key] = [start, start + self.block_size]
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def _reserve(self, engine, name: str, floor: Optional[Callable[[], int]]) -> int:
+        """First value of a fresh block, taken in a transaction of its own"""
+        for _ in range(3):
+            with engine.begin() as conn:
+                start = _increment(conn, name, self.block_size)
+            if start is not None:
+                return start
+
+            start = (floor() if floor else 0) + 1
+            try:
+                with engine.begin() as conn:
+                    return _create(conn, name, self.block_size, start)
+            except IntegrityError:
+                continue  # Another worker created the counter first
+        raise RuntimeError(f"Could not allocate from sequence {name}")
+
+    def reset(self) -> None:
+        """Forget cached blocks (their remaining values are skipped)"""
+        with self._guard:
+            self._blocks.clear()
+
+
+def next_number(db: Session, sequence: str, column, prefix: str, width: int = 5) -> str:
+    """
+    prefix + the next value of sequence, zero-padded to width
+    A new sequence continues after the highest existing `column` value
+    with the same prefix.
+    """
+    value = sequence_allocator.next_value(db, sequence, floor=lambda: highest_suffix(db, column, prefix))
+    return f"{prefix}{value:0{width}d}"
+
+
+# Process-wide allocator
+sequence_allocator = SequenceAllocator(block_size=settings.SEQUENCE_BLOCK_SIZE)
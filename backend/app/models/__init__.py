@@ -4,7 +4,7 @@ Exports all models for easy importing
 """
 
 from app.models.user import User, UserRole
-from app.models.product import Product, ProductVariant, Category, ProductAttribute, RentalPeriodType
+from app.models.product import Product, ProductVariant, Category, CategoryClosure, ProductAttribute, ProductAttributeValue, RentalPeriodType
 from app.models.order import Order, OrderItem, OrderStatus, DeliveryMethod
 from app.models.invoice import Invoice, InvoiceItem, InvoiceStatus
 from app.models.payment import Payment, PaymentStatus, PaymentMethod
@@ -12,13 +12,15 @@ from app.models.reservation import Reservation, PickupDocument, ReturnDocument,
 from app.models.settings import RentalPeriodConfig, CompanySettings, Coupon, Notification
 from app.models.review import Review
 from app.models.complaint import Complaint, ComplaintStatus
+from app.models.inventory import InventoryMovement, InventoryBalance, MovementType
+from app.models.sequence import SequenceCounter
 
 __all__ = [
     # User
     "User", "UserRole",
     
     # Product
-    "Product", "ProductVariant", "Category", "ProductAttribute", "RentalPeriodType",
+    "Product", "ProductVariant", "Category", "CategoryClosure", "ProductAttribute", "ProductAttributeValue", "RentalPeriodType",
     
     # Order
     "Order", "OrderItem", "OrderStatus", "DeliveryMethod",
@@ -37,4 +39,10 @@ __all__ = [
     
     # Complaint
     "Complaint", "ComplaintStatus",
+    
+    # Inventory
+    "InventoryMovement", "InventoryBalance", "MovementType",
+    
+    # Sequences
+    "SequenceCounter",
 ]
@@ -0,0 +1,83 @@
+"""
+Inventory Model
+Append-only stock movement ledger and materialized per-SKU balances
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Index, UniqueConstraint
+from datetime import datetime
+import enum
+
+from app.core.database import Base
+
+
+class MovementType(str, enum.Enum):
+    """Why stock moved"""
+    OPENING = "opening"          # Balance carried over when the ledger was introduced
+    RECEIPT = "receipt"          # Stock added (new product / variant)
+    ADJUSTMENT = "adjustment"    # Manual on-hand correction
+    RESERVE = "reserve"          # Order confirmed
+    RELEASE = "release"          # Order cancelled
+    FULFILL = "fulfill"          # Rental returned
+    EXPIRE = "expire"            # Hold expired by the sweeper
+
+
+class InventoryMovement(Base):
+    """
+    One immutable stock movement for a SKU
+    Rows are never updated or deleted; balances are the running sum.
+    Product ids are not foreign keys so history survives product deletion.
+    """
+    __tablename__ = "inventory_movements"
+    __table_args__ = (
+        Index("ix_inventory_movements_sku", "product_id", "variant_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+
+    # SKU
+    product_id = Column(Integer, nullable=False)
+    variant_id = Column(Integer, nullable=True)
+
+    # Movement
+    movement_type = Column(Enum(MovementType), nullable=False)
+    on_hand_delta = Column(Integer, default=0, nullable=False)
+    reserved_delta = Column(Integer, default=0, nullable=False)
+
+    # Source document
+    reference_type = Column(String(50), nullable=True)  # order, reservation, product, ...
+    reference_id = Column(Integer, nullable=True)
+    note = Column(String(255), nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class InventoryBalance(Base):
+    """
+    Materialized stock balance per SKU
+    variant_id 0 is the product-level balance. Reserved quantities of variant
+    movements roll up into it (product availability counts every variant),
+    while on-hand stock is kept per SKU exactly as configured.
+    """
+    __tablename__ = "inventory_balances"
+    __table_args__ = (
+        UniqueConstraint("product_id", "variant_id", name="uq_inventory_balances_sku"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+
+    # SKU
+    product_id = Column(Integer, nullable=False)
+    variant_id = Column(Integer, default=0, nullable=False)
+
+    # Balances
+    quantity_on_hand = Column(Integer, default=0, nullable=False)
+    quantity_reserved = Column(Integer, default=0, nullable=False)
+
+    # Timestamps
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def available_quantity(self) -> int:
+        """Get available quantity (not reserved)"""
+        return max(0, self.quantity_on_hand - self.quantity_reserved)
@@ -3,7 +3,7 @@ Invoice Model
 3: Handles invoicing and payments
 4: """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Text, Float, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Text, Float, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -25,6 +25,10 @@ class InvoiceStatus(str, enum.Enum):
 class Invoice(Base):
     """Invoice model"""
     __tablename__ = "invoices"
+    __table_args__ = (
+        Index("ix_invoices_vendor_status", "vendor_id", "status"),
+        Index("ix_invoices_created_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     invoice_number = Column(String(50), unique=True, index=True, nullable=False)
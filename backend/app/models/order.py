@@ -3,7 +3,7 @@ Order Model
 Handles Quotations and Sale Orders (Rental Orders)
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Text, Float, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Text, Float, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -34,6 +34,12 @@ class DeliveryMethod(str, enum.Enum):
 class Order(Base):
     """Order model - represents Quotation → Sale Order"""
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_customer_status", "customer_id", "status"),
+        Index("ix_orders_vendor_status_end", "vendor_id", "status", "rental_end_date"),
+        Index("ix_orders_status_updated", "status", "updated_at"),
+        Index("ix_orders_created_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     order_number = Column(String(50), unique=True, index=True, nullable=False)
@@ -98,16 +104,14 @@ class Order(Base):
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     invoices = relationship("Invoice", back_populates="order", lazy="dynamic")
     reservations = relationship("Reservation", back_populates="order", lazy="dynamic")
-<<<<<<< HEAD
+    # Plain list view of invoices so loading profiles can eager-load them
+    invoice_list = relationship("Invoice", viewonly=True, order_by="Invoice.id")
     payments = relationship("Payment", back_populates="order")
-=======
-    payments = relationship("Payment", back_populates="order", lazy="dynamic")
     
     @property
     def invoice(self):
         """Returns the primary (first) invoice for this order"""
-        return self.invoices.first()
->>>>>>> aaa4283 (Complete Order Invoice flow, PDF generation fixes, and system-wide improvements)
+        return self.invoice_list[0] if self.invoice_list else None
     
     def calculate_totals(self):
         """Recalculate order totals"""
@@ -142,8 +146,8 @@ class OrderItem(Base):
     
     # Quantity & Pricing
     quantity = Column(Integer, default=1)
-    unit_price = Column(Float, nullable=False)
-    rental_period_type = Column(String(20), default="daily")  # hourly, daily, weekly, monthly
+    unit_price = Column(Float, nullable=False)  # Price of one unit for the rental window
+    rental_period_type = Column(String(20), default="daily")  # Billing granularity: hourly, daily, weekly, monthly
     
     # Calculated
     line_subtotal = Column(Float, default=0.0)
@@ -158,19 +162,7 @@ class OrderItem(Base):
     product = relationship("Product", back_populates="order_items")
     
     def calculate_total(self, tax_rate: float = 18.0):
-        """Calculate line total based on duration and quantity"""
-        duration = 1
-        if self.rental_start_date and self.rental_end_date:
-            delta = self.rental_end_date - self.rental_start_date
-            if self.rental_period_type == "hourly":
-                duration = max(1, int(delta.total_seconds() / 3600))
-            elif self.rental_period_type == "daily":
-                duration = max(1, delta.days)
-            elif self.rental_period_type == "weekly":
-                duration = max(1, delta.days // 7)
-            elif self.rental_period_type == "monthly":
-                duration = max(1, delta.days // 30)
-        
-        self.line_subtotal = self.quantity * self.unit_price * duration
+        """Calculate line total (unit_price already covers the whole rental window)"""
+        self.line_subtotal = self.quantity * self.unit_price
         self.tax_amount = self.line_subtotal * (tax_rate / 100)
         self.line_total = self.line_subtotal + self.tax_amount
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum, JSON, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum, JSON, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -26,6 +26,10 @@ class PaymentMethod(str, enum.Enum):
 class Payment(Base):
     """Payment records"""
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_status_date", "status", "payment_date"),
+        Index("ix_payments_created_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     payment_number = Column(String(50), unique=True, index=True)
@@ -3,7 +3,7 @@ Product Model
 Handles rentable products with pricing and attributes
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Text, Float, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Text, Float, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -23,6 +23,9 @@ class RentalPeriodType(str, enum.Enum):
 class Product(Base):
     """Product model for rentable items"""
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_created_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
@@ -74,7 +77,7 @@ class Product(Base):
     category = relationship("Category", back_populates="products")
     order_items = relationship("OrderItem", back_populates="product", lazy="dynamic")
     reservations = relationship("Reservation", back_populates="product", lazy="dynamic")
-    variants = relationship("ProductVariant", back_populates="product", lazy="dynamic")
+    variants = relationship("ProductVariant", back_populates="product", order_by="ProductVariant.id")
     
     @property
     def available_quantity(self) -> int:
@@ -134,6 +137,22 @@ class Category(Base):
     children = relationship("Category", backref="parent", remote_side=[id])
 
 
+class CategoryClosure(Base):
+    """
+    Materialized category tree: one row per (ancestor, descendant) pair
+    Every category is its own ancestor at depth 0, so a subtree is
+    all descendant_id values of one ancestor_id.
+    """
+    __tablename__ = "category_closure"
+    __table_args__ = (
+        Index("ix_category_closure_descendant", "descendant_id", "depth"),
+    )
+    
+    ancestor_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    depth = Column(Integer, nullable=False, default=0)
+
+
 class ProductAttribute(Base):
     """Configurable product attributes (from Settings)"""
     __tablename__ = "product_attributes"
@@ -143,3 +162,24 @@ class ProductAttribute(Base):
     values = Column(JSON, default=list)  # ["Red", "Blue", "Green"]
     
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ProductAttributeValue(Base):
+    """
+    Indexed copy of product and variant attribute JSON
+    One row per (product, variant, name, value) with names and values
+    normalized to lowercase, so attribute filters are index lookups instead
+    of scans over the JSON columns. variant_id is NULL for product-level
+    attributes.
+    """
+    __tablename__ = "product_attribute_values"
+    __table_args__ = (
+        Index("ix_product_attribute_values_lookup", "name", "value", "product_id"),
+        Index("ix_product_attribute_values_product", "product_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    variant_id = Column(Integer, ForeignKey("product_variants.id", ondelete="CASCADE"), nullable=True)
+    name = Column(String(100), nullable=False)
+    value = Column(String(255), nullable=False)
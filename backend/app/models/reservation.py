@@ -3,7 +3,7 @@ Reservation Model
 Handles stock reservation to prevent double-booking
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -34,6 +34,14 @@ class Reservation(Base):
     Prevents double-booking of products
     """
     __tablename__ = "reservations"
+    __table_args__ = (
+        # Covers the availability overlap scan without touching the table
+        Index(
+            "ix_reservations_availability",
+            "product_id", "status", "start_date", "end_date", "variant_id", "quantity"
+        ),
+        Index("ix_reservations_order_id", "order_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
@@ -0,0 +1,22 @@
+"""
+Sequence Model
+Named counters behind order, invoice and payment numbers
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class SequenceCounter(Base):
+    """
+    Next unallocated value of one named sequence
+    Names carry their period ("order:202610", "invoice:2026"), so a new
+    month or year starts a new counter.
+    """
+    __tablename__ = "sequence_counters"
+
+    name = Column(String(100), primary_key=True)
+    next_value = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
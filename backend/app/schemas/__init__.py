@@ -9,17 +9,22 @@ from app.schemas.user import (
     UserUpdate, UserResponse, TokenResponse
 )
 from app.schemas.product import (
-    CategoryCreate, CategoryResponse,
+    CategoryCreate, CategoryUpdate, CategoryResponse, CategoryTreeNode,
     ProductAttributeCreate, ProductAttributeResponse,
     ProductVariantCreate, ProductVariantResponse,
     ProductCreate, ProductUpdate, ProductResponse, ProductListResponse,
-    ProductAvailabilityCheck, ProductAvailabilityResponse
+    ProductCard, ProductCardListResponse,
+    ProductAvailabilityCheck, ProductAvailabilityResponse,
+    ProductAvailabilityBatchCheck, ProductAvailabilityBatchResponse,
+    PriceQuoteItem, PriceQuoteRequest, PriceComponent, PriceQuoteLine, PriceQuoteResponse,
+    ProductFacetsResponse, ProductImportRowError, ProductImportResponse
 )
 from app.schemas.order import (
     OrderItemCreate, OrderItemUpdate, OrderItemResponse,
     OrderCreate, OrderUpdate, OrderResponse, OrderListResponse,
     OrderConfirm, OrderStatusUpdate, PickupConfirm, ReturnConfirm,
-    AddToCartRequest, CartResponse, OrderStatusEnum, DeliveryMethodEnum
+    AddToCartRequest, CartResponse, OrderStatusEnum, DeliveryMethodEnum,
+    BulkOrderEventEnum, OrderBulkTransition, OrderBulkTransitionResponse
 )
 from app.schemas.invoice import (
     InvoiceItemCreate, InvoiceItemResponse,
@@ -45,17 +50,22 @@ __all__ = [
     "UserUpdate", "UserResponse", "TokenResponse",
     
     # Product
-    "CategoryCreate", "CategoryResponse",
+    "CategoryCreate", "CategoryUpdate", "CategoryResponse", "CategoryTreeNode",
     "ProductAttributeCreate", "ProductAttributeResponse",
     "ProductVariantCreate", "ProductVariantResponse",
     "ProductCreate", "ProductUpdate", "ProductResponse", "ProductListResponse",
+    "ProductCard", "ProductCardListResponse",
     "ProductAvailabilityCheck", "ProductAvailabilityResponse",
+    "ProductAvailabilityBatchCheck", "ProductAvailabilityBatchResponse",
+    "PriceQuoteItem", "PriceQuoteRequest", "PriceComponent", "PriceQuoteLine", "PriceQuoteResponse",
+    "ProductFacetsResponse", "ProductImportRowError", "ProductImportResponse",
     
     # Order
     "OrderItemCreate", "OrderItemUpdate", "OrderItemResponse",
     "OrderCreate", "OrderUpdate", "OrderResponse", "OrderListResponse",
     "OrderConfirm", "OrderStatusUpdate", "PickupConfirm", "ReturnConfirm",
     "AddToCartRequest", "CartResponse", "OrderStatusEnum", "DeliveryMethodEnum",
+    "BulkOrderEventEnum", "OrderBulkTransition", "OrderBulkTransitionResponse",
     
     # Invoice
     "InvoiceItemCreate", "InvoiceItemResponse",
@@ -107,24 +107,21 @@ class InvoiceResponse(BaseModel):
     created_at: datetime
     items: List[InvoiceItemResponse]
     
-<<<<<<< HEAD
-    model_config = {"from_attributes": True}
-=======
     # Add customer details (using forward reference to avoid circular import)
     customer: Optional["UserResponse"] = None
     
-    class Config:
-        from_attributes = True
->>>>>>> aaa4283 (Complete Order Invoice flow, PDF generation fixes, and system-wide improvements)
+    model_config = {"from_attributes": True}
 
 
 class InvoiceListResponse(BaseModel):
     """Paginated invoice list"""
     items: List[InvoiceResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # None when count=none
+    total_estimated: bool = False  # total is a lower bound (count=estimate)
+    page: Optional[int] = None  # None in cursor mode
     per_page: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 # Payment Schemas
@@ -175,10 +172,12 @@ class PaymentResponse(BaseModel):
 class PaymentListResponse(BaseModel):
     """Paginated payment list"""
     items: List[PaymentResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # None when count=none
+    total_estimated: bool = False  # total is a lower bound (count=estimate)
+    page: Optional[int] = None  # None in cursor mode
     per_page: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 # Rebuild models for forward references
 from app.schemas.user import UserResponse
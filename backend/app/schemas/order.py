@@ -31,6 +31,13 @@ class DeliveryMethodEnum(str, Enum):
     PICKUP = "pickup"
 
 
+class BulkOrderEventEnum(str, Enum):
+    """Order events that can be applied in bulk"""
+    PICKUP = "pickup"
+    RETURN = "return"
+    CANCEL = "cancel"
+
+
 class OrderItemCreate(BaseModel):
     """Create order item"""
     product_id: int
@@ -128,10 +135,12 @@ class OrderResponse(BaseModel):
 class OrderListResponse(BaseModel):
     """Paginated order list"""
     items: List[OrderResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # None when count=none
+    total_estimated: bool = False  # total is a lower bound (count=estimate)
+    page: Optional[int] = None  # None in cursor mode
     per_page: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class OrderConfirm(BaseModel):
@@ -163,6 +172,26 @@ class ReturnConfirm(BaseModel):
     damage_description: Optional[str] = None
 
 
+class OrderBulkTransition(BaseModel):
+    """Apply one event to many orders at once (e.g. a warehouse dock pickup)"""
+    event: BulkOrderEventEnum
+    order_ids: List[int] = Field(..., min_length=1, max_length=500)
+    notes: Optional[str] = None
+    picked_up_by: Optional[str] = None
+    received_by: Optional[str] = None
+    condition_notes: Optional[str] = None
+    damage_reported: bool = False
+    damage_description: Optional[str] = None
+
+
+class OrderBulkTransitionResponse(BaseModel):
+    """Result of a bulk transition"""
+    event: str
+    status: str
+    order_ids: List[int]
+    count: int
+
+
 class AddToCartRequest(BaseModel):
     """Add product to cart (create/update quotation)"""
     product_id: int
@@ -3,9 +3,11 @@ Product Schemas
 Pydantic models for product-related API requests/responses
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from app.core.config import settings
 
 
 class CategoryBase(BaseModel):
@@ -21,6 +23,14 @@ class CategoryCreate(CategoryBase):
     pass
 
 
+class CategoryUpdate(BaseModel):
+    """Update category request (parent_id 0 moves it to the top level)"""
+    name: Optional[str] = Field(None, min_length=1, max_length=100)
+    description: Optional[str] = None
+    parent_id: Optional[int] = None
+    image_url: Optional[str] = None
+
+
 class CategoryResponse(CategoryBase):
     """Category response"""
     id: int
@@ -30,6 +40,17 @@ class CategoryResponse(CategoryBase):
         from_attributes = True
 
 
+class CategoryTreeNode(BaseModel):
+    """Category with its nested subcategories"""
+    id: int
+    name: str
+    description: Optional[str] = None
+    parent_id: Optional[int] = None
+    image_url: Optional[str] = None
+    depth: int = 0
+    children: List["CategoryTreeNode"] = []
+
+
 class ProductAttributeCreate(BaseModel):
     """Create product attribute"""
     name: str = Field(..., min_length=1, max_length=100)
@@ -143,13 +164,84 @@ class ProductResponse(ProductBase):
         from_attributes = True
 
 
+class FacetValueCount(BaseModel):
+    """Products matching one facet value"""
+    value: Any
+    label: Optional[str] = None
+    count: int
+
+
+class PriceRangeCount(BaseModel):
+    """Products in one daily price bucket (max is None for the top bucket)"""
+    min: float
+    max: Optional[float] = None
+    count: int
+
+
+class ProductFacetsResponse(BaseModel):
+    """Facet counts for the active catalog filter"""
+    total: int
+    brands: List[FacetValueCount] = []
+    colors: List[FacetValueCount] = []
+    categories: List[FacetValueCount] = []
+    price_ranges: List[PriceRangeCount] = []
+
+
+class ProductCard(BaseModel):
+    """Lean product row for listing grids"""
+    id: int
+    name: str
+    sku: Optional[str] = None
+    image_url: Optional[str] = None
+    brand: Optional[str] = None
+    color: Optional[str] = None
+    category_id: Optional[int] = None
+    category_name: Optional[str] = None
+    rental_price_hourly: float = 0.0
+    rental_price_daily: float = 0.0
+    from_price_daily: Optional[float] = None  # Cheapest per-day rate over the product and its variants
+    available_quantity: int = 0
+    vendor_id: int
+    
+    class Config:
+        from_attributes = True
+
+
+class ProductCardListResponse(BaseModel):
+    """Paginated product card list response"""
+    items: List[ProductCard]
+    total: Optional[int] = None  # None when count=none
+    total_estimated: bool = False  # total is a lower bound (count=estimate)
+    page: Optional[int] = None  # None in cursor mode
+    per_page: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+class ProductImportRowError(BaseModel):
+    """Why one import row was rejected (row is None for file-level errors)"""
+    row: Optional[int] = None
+    sku: Optional[str] = None
+    errors: List[str]
+
+
+class ProductImportResponse(BaseModel):
+    """Bulk import report"""
+    total_rows: int
+    created: int
+    failed: int
+    errors: List[ProductImportRowError] = []
+
+
 class ProductListResponse(BaseModel):
     """Paginated product list response"""
     items: List[ProductResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # None when count=none
+    total_estimated: bool = False  # total is a lower bound (count=estimate)
+    page: Optional[int] = None  # None in cursor mode
     per_page: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class ProductAvailabilityCheck(BaseModel):
@@ -171,3 +263,66 @@ class ProductAvailabilityResponse(BaseModel):
     start_date: datetime
     end_date: datetime
     conflicts: List[Dict[str, Any]] = []
+
+
+class ProductAvailabilityBatchCheck(BaseModel):
+    """Check availability for a whole cart"""
+    items: List[ProductAvailabilityCheck] = Field(..., min_length=1)
+
+
+class ProductAvailabilityBatchResponse(BaseModel):
+    """Batch availability response"""
+    is_available: bool
+    items: List[ProductAvailabilityResponse]
+
+
+class PriceQuoteItem(BaseModel):
+    """One line to price"""
+    product_id: int
+    variant_id: Optional[int] = None
+    start_date: datetime
+    end_date: datetime
+    quantity: int = Field(1, ge=1)
+    rental_period_type: str = Field("daily", pattern="^(hourly|daily|weekly|monthly)$")
+    
+    @validator('end_date')
+    def window_length(cls, v, values):
+        start_date = values.get('start_date')
+        if start_date is None:
+            return v
+        if (start_date.tzinfo is None) != (v.tzinfo is None):
+            raise ValueError('start_date and end_date must both have a timezone or neither')
+        if v <= start_date:
+            raise ValueError('end_date must be after start_date')
+        if v - start_date > timedelta(days=settings.MAX_RENTAL_WINDOW_DAYS):
+            raise ValueError(f'Rental window cannot exceed {settings.MAX_RENTAL_WINDOW_DAYS} days')
+        return v
+
+
+class PriceQuoteRequest(BaseModel):
+    """Price a whole cart"""
+    items: List[PriceQuoteItem] = Field(..., min_length=1)
+
+
+class PriceComponent(BaseModel):
+    """Rental periods billed for one unit"""
+    period: str
+    count: int
+    rate: float
+
+
+class PriceQuoteLine(BaseModel):
+    """Cheapest price of one line"""
+    product_id: int
+    variant_id: Optional[int] = None
+    rental_period_type: str
+    quantity: int
+    unit_price: float  # One unit for the whole window
+    line_subtotal: float
+    breakdown: List[PriceComponent]
+
+
+class PriceQuoteResponse(BaseModel):
+    """Batch price quote (before tax, deposit and discounts)"""
+    subtotal: float
+    items: List[PriceQuoteLine]
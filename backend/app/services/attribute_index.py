@@ -0,0 +1,116 @@
+"""
+Attribute Index
+Normalized copy of product/variant attribute JSON for indexed attribute filters
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models.product import Product, ProductVariant, ProductAttributeValue
+
+NAME_LENGTH = 100
+VALUE_LENGTH = 255
+
+
+def normalize(value: Any) -> str:
+    """Lowercase text form used for both stored values and filter values"""
+    if isinstance(value, bool):
+        value = "true" if value else "false"
+    return str(value).strip().lower()[:VALUE_LENGTH]
+
+
+def attribute_values(attributes: Optional[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """(name, value) pairs of an attributes dict; lists give one pair per item, nested objects are skipped"""
+    pairs = set()
+    for name, value in (attributes or {}).items():
+        name = normalize(name)[:NAME_LENGTH]
+        for item in value if isinstance(value, list) else [value]:
+            if item is None or isinstance(item, (dict, list)):
+                continue
+            item = normalize(item)
+            if name and item:
+                pairs.add((name, item))
+    return sorted(pairs)
+
+
+def index_attributes(db: Session, entries: Iterable[Tuple[int, Optional[int], Optional[Dict[str, Any]]]]) -> int:
+    """
+    Replace the indexed attributes of the products in entries (caller commits)
+    entries are (product_id, variant_id or None, attributes) and must cover
+    the product and all of its variants, since a product's rows are
+    rewritten as a whole.
+    """
+    entries = list(entries)
+    product_ids = {product_id for product_id, _, _ in entries}
+    if not product_ids:
+        return 0
+
+    rows = [
+        {"product_id": product_id, "variant_id": variant_id, "name": name, "value": value}
+        for product_id, variant_id, attributes in entries
+        for name, value in attribute_values(attributes)
+    ]
+    db.query(ProductAttributeValue).filter(
+        ProductAttributeValue.product_id.in_(product_ids)
+    ).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(ProductAttributeValue), rows)
+    return len(rows)
+
+
+def index_product_attributes(db: Session, product: Product) -> int:
+    """Re-index one product and its variants (caller commits)"""
+    return index_attributes(db, [(product.id, None, product.attributes)] + [
+        (product.id, variant.id, variant.attributes) for variant in product.variants
+    ])
+
+
+def remove_product_attributes(db: Session, product_id: int) -> None:
+    """Drop a product's indexed attributes (caller commits)"""
+    db.query(ProductAttributeValue).filter(
+        ProductAttributeValue.product_id == product_id
+    ).delete(synchronize_session=False)
+
+
+def rebuild_attribute_index(db: Session, batch_size: int = 500) -> int:
+    """Backfill the index from every product's JSON, committing per batch; returns rows written"""
+    written, last_id = 0, 0
+    while True:
+        products = db.query(Product.id, Product.attributes).filter(
+            Product.id > last_id
+        ).order_by(Product.id).limit(batch_size).all()
+        if not products:
+            return written
+
+        product_ids = [product.id for product in products]
+        variants = db.query(ProductVariant.product_id, ProductVariant.id, ProductVariant.attributes).filter(
+            ProductVariant.product_id.in_(product_ids)
+        ).all()
+        written += index_attributes(db, [
+            *((product.id, None, product.attributes) for product in products),
+            *((variant.product_id, variant.id, variant.attributes) for variant in variants)
+        ])
+        db.commit()
+        last_id = product_ids[-1]
+
+
+def attribute_criteria(filters: Dict[str, List[str]]) -> list:
+    """
+    Product filters for {name: [values]}
+    A product matches a name when it or one of its variants has any of the
+    values; different names must all match.
+    """
+    criteria = []
+    for name, values in filters.items():
+        values = sorted({normalize(value) for value in values if str(value).strip()})
+        if not values:
+            continue
+        criteria.append(Product.id.in_(
+            select(ProductAttributeValue.product_id).where(
+                ProductAttributeValue.name == normalize(name)[:NAME_LENGTH],
+                ProductAttributeValue.value.in_(values)
+            )
+        ))
+    return criteria
@@ -0,0 +1,95 @@
+"""
+Availability Cache
+Result cache for single-product availability checks with generation-based invalidation
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.cache import CacheBackend, CacheStats, create_cache_backend
+from app.core.config import settings
+
+
+def _window_bound(value: datetime) -> str:
+    """Naive-UTC ISO form of a window bound (the index imports this module, so not via the engine)"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+class AvailabilityCache:
+    """
+    Caches the available quantity of a (product, variant, window)
+    Every product has a generation counter that is part of each key. Confirming,
+    cancelling, returning or expiring reservations and changing stock bump the
+    generation, which orphans all cached windows of that product at once; the
+    orphans age out through the TTL and the backend's LRU. Callers must read
+    the generation before computing a value so a concurrent bump is never
+    hidden behind a stale entry.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl_seconds: int = 30, enabled: bool = True):
+        self._backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.stats = CacheStats()
+
+    @property
+    def backend(self) -> CacheBackend:
+        """Backend, created from settings on first use"""
+        if self._backend is None:
+            self._backend = create_cache_backend()
+        return self._backend
+
+    def generation(self, product_id: int) -> int:
+        """Current generation of a product"""
+        return int(self.backend.get(f"avail:gen:{product_id}") or 0)
+
+    @staticmethod
+    def key(
+        product_id: int,
+        generation: int,
+        start_date: datetime,
+        end_date: datetime,
+        variant_id: Optional[int] = None
+    ) -> str:
+        """Cache key of one availability window"""
+        return "avail:{}:{}:{}:{}:{}".format(
+            product_id,
+            generation,
+            variant_id or 0,
+            _window_bound(start_date),
+            _window_bound(end_date)
+        )
+
+    def get(self, key: str) -> Optional[int]:
+        """Get a cached available quantity"""
+        value = self.backend.get(key)
+        self.stats.incr("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key: str, available_quantity: int) -> None:
+        """Store an available quantity"""
+        self.backend.set(key, available_quantity, self.ttl_seconds)
+        self.stats.incr("sets")
+
+    def invalidate(self, product_id: int) -> None:
+        """Bump a product's generation"""
+        self.backend.incr(f"avail:gen:{product_id}")
+        self.stats.incr("invalidations")
+
+    def snapshot(self) -> dict:
+        """Get the backend name, settings and counters"""
+        return {
+            "enabled": self.enabled,
+            "backend": self.backend.name,
+            "ttl_seconds": self.ttl_seconds,
+            **self.stats.snapshot()
+        }
+
+
+# Process-wide cache instance
+availability_cache = AvailabilityCache(
+    ttl_seconds=settings.AVAILABILITY_CACHE_TTL_SECONDS,
+    enabled=settings.AVAILABILITY_CACHE_ENABLED.lower() == "true"
+)
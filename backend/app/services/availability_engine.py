@@ -0,0 +1,171 @@
+"""
+Availability Engine
+Sweep-line computation of peak concurrent reservations over time windows
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.reservation import Reservation, ReservationStatus
+from app.services.availability_index import ReservationSpan
+
+
+Window = Tuple[datetime, datetime]
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Normalize aware datetimes to naive UTC (reservations are stored naive)"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def fetch_spans(
+    db: Session,
+    product_id: int,
+    start_date: datetime,
+    end_date: datetime,
+    variant_id: Optional[int] = None
+) -> List[ReservationSpan]:
+    """Fetch only the active reservation columns overlapping [start_date, end_date)"""
+    query = db.query(
+        Reservation.product_id,
+        Reservation.variant_id,
+        Reservation.start_date,
+        Reservation.end_date,
+        Reservation.quantity
+    ).filter(
+        Reservation.product_id == product_id,
+        Reservation.status == ReservationStatus.ACTIVE,
+        Reservation.start_date < end_date,
+        Reservation.end_date > start_date
+    )
+
+    if variant_id:
+        query = query.filter(Reservation.variant_id == variant_id)
+
+    return [ReservationSpan(*row) for row in query.all()]
+
+
+class OccupancyProfile:
+    """
+    Step function of reserved quantity over time built from one sweep
+    times[i] is a boundary and levels[i] is the reserved quantity in effect
+    from times[i] until times[i + 1]. A sparse table over levels answers the
+    peak over any window in O(log n).
+    """
+
+    def __init__(self, spans: Iterable[ReservationSpan]):
+        # Ends sort before starts at the same instant, so back-to-back
+        # reservations never count as overlapping (half-open intervals)
+        events = []
+        for span in spans:
+            if span.start_date < span.end_date and span.quantity:
+                events.append((span.start_date, 1, span.quantity))
+                events.append((span.end_date, 0, -span.quantity))
+        events.sort(key=lambda event: (event[0], event[1]))
+
+        self.times: List[datetime] = []
+        self.levels: List[int] = []
+        level = 0
+        for moment, _, delta in events:
+            level += delta
+            if self.times and self.times[-1] == moment:
+                self.levels[-1] = level
+            else:
+                self.times.append(moment)
+                self.levels.append(level)
+
+        self._table = [self.levels]
+        width = 1
+        while width * 2 <= len(self.levels):
+            previous = self._table[-1]
+            self._table.append([
+                max(previous[i], previous[i + width])
+                for i in range(len(previous) - width)
+            ])
+            width *= 2
+
+    def _range_max(self, lo: int, hi: int) -> int:
+        """Max of levels[lo:hi] (hi exclusive, lo < hi)"""
+        row = (hi - lo).bit_length() - 1
+        table = self._table[row]
+        return max(table[lo], table[hi - (1 << row)])
+
+    def peak(self, start_date: datetime, end_date: datetime) -> int:
+        """Peak reserved quantity over [start_date, end_date)"""
+        start_date, end_date = naive_utc(start_date), naive_utc(end_date)
+        if not self.times or start_date >= end_date:
+            return 0
+
+        # Level in effect at start_date, plus every boundary before end_date
+        lo = bisect_right(self.times, start_date) - 1
+        hi = bisect_left(self.times, end_date)
+        if lo < 0:
+            lo = 0
+        if hi <= lo:
+            return self.levels[lo] if self.times[lo] <= start_date else 0
+
+        return max(0, self._range_max(lo, hi))
+
+
+def peak_reserved(spans: Iterable[ReservationSpan], start_date: datetime, end_date: datetime) -> int:
+    """Peak concurrent reserved quantity inside a single window"""
+    return OccupancyProfile(spans).peak(start_date, end_date)
+
+
+def peak_reserved_bulk(spans: Iterable[ReservationSpan], windows: Sequence[Window]) -> List[int]:
+    """Peak concurrent reserved quantity for many windows of one product in a single sweep"""
+    profile = OccupancyProfile(spans)
+    return [profile.peak(start, end) for start, end in windows]
+
+
+def bucketed_peaks(
+    spans: Iterable[ReservationSpan],
+    start_date: datetime,
+    end_date: datetime,
+    step: timedelta
+) -> List[int]:
+    """
+    Peak reserved quantity per fixed-size bucket over [start_date, end_date)
+    Levels at bucket starts come from a cumulative sum over start/end deltas;
+    events falling inside a bucket are then walked to catch intra-bucket peaks.
+    """
+    start_date, end_date = naive_utc(start_date), naive_utc(end_date)
+    bucket_count = max(0, -(-(end_date - start_date) // step))
+    if not bucket_count:
+        return []
+
+    deltas = [0] * (bucket_count + 1)
+    interior: List[List[Tuple[datetime, int, int]]] = [[] for _ in range(bucket_count)]
+
+    for span in spans:
+        if span.start_date >= span.end_date or not span.quantity:
+            continue
+        for moment, order, delta in ((span.start_date, 1, span.quantity), (span.end_date, 0, -span.quantity)):
+            if moment <= start_date:
+                deltas[0] += delta
+                continue
+            if moment >= end_date:
+                continue
+            offset, remainder = divmod(moment - start_date, step)
+            if remainder:
+                interior[offset].append((moment, order, delta))
+                deltas[offset + 1] += delta
+            else:
+                deltas[offset] += delta
+
+    peaks = []
+    level = 0
+    for index in range(bucket_count):
+        level += deltas[index]
+        peak = running = level
+        for _, _, delta in sorted(interior[index], key=lambda event: (event[0], event[1])):
+            running += delta
+            peak = max(peak, running)
+        peaks.append(max(0, peak))
+
+    return peaks
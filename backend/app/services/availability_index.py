@@ -0,0 +1,272 @@
+"""
+Availability Index
+In-memory interval index over active reservations for fast availability checks
+"""
+
+import threading
+from array import array
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.reservation import Reservation, ReservationStatus
+from app.services.occupancy_cache import occupancy_cache
+from app.services.availability_cache import availability_cache
+from app.core.http_cache import response_cache
+from app.core.config import settings
+
+
+# Snapshot of the reservation fields the index needs (safe to use after commit)
+ReservationSpan = namedtuple(
+    "ReservationSpan",
+    ["product_id", "variant_id", "start_date", "end_date", "quantity"]
+)
+
+# Timeline is measured in minutes since 2000-01-01; 2**27 minutes covers ~255 years
+TIMELINE_EPOCH = datetime(2000, 1, 1)
+TIMELINE_BITS = 27
+TIMELINE_SIZE = 1 << TIMELINE_BITS
+
+
+def span_from_reservation(reservation: Reservation) -> ReservationSpan:
+    """Build a span snapshot from a reservation row"""
+    return ReservationSpan(
+        reservation.product_id,
+        reservation.variant_id,
+        reservation.start_date,
+        reservation.end_date,
+        reservation.quantity
+    )
+
+
+def to_tick(value: datetime, round_up: bool = False) -> int:
+    """Convert a datetime to a timeline tick (minute resolution)"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    seconds = (value - TIMELINE_EPOCH).total_seconds()
+    tick = int(seconds // 60)
+    if round_up and seconds % 60:
+        tick += 1
+
+    return min(max(tick, 0), TIMELINE_SIZE)
+
+
+class IntervalMaxTree:
+    """
+    Dynamic segment tree over the timeline
+    Supports adding a quantity to [start, end) and querying the peak total over
+    [start, end), both in O(log T). Nodes are allocated lazily so the tree only
+    grows with the number of distinct reservation boundaries.
+    """
+
+    def __init__(self):
+        # Node 0 is the root; child index 0 means "no child" (all zeros below)
+        self._left = array("l", [0])
+        self._right = array("l", [0])
+        self._add = array("q", [0])
+        self._best = array("q", [0])
+        self.count = 0
+
+    def _new_node(self) -> int:
+        self._left.append(0)
+        self._right.append(0)
+        self._add.append(0)
+        self._best.append(0)
+        return len(self._add) - 1
+
+    def update(self, start: int, end: int, delta: int) -> None:
+        """Add delta to every tick in [start, end)"""
+        if start < end:
+            self._update(0, 0, TIMELINE_SIZE, start, end, delta)
+
+    def _update(self, node: int, lo: int, hi: int, start: int, end: int, delta: int) -> None:
+        if start <= lo and hi <= end:
+            self._add[node] += delta
+            self._best[node] += delta
+            return
+
+        mid = (lo + hi) // 2
+        if start < mid:
+            if not self._left[node]:
+                child = self._new_node()
+                self._left[node] = child
+            self._update(self._left[node], lo, mid, start, end, delta)
+        if end > mid:
+            if not self._right[node]:
+                child = self._new_node()
+                self._right[node] = child
+            self._update(self._right[node], mid, hi, start, end, delta)
+
+        left, right = self._left[node], self._right[node]
+        left_best = self._best[left] if left else 0
+        right_best = self._best[right] if right else 0
+        self._best[node] = self._add[node] + max(left_best, right_best)
+
+    def peak(self, start: int, end: int) -> int:
+        """Get the maximum total over [start, end)"""
+        if start >= end:
+            return 0
+        return self._peak(0, 0, TIMELINE_SIZE, start, end)
+
+    def _peak(self, node: int, lo: int, hi: int, start: int, end: int) -> int:
+        if start <= lo and hi <= end:
+            return self._best[node]
+
+        mid = (lo + hi) // 2
+        best = 0
+        if start < mid and self._left[node]:
+            best = max(best, self._peak(self._left[node], lo, mid, start, end))
+        if end > mid and self._right[node]:
+            best = max(best, self._peak(self._right[node], mid, hi, start, end))
+
+        return self._add[node] + best
+
+    def add_span(self, span: ReservationSpan, sign: int = 1) -> None:
+        """Add (or with sign=-1, remove) a reservation span"""
+        self.update(to_tick(span.start_date), to_tick(span.end_date, round_up=True), sign * span.quantity)
+        self.count += sign
+
+
+class AvailabilityIndex:
+    """
+    Per-SKU interval trees over active reservations
+    Keys are (product_id, variant_id); (product_id, None) aggregates every
+    reservation of the product, matching check_availability without a variant.
+    Each product's trees are tagged with its availability generation, read
+    before its reservations were. Every committed reservation change bumps
+    that generation (apply_reservation_changes), and sync() rebuilds the
+    products whose generation moved, so changes made by another worker or the
+    standalone sweeper are seen on the next check. Generations only cross
+    processes with a shared cache backend, so by default (AVAILABILITY_INDEX_ENABLED=auto)
+    the index only answers checks with CACHE_BACKEND=redis and a REDIS_URL.
+    """
+
+    def __init__(self, mode: str = "auto"):
+        self._trees: Dict[Tuple[int, Optional[int]], IntervalMaxTree] = {}
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.RLock()
+        self.mode = mode
+        self.is_loaded = False
+
+    @property
+    def is_trusted(self) -> bool:
+        """Whether checks may be answered from the index (after sync())"""
+        if not self.is_loaded or self.mode == "false":
+            return False
+        return self.mode == "true" or availability_cache.backend.shared
+
+    @staticmethod
+    def _keys(span: ReservationSpan) -> Tuple[Tuple[int, Optional[int]], ...]:
+        if span.variant_id is None:
+            return ((span.product_id, None),)
+        return ((span.product_id, None), (span.product_id, span.variant_id))
+
+    @classmethod
+    def _build(cls, rows: Iterable) -> Dict[Tuple[int, Optional[int]], IntervalMaxTree]:
+        trees: Dict[Tuple[int, Optional[int]], IntervalMaxTree] = {}
+        for row in rows:
+            span = ReservationSpan(*row)
+            for key in cls._keys(span):
+                tree = trees.get(key)
+                if tree is None:
+                    tree = trees[key] = IntervalMaxTree()
+                tree.add_span(span)
+        return trees
+
+    @staticmethod
+    def _active_spans(db: Session, product_ids: Optional[Iterable[int]] = None):
+        query = db.query(
+            Reservation.product_id,
+            Reservation.variant_id,
+            Reservation.start_date,
+            Reservation.end_date,
+            Reservation.quantity
+        ).filter(Reservation.status == ReservationStatus.ACTIVE)
+        if product_ids is not None:
+            query = query.filter(Reservation.product_id.in_(product_ids))
+        return query.all()
+
+    def load(self, db: Session) -> int:
+        """(Re)build the index from all active reservations"""
+        product_ids = [
+            row[0] for row in db.query(Reservation.product_id).filter(
+                Reservation.status == ReservationStatus.ACTIVE
+            ).distinct()
+        ]
+        generations = {product_id: availability_cache.generation(product_id) for product_id in product_ids}
+        rows = self._active_spans(db)
+
+        with self._lock:
+            self._trees = self._build(rows)
+            self._generations = generations
+            self.is_loaded = True
+
+        return len(rows)
+
+    def clear(self) -> None:
+        """Drop all data and mark the index as not loaded"""
+        with self._lock:
+            self._trees = {}
+            self._generations = {}
+            self.is_loaded = False
+
+    def sync(self, db: Session, product_ids: Iterable[int]) -> int:
+        """Rebuild the trees of products whose generation moved; returns how many were rebuilt"""
+        stale = {}
+        for product_id in set(product_ids):
+            generation = availability_cache.generation(product_id)
+            with self._lock:
+                if self._generations.get(product_id) != generation:
+                    stale[product_id] = generation
+        if not stale:
+            return 0
+
+        # Generations were read first, so the trees are at least that current
+        trees = self._build(self._active_spans(db, list(stale)))
+        with self._lock:
+            for key in [key for key in self._trees if key[0] in stale]:
+                del self._trees[key]
+            self._trees.update(trees)
+            self._generations.update(stale)
+
+        return len(stale)
+
+    def peak_reserved(
+        self,
+        product_id: int,
+        start_date: datetime,
+        end_date: datetime,
+        variant_id: Optional[int] = None
+    ) -> int:
+        """Get the peak reserved quantity over [start_date, end_date)"""
+        with self._lock:
+            tree = self._trees.get((product_id, variant_id))
+            if tree is None:
+                return 0
+            return tree.peak(to_tick(start_date), to_tick(end_date, round_up=True))
+
+
+# Process-wide index instance
+availability_index = AvailabilityIndex(mode=settings.AVAILABILITY_INDEX_ENABLED.lower())
+
+
+def apply_reservation_changes(
+    created: Iterable[ReservationSpan] = (),
+    released: Iterable[ReservationSpan] = ()
+) -> None:
+    """
+    Propagate committed reservation changes to availability caches
+    Bumping the availability generation also makes every worker's index
+    rebuild the product on its next check.
+    """
+    touched_products = {span.product_id for span in created}
+    touched_products.update(span.product_id for span in released)
+    
+    for product_id in touched_products:
+        occupancy_cache.invalidate(product_id)
+        availability_cache.invalidate(product_id)
+        # Reserved / available quantities appear in catalog responses
+        response_cache.invalidate_product(product_id)
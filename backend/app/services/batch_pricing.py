@@ -0,0 +1,152 @@
+"""
+Batch Pricing
+Columnar line and order totals for many order lines at once, and bulk repricing of open quotations
+"""
+
+from array import array
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.order import Order, OrderItem, OrderStatus
+from app.services.cart_store import cart_store
+from app.services.pricing_engine import pricing_engine, window_error
+
+# Quotations whose prices are not final yet
+OPEN_QUOTATION_STATUSES = (OrderStatus.QUOTATION, OrderStatus.QUOTATION_SENT)
+
+
+def line_totals(
+    quantities: Sequence[float],
+    unit_prices: Sequence[float],
+    tax_rates: Sequence[float]
+) -> Tuple[array, array, array]:
+    """
+    Subtotal, tax and total columns of order lines
+    Same arithmetic as OrderItem.calculate_total, over parallel columns
+    (tax_rates in percent, one per line).
+    """
+    subtotals = array("d", (quantity * price for quantity, price in zip(quantities, unit_prices)))
+    taxes = array("d", (subtotal * (rate / 100) for subtotal, rate in zip(subtotals, tax_rates)))
+    totals = array("d", (subtotal + tax for subtotal, tax in zip(subtotals, taxes)))
+    return subtotals, taxes, totals
+
+
+def order_totals(
+    order_index: Sequence[int],
+    line_subtotals: Sequence[float],
+    line_taxes: Sequence[float],
+    delivery_charges: Sequence[float],
+    security_deposits: Sequence[float],
+    discounts: Sequence[float]
+) -> Tuple[array, array, array]:
+    """
+    Subtotal, tax and total columns of orders
+    order_index[i] is the position of line i's order in the order columns.
+    Same arithmetic as Order.calculate_totals; orders without lines total
+    their charges alone.
+    """
+    subtotals = array("d", [0.0]) * len(delivery_charges)
+    taxes = array("d", [0.0]) * len(delivery_charges)
+    for position, subtotal, tax in zip(order_index, line_subtotals, line_taxes):
+        subtotals[position] += subtotal
+        taxes[position] += tax
+
+    totals = array("d", (
+        subtotal + tax + (charges or 0.0) + (deposit or 0.0) - (discount or 0.0)
+        for subtotal, tax, charges, deposit, discount
+        in zip(subtotals, taxes, delivery_charges, security_deposits, discounts)
+    ))
+    return subtotals, taxes, totals
+
+
+def reprice_open_quotations(
+    db: Session,
+    tax_rate: Optional[float] = None,
+    reprice_units: bool = False,
+    batch_size: int = 1000
+) -> Dict[str, int]:
+    """
+    Recompute totals of every open quotation (cart or sent) in keyset batches
+    With tax_rate the orders take the new rate; with reprice_units each
+    line's unit price is re-quoted from the current price tables. Every
+    batch is two column SELECTs, one price-table load and two bulk UPDATEs
+    by primary key in its own transaction. updated_at is written back
+    unchanged so repricing does not keep abandoned carts alive. Each batch
+    bumps the cart store's generation, so cached carts reload with the new
+    prices; cart writes re-quote their lines in any case, so a worker that
+    cannot see the bump never writes the old prices back.
+    """
+    if reprice_units:
+        # Pick up rate changes made outside the API
+        pricing_engine.clear()
+
+    orders_written = items_written = 0
+    last_id = 0
+    while True:
+        orders = db.query(
+            Order.id, Order.tax_rate, Order.delivery_charges, Order.security_deposit,
+            Order.discount_amount, Order.updated_at
+        ).filter(
+            Order.status.in_(OPEN_QUOTATION_STATUSES),
+            Order.id > last_id
+        ).order_by(Order.id).limit(batch_size).all()
+        if not orders:
+            break
+
+        position = {order.id: index for index, order in enumerate(orders)}
+        rates = array("d", ((tax_rate if tax_rate is not None else order.tax_rate or 0.0) for order in orders))
+        items = db.query(
+            OrderItem.id, OrderItem.order_id, OrderItem.product_id, OrderItem.variant_id,
+            OrderItem.quantity, OrderItem.unit_price, OrderItem.rental_start_date,
+            OrderItem.rental_end_date, OrderItem.rental_period_type
+        ).filter(OrderItem.order_id.in_(position)).all()
+
+        order_index = array("l", (position[item.order_id] for item in items))
+        unit_prices = array("d", (item.unit_price for item in items))
+        if reprice_units and items:
+            # Lines whose window can no longer be quoted keep their price
+            quotable = [
+                i for i, item in enumerate(items)
+                if window_error(item.rental_start_date, item.rental_end_date) is None
+            ]
+            quotes = pricing_engine.quote_many(db, [
+                (items[i].product_id, items[i].variant_id, items[i].rental_start_date,
+                 items[i].rental_end_date, items[i].rental_period_type)
+                for i in quotable
+            ]) if quotable else []
+            for i, quote in zip(quotable, quotes):
+                unit_prices[i] = quote.unit_amount
+
+        subtotals, taxes, totals = line_totals(
+            [item.quantity for item in items], unit_prices, [rates[index] for index in order_index]
+        )
+        order_subtotals, order_taxes, order_grand_totals = order_totals(
+            order_index, subtotals, taxes,
+            [order.delivery_charges for order in orders],
+            [order.security_deposit for order in orders],
+            [order.discount_amount for order in orders]
+        )
+
+        if items:
+            db.execute(update(OrderItem), [
+                {"id": item.id, "unit_price": unit_prices[i], "line_subtotal": subtotals[i],
+                 "tax_amount": taxes[i], "line_total": totals[i]}
+                for i, item in enumerate(items)
+            ])
+        db.execute(update(Order), [
+            {"id": order.id, "tax_rate": rates[i], "subtotal": order_subtotals[i],
+             "tax_amount": order_taxes[i], "total_amount": order_grand_totals[i],
+             "updated_at": order.updated_at or datetime.utcnow()}
+            for i, order in enumerate(orders)
+        ])
+        db.commit()
+        cart_store.invalidate_all()
+
+        orders_written += len(orders)
+        items_written += len(items)
+        last_id = orders[-1].id
+
+    return {"orders": orders_written, "items": items_written}
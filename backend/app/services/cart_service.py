@@ -0,0 +1,322 @@
+"""
+Cart Service
+Side-effect-free cart reads and write-through cart updates over the cart store
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.schemas.order import OrderItemCreate, OrderItemResponse, OrderResponse, CartResponse
+from app.schemas.product import ProductAvailabilityCheck
+from app.services.availability_engine import naive_utc
+from app.services.batch_pricing import line_totals, order_totals
+from app.services.cart_store import cart_store
+from app.services.loading_profiles import with_profile
+from app.services.order_service import OrderService
+from app.services.pricing_engine import pricing_engine, window_error
+from app.services.product_service import ProductService
+
+
+class CartService:
+    """
+    Customer carts (the customer's open quotation)
+    Reads come from the cart store, loading the quotation once on a miss,
+    and never write. Changes are written to orders/order_items (lines and
+    totals from the batch pricing arrays) before the new cart is stored and
+    returned, under the customer's cart lock.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.product_service = ProductService(db)
+
+    def get_cart(self, customer_id: int) -> CartResponse:
+        """Get the customer's cart without touching the database when it is cached"""
+        return self._response(self._cart(customer_id))
+
+    def add_item(self, customer_id: int, item: OrderItemCreate) -> CartResponse:
+        """Add a line to the cart, or add to the quantity of the same SKU and window"""
+        product = self.product_service.get_product(item.product_id)
+        if not product:
+            raise ValueError("Product not found")
+
+        unit_price = pricing_engine.quote(
+            self.db,
+            product.id,
+            item.rental_start_date,
+            item.rental_end_date,
+            item.rental_period_type,
+            variant_id=item.variant_id
+        ).unit_amount
+        start_date = naive_utc(item.rental_start_date).isoformat()
+        end_date = naive_utc(item.rental_end_date).isoformat()
+
+        with cart_store.lock(customer_id):
+            cart = self._cart(customer_id, for_update=True)
+            lines = cart["order"]["items"] if cart else []
+            line = next((
+                line for line in lines
+                if self._line_key(line) == (item.product_id, item.variant_id, start_date, end_date)
+            ), None)
+
+            # The merged line is checked together with the cart's other lines of the product
+            checks = [
+                ProductAvailabilityCheck(
+                    product_id=other["product_id"],
+                    variant_id=other["variant_id"],
+                    start_date=datetime.fromisoformat(other["rental_start_date"]),
+                    end_date=datetime.fromisoformat(other["rental_end_date"]),
+                    quantity=other["quantity"]
+                )
+                for other in lines if other["product_id"] == item.product_id and other is not line
+            ]
+            checks.append(ProductAvailabilityCheck(
+                product_id=item.product_id,
+                variant_id=item.variant_id,
+                start_date=item.rental_start_date,
+                end_date=item.rental_end_date,
+                quantity=item.quantity + (line["quantity"] if line else 0)
+            ))
+            if not self.product_service.check_availability_bulk(checks)[-1]["is_available"]:
+                raise ValueError(f"Product {product.name} is not available")
+
+            cart = cart or self._create(customer_id, product, item)
+            lines = cart["order"]["items"]
+            if line:
+                line["quantity"] += item.quantity
+            else:
+                # The id is assigned when the line is written
+                lines.append({
+                    "id": 0,
+                    "product_id": product.id,
+                    "variant_id": item.variant_id,
+                    "product_name": product.name,
+                    "product_sku": product.sku,
+                    "quantity": item.quantity,
+                    "unit_price": unit_price,
+                    "rental_period_type": item.rental_period_type,
+                    "rental_start_date": start_date,
+                    "rental_end_date": end_date,
+                    "deposit_per_unit": product.security_deposit or 0.0
+                })
+
+            cart = self._save(customer_id, cart)
+
+        return self._response(cart)
+
+    def remove_item(self, customer_id: int, item_id: int) -> CartResponse:
+        """Remove a line by its id"""
+        with cart_store.lock(customer_id):
+            cart = self._cart(customer_id, for_update=True)
+            if not cart:
+                return self._response(None)
+
+            lines = cart["order"]["items"]
+            remaining = [line for line in lines if line["id"] != item_id]
+            if len(remaining) != len(lines):
+                cart["order"]["items"] = remaining
+                cart = self._save(customer_id, cart)
+
+        return self._response(cart)
+
+    def _write(self, customer_id: int, cart: Dict[str, Any]) -> None:
+        """
+        Write a cart's lines and totals to orders/order_items and commit
+        Lines are re-quoted and taxed at the order row's rate first, so a
+        cached cart never writes prices older than a reprice back. Lines are
+        matched to order items by (product, variant, window). A cart whose
+        order is no longer a quotation (confirmed, cancelled or expired
+        meanwhile) is dropped and the change rejected.
+        """
+        generation = cart_store.generation()
+        order = with_profile(
+            self.db.query(Order).filter(Order.id == cart["order"]["id"]), "order_list"
+        ).first()
+        if not order or order.status != OrderStatus.QUOTATION:
+            cart_store.discard(customer_id)
+            raise ValueError("Cart is no longer open, please try again")
+
+        cart["order"]["tax_rate"] = order.tax_rate
+        self._requote(cart)
+        self._recalculate(cart)
+
+        try:
+            existing = {
+                (row.product_id, row.variant_id, row.rental_start_date, row.rental_end_date): row
+                for row in order.items
+            }
+            rows = []
+            for line in cart["order"]["items"]:
+                data = OrderItemResponse.model_validate(line)
+                row = existing.pop(
+                    (data.product_id, data.variant_id, data.rental_start_date, data.rental_end_date), None
+                )
+                if row is None:
+                    row = OrderItem(
+                        product_id=data.product_id,
+                        variant_id=data.variant_id,
+                        product_name=data.product_name,
+                        product_sku=data.product_sku,
+                        rental_start_date=data.rental_start_date,
+                        rental_end_date=data.rental_end_date,
+                        rental_period_type=data.rental_period_type
+                    )
+                    order.items.append(row)
+                row.quantity = data.quantity
+                row.unit_price = data.unit_price
+                row.calculate_total(order.tax_rate)
+                rows.append(row)
+
+            for row in existing.values():
+                order.items.remove(row)
+
+            order.security_deposit = cart["order"]["security_deposit"]
+            order.calculate_totals()
+            # Keeps the cart clear of the abandoned-cart sweep even if the totals did not change
+            order.updated_at = datetime.utcnow()
+            self.db.flush()
+            for line, row in zip(cart["order"]["items"], rows):
+                line["id"] = row.id
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        cart["synced_at"] = self._synced_at(order.updated_at)
+        cart["generation"] = generation
+
+    def _cart(self, customer_id: int, for_update: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Cart document from the store, or loaded (read-only) from the open quotation
+        With for_update (before a change) the order row is locked and a stored
+        cart is only used while the row is still the quotation it was written
+        as; otherwise it is reloaded, so a worker holding an older copy cannot
+        write it over newer lines.
+        """
+        generation = cart_store.generation()
+        cart = cart_store.get(customer_id)
+        if cart is not None and for_update:
+            row = self.db.query(Order.status, Order.updated_at).filter(
+                Order.id == cart["order"]["id"]
+            ).with_for_update().first()
+            if not row or row.status != OrderStatus.QUOTATION or self._synced_at(row.updated_at) != cart.get("synced_at"):
+                cart = None
+        if cart is not None:
+            return cart
+
+        order = with_profile(self.db.query(Order).filter(
+            Order.customer_id == customer_id,
+            Order.status == OrderStatus.QUOTATION
+        ).order_by(Order.id), "order_list").first()
+        if not order:
+            return None
+
+        cart = self._document(order)
+        cart["generation"] = generation
+        cart_store.set(customer_id, cart)
+        return cart
+
+    def _create(self, customer_id: int, product: Product, item: OrderItemCreate) -> Dict[str, Any]:
+        """Insert the cart's order row (the only synchronous write of a cart)"""
+        order = Order(
+            order_number=OrderService(self.db).generate_order_number(),
+            customer_id=customer_id,
+            vendor_id=product.vendor_id,
+            status=OrderStatus.QUOTATION,
+            rental_start_date=item.rental_start_date,
+            rental_end_date=item.rental_end_date
+        )
+        self.db.add(order)
+        self.db.commit()
+        return self._document(with_profile(self.db.query(Order).filter(Order.id == order.id), "order_list").one())
+
+    def _document(self, order: Order) -> Dict[str, Any]:
+        """Cart document of a persisted quotation"""
+        data = OrderResponse.model_validate(order).model_dump(mode="json")
+        product_ids = {line["product_id"] for line in data["items"]}
+        deposits = dict(self.db.query(Product.id, Product.security_deposit).filter(
+            Product.id.in_(product_ids)
+        ).all()) if product_ids else {}
+        for line in data["items"]:
+            line["deposit_per_unit"] = deposits.get(line["product_id"]) or 0.0
+
+        cart = {"order": data, "version": 0, "synced_at": self._synced_at(order.updated_at)}
+        self._recalculate(cart)
+        return cart
+
+    def _save(self, customer_id: int, cart: Dict[str, Any]) -> Dict[str, Any]:
+        """Write to the database (recalculating the totals), then store"""
+        self._write(customer_id, cart)
+        cart["version"] += 1
+        cart_store.set(customer_id, cart)
+        return cart
+
+    @staticmethod
+    def _synced_at(updated_at: Optional[datetime]) -> Optional[str]:
+        """Version of a cart's order row (its updated_at)"""
+        return updated_at.isoformat() if updated_at else None
+
+    @staticmethod
+    def _line_key(line: Dict[str, Any]) -> Tuple[int, Optional[int], str, str]:
+        """(product, variant, start, end) identifying a cart line"""
+        return line["product_id"], line["variant_id"], line["rental_start_date"], line["rental_end_date"]
+
+    def _requote(self, cart: Dict[str, Any]) -> None:
+        """Unit prices from the current price tables (lines that can no longer be quoted keep theirs)"""
+        lines = [
+            line for line in cart["order"]["items"]
+            if window_error(
+                datetime.fromisoformat(line["rental_start_date"]), datetime.fromisoformat(line["rental_end_date"])
+            ) is None
+        ]
+        if not lines:
+            return
+        try:
+            quotes = pricing_engine.quote_many(self.db, [
+                (line["product_id"], line["variant_id"], datetime.fromisoformat(line["rental_start_date"]),
+                 datetime.fromisoformat(line["rental_end_date"]), line["rental_period_type"])
+                for line in lines
+            ])
+        except ValueError:
+            # A product or variant was removed; checkout reports it
+            return
+        for line, quote in zip(lines, quotes):
+            line["unit_price"] = quote.unit_amount
+
+    @staticmethod
+    def _recalculate(cart: Dict[str, Any]) -> None:
+        """Line and order totals, as OrderItem.calculate_total and Order.calculate_totals compute them"""
+        order = cart["order"]
+        lines = order["items"]
+        subtotals, taxes, totals = line_totals(
+            [line["quantity"] for line in lines],
+            [line["unit_price"] for line in lines],
+            [order["tax_rate"]] * len(lines)
+        )
+        for line, subtotal, tax, total in zip(lines, subtotals, taxes, totals):
+            line.update(line_subtotal=subtotal, tax_amount=tax, line_total=total)
+
+        order["security_deposit"] = sum(line["deposit_per_unit"] * line["quantity"] for line in lines)
+        (order["subtotal"],), (order["tax_amount"],), (order["total_amount"],) = order_totals(
+            [0] * len(lines), subtotals, taxes,
+            [order["delivery_charges"]], [order["security_deposit"]], [order["discount_amount"]]
+        )
+
+    @staticmethod
+    def _response(cart: Optional[Dict[str, Any]]) -> CartResponse:
+        """CartResponse of a cart document"""
+        if not cart:
+            return CartResponse(order=None, item_count=0, subtotal=0, tax_amount=0, total_amount=0)
+
+        order = cart["order"]
+        return CartResponse(
+            order=order,
+            item_count=len(order["items"]),
+            subtotal=order["subtotal"],
+            tax_amount=order["tax_amount"],
+            total_amount=order["total_amount"]
+        )
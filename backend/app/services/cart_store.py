@@ -0,0 +1,123 @@
+"""
+Cart Store
+Active cart state (lines and totals) cached in the cache backend over orders/order_items
+"""
+
+import copy
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.cache import CacheBackend, CacheStats, create_cache_backend
+from app.core.config import settings
+
+
+class CartStore:
+    """
+    Read cache of each customer's cart as a JSON document
+    A document is {"order": <OrderResponse dict>, "version", "synced_at",
+    "generation"}. CartService writes every change to orders/order_items
+    before storing the new document, so the store never holds the only copy
+    of a change. Documents older than the store's generation, which bulk
+    writes to quotations bump, count as misses and are reloaded. The
+    per-customer lock is taken in the backend when it is shared, so workers
+    serving the same customer take turns; otherwise it is process-local.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl_seconds: int = 3600, lock_timeout_seconds: int = 10):
+        self._backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.stats = CacheStats()
+        self._locks: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> CacheBackend:
+        """Backend, created from settings on first use"""
+        if self._backend is None:
+            self._backend = create_cache_backend()
+        return self._backend
+
+    @staticmethod
+    def key(customer_id: int) -> str:
+        """Cache key of a customer's cart"""
+        return f"cart:{customer_id}"
+
+    @contextmanager
+    def lock(self, customer_id: int) -> Iterator[None]:
+        """
+        Serialize read-modify-write of one customer's cart (not reentrant)
+        The backend lock expires after lock_timeout_seconds, so a worker that
+        dies holding it only blocks the customer's cart for that long.
+        """
+        with self._lock:
+            lock = self._locks.setdefault(customer_id, threading.Lock())
+        with lock:
+            if not self.backend.shared:
+                yield
+                return
+
+            key = f"cart:lock:{customer_id}"
+            token = uuid.uuid4().hex
+            deadline = time.monotonic() + self.lock_timeout_seconds
+            while not self.backend.add(key, token, self.lock_timeout_seconds):
+                if time.monotonic() >= deadline:
+                    raise ValueError("Cart is being updated, please try again")
+                time.sleep(0.01)
+            try:
+                yield
+            finally:
+                if self.backend.get(key) == token:
+                    self.backend.delete(key)
+
+    def generation(self) -> int:
+        """Current generation of every cart document"""
+        return int(self.backend.get("cart:gen") or 0)
+
+    def invalidate_all(self) -> None:
+        """Bump the generation so every cached cart reloads (after a bulk write to quotations commits)"""
+        self.backend.incr("cart:gen")
+        self.stats.incr("invalidations")
+
+    def get(self, customer_id: int) -> Optional[Dict[str, Any]]:
+        """Get a copy of a cart document (None when missing or older than the generation)"""
+        cart = self.backend.get(self.key(customer_id))
+        if cart is not None and cart.get("generation") != self.generation():
+            cart = None
+        self.stats.incr("hits" if cart is not None else "misses")
+        # The memory backend hands out the stored object itself
+        return copy.deepcopy(cart)
+
+    def set(self, customer_id: int, cart: Dict[str, Any]) -> None:
+        """Store a cart document (already written to the database)"""
+        self.backend.set(self.key(customer_id), cart, self.ttl_seconds)
+        self.stats.incr("sets")
+
+    def discard(self, customer_id: int, order_id: Optional[int] = None) -> None:
+        """Drop a customer's cart (only if it is order_id, when given)"""
+        if order_id is not None:
+            cart = self.get(customer_id)
+            if not cart or not cart.get("order") or cart["order"]["id"] != order_id:
+                return
+        self.backend.delete(self.key(customer_id))
+        self.stats.incr("invalidations")
+
+    def clear(self) -> None:
+        """Forget every cart (tests)"""
+        self.backend.clear()
+
+    def snapshot(self) -> dict:
+        """Get the backend name, settings and counters"""
+        return {
+            "backend": self.backend.name,
+            "ttl_seconds": self.ttl_seconds,
+            "shared_lock": self.backend.shared,
+            **self.stats.snapshot()
+        }
+
+
+# Process-wide cart store
+cart_store = CartStore(ttl_seconds=settings.CART_STORE_TTL_SECONDS)
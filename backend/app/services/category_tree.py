@@ -0,0 +1,139 @@
+"""
+Category Tree
+Closure-table maintenance and an in-process cache of the category hierarchy
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.product import Category, CategoryClosure
+
+
+def closure_rows(parents: Dict[int, Optional[int]]) -> List[Tuple[int, int, int]]:
+    """(ancestor, descendant, depth) rows for a child -> parent map; cycles are cut"""
+    rows = []
+    for category_id in parents:
+        ancestor, depth, seen = category_id, 0, set()
+        while ancestor is not None and ancestor in parents and ancestor not in seen:
+            rows.append((ancestor, category_id, depth))
+            seen.add(ancestor)
+            ancestor = parents[ancestor]
+            depth += 1
+    return rows
+
+
+def rebuild_closure(db: Session) -> int:
+    """Rewrite the closure table from parent_id links (caller commits)"""
+    parents = dict(db.query(Category.id, Category.parent_id).all())
+    rows = closure_rows(parents)
+
+    db.query(CategoryClosure).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(CategoryClosure), [
+            {"ancestor_id": ancestor, "descendant_id": descendant, "depth": depth}
+            for ancestor, descendant, depth in rows
+        ])
+    return len(rows)
+
+
+def ensure_closure(db: Session) -> bool:
+    """Rebuild the closure table when it is out of step with the categories; True if rebuilt"""
+    parents = dict(db.query(Category.id, Category.parent_id).all())
+    stored = db.query(func.count()).select_from(CategoryClosure).scalar()
+    if stored == len(closure_rows(parents)):
+        return False
+
+    rebuild_closure(db)
+    db.commit()
+    return True
+
+
+class CategoryTree:
+    """
+    Cached nested category hierarchy
+    Loaded on first use and dropped on every category write in this process;
+    other processes pick changes up after CATEGORY_TREE_TTL_SECONDS.
+    """
+
+    def __init__(self, ttl_seconds: int = 300):
+        self.ttl_seconds = ttl_seconds
+        self._nodes: Dict[int, Dict[str, Any]] = {}
+        self._roots: List[Dict[str, Any]] = []
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> int:
+        """Build the nested tree from the categories table"""
+        categories = db.query(Category).order_by(Category.name).all()
+
+        nodes = {
+            category.id: {
+                "id": category.id,
+                "name": category.name,
+                "description": category.description,
+                "parent_id": category.parent_id,
+                "image_url": category.image_url,
+                "depth": 0,
+                "children": []
+            }
+            for category in categories
+        }
+        roots = []
+        for node in nodes.values():
+            parent = nodes.get(node["parent_id"])
+            (parent["children"] if parent else roots).append(node)
+
+        # Depths top-down; nodes caught in a parent cycle stay unreachable
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            for child in node["children"]:
+                child["depth"] = node["depth"] + 1
+                stack.append(child)
+
+        with self._lock:
+            self._nodes = nodes
+            self._roots = roots
+            self._loaded_at = time.monotonic()
+
+        return len(nodes)
+
+    def invalidate(self) -> None:
+        """Drop the cached tree"""
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure(self, db: Session) -> None:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+            self.load(db)
+
+    def get_tree(self, db: Session, root_id: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """Nested roots (or the subtree under root_id; None if it does not exist)"""
+        self._ensure(db)
+        if root_id is None:
+            return self._roots
+        node = self._nodes.get(root_id)
+        return [node] if node else None
+
+    def descendant_ids(self, db: Session, category_id: int) -> Set[int]:
+        """A category and every category below it"""
+        self._ensure(db)
+        node = self._nodes.get(category_id)
+        if node is None:
+            return {category_id}
+
+        ids, stack = set(), [node]
+        while stack:
+            node = stack.pop()
+            ids.add(node["id"])
+            stack.extend(node["children"])
+        return ids
+
+
+# Process-wide tree cache
+category_tree = CategoryTree(ttl_seconds=settings.CATEGORY_TREE_TTL_SECONDS)
@@ -0,0 +1,197 @@
+"""
+Facet Index
+In-memory posting sets for catalog facet counts (brand, color, category, price bucket)
+"""
+
+import bisect
+import threading
+import time
+from collections import namedtuple
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.product import Product
+
+# Facetable fields of one storefront product
+FacetDoc = namedtuple("FacetDoc", ["brand", "color", "category_id", "price"])
+
+FACETS = ("brand", "color", "category", "price")
+
+
+def parse_price_buckets(raw: str) -> List[float]:
+    """Ascending bucket lower bounds from a comma separated setting"""
+    bounds = sorted({float(value) for value in raw.split(",") if value.strip()})
+    return bounds if bounds and bounds[0] == 0 else [0.0] + bounds
+
+
+class FacetIndex:
+    """
+    Posting sets (facet value -> product ids) over storefront products
+    Only published, rentable products are indexed, mirroring GET /products.
+    Product writes update the index incrementally; it is also rebuilt every
+    FACET_INDEX_REFRESH_SECONDS so changes made by other worker processes or
+    scripts show up. Counts are disjunctive: each facet is counted under all
+    active filters except its own, so the UI can offer alternatives.
+    """
+
+    def __init__(self, price_buckets: Optional[List[float]] = None, refresh_seconds: int = 300):
+        self.price_buckets = price_buckets or [0.0]
+        self.refresh_seconds = refresh_seconds
+        self._docs: Dict[int, FacetDoc] = {}
+        self._postings: Dict[str, Dict[Any, Set[int]]] = {facet: {} for facet in FACETS}
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def _bucket(self, price: float) -> int:
+        """Index of the price bucket containing a price"""
+        return max(0, bisect.bisect_right(self.price_buckets, price or 0.0) - 1)
+
+    def _values(self, doc: FacetDoc) -> Dict[str, Any]:
+        return {
+            "brand": doc.brand,
+            "color": doc.color,
+            "category": doc.category_id,
+            "price": self._bucket(doc.price)
+        }
+
+    def _add(self, product_id: int, doc: FacetDoc) -> None:
+        self._docs[product_id] = doc
+        for facet, value in self._values(doc).items():
+            if value is not None:
+                self._postings[facet].setdefault(value, set()).add(product_id)
+
+    def _discard(self, product_id: int) -> None:
+        doc = self._docs.pop(product_id, None)
+        if doc is None:
+            return
+        for facet, value in self._values(doc).items():
+            postings = self._postings[facet].get(value)
+            if postings is not None:
+                postings.discard(product_id)
+                if not postings:
+                    del self._postings[facet][value]
+
+    def load(self, db: Session) -> int:
+        """(Re)build the index from all storefront products"""
+        rows = db.query(
+            Product.id, Product.brand, Product.color, Product.category_id, Product.rental_price_daily
+        ).filter(
+            Product.is_published == True,
+            Product.is_rentable == True
+        ).all()
+
+        with self._lock:
+            self._docs = {}
+            self._postings = {facet: {} for facet in FACETS}
+            for row in rows:
+                self._add(row.id, FacetDoc(row.brand, row.color, row.category_id, row.rental_price_daily or 0.0))
+            self._loaded_at = time.monotonic()
+
+        return len(rows)
+
+    def ensure_fresh(self, db: Session) -> None:
+        """Load on first use and whenever the refresh interval has passed"""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self.load(db)
+
+    def upsert(self, product: Product) -> None:
+        """Re-index one product after a committed write"""
+        with self._lock:
+            if not self.is_loaded:
+                return
+            self._discard(product.id)
+            if product.is_published and product.is_rentable:
+                self._add(product.id, FacetDoc(
+                    product.brand, product.color, product.category_id, product.rental_price_daily or 0.0
+                ))
+
+    def remove(self, product_id: int) -> None:
+        """Drop a deleted product"""
+        with self._lock:
+            self._discard(product_id)
+
+    def _price_ids(self, min_price: Optional[float], max_price: Optional[float]) -> Set[int]:
+        """Products priced within [min_price, max_price]; whole buckets come from postings"""
+        low = min_price if min_price is not None else float("-inf")
+        high = max_price if max_price is not None else float("inf")
+        ids: Set[int] = set()
+        bounds = self.price_buckets + [float("inf")]
+
+        for bucket, postings in self._postings["price"].items():
+            bucket_low, bucket_high = bounds[bucket], bounds[bucket + 1]
+            if bucket_high <= low or bucket_low > high:
+                continue
+            if low <= bucket_low and bucket_high <= high:
+                ids |= postings
+            else:
+                ids.update(pid for pid in postings if low <= self._docs[pid].price <= high)
+
+        return ids
+
+    def _category_ids(self, category_ids: Iterable[int]) -> Set[int]:
+        """Products in any of the given categories"""
+        ids: Set[int] = set()
+        for category_id in category_ids:
+            ids |= self._postings["category"].get(category_id, set())
+        return ids
+
+    def counts(
+        self,
+        category_ids: Optional[Iterable[int]] = None,
+        brand: Optional[str] = None,
+        color: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        restrict_to: Optional[Iterable[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Facet counts for the active filters
+        category_ids matches any of several categories (e.g. a whole subtree);
+        restrict_to limits counting to a precomputed id set (e.g. search matches).
+        """
+        with self._lock:
+            filters: Dict[str, Optional[Set[int]]] = {
+                "brand": self._postings["brand"].get(brand, set()) if brand else None,
+                "color": self._postings["color"].get(color, set()) if color else None,
+                "category": self._category_ids(category_ids) if category_ids else None,
+                "price": self._price_ids(min_price, max_price) if min_price is not None or max_price is not None else None
+            }
+            universe = set(self._docs) if restrict_to is None else set(restrict_to) & self._docs.keys()
+
+            def matching(skip: Optional[str] = None) -> Set[int]:
+                ids = universe
+                # Intersect smallest sets first
+                for facet, ids_for_filter in sorted(
+                    ((f, s) for f, s in filters.items() if s is not None and f != skip),
+                    key=lambda item: len(item[1])
+                ):
+                    ids = ids & ids_for_filter
+                return ids
+
+            result = {"total": len(matching())}
+            for facet in FACETS:
+                base = matching(skip=facet)
+                values = [(value, len(postings & base)) for value, postings in self._postings[facet].items()]
+                result[facet] = sorted(
+                    ((value, count) for value, count in values if count),
+                    key=lambda item: (-item[1], str(item[0])) if facet != "price" else item[0]
+                )
+            return result
+
+    def bucket_range(self, bucket: int) -> Dict[str, Optional[float]]:
+        """Bounds of a price bucket (max is None for the last one)"""
+        bounds = self.price_buckets + [None]
+        return {"min": bounds[bucket], "max": bounds[bucket + 1]}
+
+
+# Process-wide index instance
+facet_index = FacetIndex(
+    price_buckets=parse_price_buckets(settings.FACET_PRICE_BUCKETS),
+    refresh_seconds=settings.FACET_INDEX_REFRESH_SECONDS
+)
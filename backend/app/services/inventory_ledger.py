@@ -0,0 +1,470 @@
+"""
+Inventory Ledger
+Single write path for stock levels: append movements, update balances incrementally
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, exists, func, insert
+from sqlalchemy.orm import Session
+
+from app.models.inventory import InventoryMovement, InventoryBalance, MovementType
+from app.models.product import Product, ProductVariant
+from app.models.reservation import Reservation, ReservationStatus
+
+logger = logging.getLogger(__name__)
+
+# Balance key: (product_id, variant_id) with variant 0 for the product level
+SkuKey = Tuple[int, int]
+
+_movements = InventoryMovement.__table__
+_balances = InventoryBalance.__table__
+_products = Product.__table__
+_variants = ProductVariant.__table__
+
+
+def _rollup(totals: Dict[SkuKey, List[int]], product_id: int, variant_id: int, on_hand: int, reserved: int) -> None:
+    """Add one SKU's deltas to balance totals (reserved also rolls up to the product)"""
+    totals[(product_id, variant_id)][0] += on_hand
+    totals[(product_id, variant_id)][1] += reserved
+    if variant_id:
+        totals[(product_id, 0)][1] += reserved
+
+
+class InventoryLedger:
+    """
+    Append-only stock ledger with materialized balances
+    Every change to on-hand or reserved stock is written as a movement and
+    applied to inventory_balances with relative UPDATEs in the caller's
+    transaction. The quantity columns on products and product_variants are
+    kept as a mirror of the balances for existing readers; nothing else
+    should write them.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # Writes
+
+    def record(
+        self,
+        product_id: int,
+        movement_type: MovementType,
+        on_hand_delta: int = 0,
+        reserved_delta: int = 0,
+        variant_id: Optional[int] = None,
+        reference_type: Optional[str] = None,
+        reference_id: Optional[int] = None,
+        note: Optional[str] = None
+    ) -> int:
+        """Record a single movement (the caller commits)"""
+        return self.record_many([{
+            "product_id": product_id,
+            "variant_id": variant_id,
+            "movement_type": movement_type,
+            "on_hand_delta": on_hand_delta,
+            "reserved_delta": reserved_delta,
+            "reference_type": reference_type,
+            "reference_id": reference_id,
+            "note": note
+        }])
+
+    def record_many(self, movements: Iterable[Dict[str, Any]]) -> int:
+        """Record movements in bulk: one INSERT batch and one UPDATE per touched SKU (the caller commits)"""
+        rows = self._movement_rows(movements)
+        if not rows:
+            return 0
+
+        # Pending ORM changes (e.g. new reservations) go first
+        self.db.flush()
+        self._open_missing({row["product_id"] for row in rows})
+        self.db.execute(insert(InventoryMovement), rows)
+
+        deltas: Dict[SkuKey, List[int]] = defaultdict(lambda: [0, 0])
+        for row in rows:
+            _rollup(deltas, row["product_id"], row["variant_id"] or 0, row["on_hand_delta"], row["reserved_delta"])
+
+        self._apply_deltas(deltas, rows[0]["created_at"])
+        return len(rows)
+
+    @staticmethod
+    def _movement_rows(movements: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Normalize movements to insert rows, dropping no-ops"""
+        now = datetime.utcnow()
+        rows = []
+        for movement in movements:
+            if not movement.get("on_hand_delta") and not movement.get("reserved_delta"):
+                continue
+            rows.append({
+                "product_id": movement["product_id"],
+                "variant_id": movement.get("variant_id") or None,
+                "movement_type": movement["movement_type"],
+                "on_hand_delta": movement.get("on_hand_delta") or 0,
+                "reserved_delta": movement.get("reserved_delta") or 0,
+                "reference_type": movement.get("reference_type"),
+                "reference_id": movement.get("reference_id"),
+                "note": movement.get("note"),
+                "created_at": now
+            })
+        return rows
+
+    def _apply_deltas(self, deltas: Dict[SkuKey, List[int]], now: datetime) -> None:
+        """Add deltas to balances (creating missing rows) and mirror them onto the SKU rows"""
+        connection = self.db.connection()
+
+        existing = set(connection.execute(
+            _balances.select().with_only_columns(_balances.c.product_id, _balances.c.variant_id).where(
+                _balances.c.product_id.in_({product_id for product_id, _ in deltas})
+            )
+        ).all())
+        missing = [key for key in deltas if key not in existing]
+        if missing:
+            connection.execute(_balances.insert(), [
+                {"product_id": product_id, "variant_id": variant_id,
+                 "quantity_on_hand": 0, "quantity_reserved": 0, "updated_at": now}
+                for product_id, variant_id in missing
+            ])
+
+        params = [
+            {"key_product": product_id, "key_variant": variant_id,
+             "on_hand": on_hand, "reserved": reserved, "now": now}
+            for (product_id, variant_id), (on_hand, reserved) in deltas.items()
+        ]
+        connection.execute(
+            _balances.update().where(
+                _balances.c.product_id == bindparam("key_product"),
+                _balances.c.variant_id == bindparam("key_variant")
+            ).values(
+                quantity_on_hand=_balances.c.quantity_on_hand + bindparam("on_hand"),
+                quantity_reserved=_balances.c.quantity_reserved + bindparam("reserved"),
+                updated_at=bindparam("now")
+            ),
+            params
+        )
+
+        # Mirror onto products (variant 0) and product_variants
+        product_params = [p for p in params if not p["key_variant"]]
+        variant_params = [p for p in params if p["key_variant"]]
+        if product_params:
+            connection.execute(
+                _products.update().where(_products.c.id == bindparam("key_product")).values(
+                    quantity_on_hand=func.coalesce(_products.c.quantity_on_hand, 0) + bindparam("on_hand"),
+                    quantity_reserved=func.coalesce(_products.c.quantity_reserved, 0) + bindparam("reserved")
+                ),
+                product_params
+            )
+        if variant_params:
+            connection.execute(
+                _variants.update().where(_variants.c.id == bindparam("key_variant")).values(
+                    quantity_on_hand=func.coalesce(_variants.c.quantity_on_hand, 0) + bindparam("on_hand"),
+                    quantity_reserved=func.coalesce(_variants.c.quantity_reserved, 0) + bindparam("reserved")
+                ),
+                variant_params
+            )
+
+    def reserve(self, reservations: Iterable[Reservation], order_id: Optional[int] = None, by_order: bool = False) -> int:
+        """Record stock reserved by new reservations (by_order references each reservation's own order)"""
+        return self.record_many(
+            self._reservation_movement(reservation, MovementType.RESERVE, 1,
+                                       reservation.order_id if by_order else order_id)
+            for reservation in reservations
+        )
+
+    def release(
+        self,
+        reservations: Iterable[Reservation],
+        movement_type: MovementType = MovementType.RELEASE,
+        order_id: Optional[int] = None,
+        by_order: bool = False
+    ) -> int:
+        """Record stock freed by released, fulfilled or expired reservations (by_order as in reserve)"""
+        return self.record_many(
+            self._reservation_movement(reservation, movement_type, -1,
+                                       reservation.order_id if by_order else order_id)
+            for reservation in reservations
+        )
+
+    @staticmethod
+    def _reservation_movement(reservation, movement_type: MovementType, sign: int, order_id: Optional[int]) -> Dict[str, Any]:
+        return {
+            "product_id": reservation.product_id,
+            "variant_id": reservation.variant_id,
+            "movement_type": movement_type,
+            "reserved_delta": sign * reservation.quantity,
+            "reference_type": "order" if order_id else "reservation",
+            "reference_id": order_id or reservation.id
+        }
+
+    # Reads
+
+    def get_balances(self, product_ids: Iterable[int]) -> Dict[SkuKey, InventoryBalance]:
+        """Get balances of many products in one query, keyed by (product_id, variant_id)"""
+        ids = list(set(product_ids))
+        if not ids:
+            return {}
+        balances = self.db.query(InventoryBalance).filter(InventoryBalance.product_id.in_(ids)).all()
+        return {(b.product_id, b.variant_id): b for b in balances}
+
+    def get_stock(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """Get product and variant balances of one product"""
+        balances = self.get_balances([product_id])
+        product = balances.get((product_id, 0))
+        if product is None:
+            return None
+
+        def row(balance: InventoryBalance) -> Dict[str, Any]:
+            return {
+                "quantity_on_hand": balance.quantity_on_hand,
+                "quantity_reserved": balance.quantity_reserved,
+                "available_quantity": balance.available_quantity,
+                "updated_at": balance.updated_at
+            }
+
+        return {
+            "product_id": product_id,
+            **row(product),
+            "variants": [
+                {"variant_id": variant_id, **row(balance)}
+                for (_, variant_id), balance in sorted(balances.items()) if variant_id
+            ]
+        }
+
+    # Reconciliation
+
+    def _open_missing(self, product_ids: Iterable[int]) -> int:
+        """Open ledgers of products among product_ids that have no movements yet"""
+        ids = list(product_ids)
+        if not ids:
+            return 0
+        pending = [row[0] for row in self.db.query(Product.id).filter(
+            Product.id.in_(ids),
+            ~exists().where(InventoryMovement.product_id == Product.id)
+        ).all()]
+        return self.open_balances(pending) if pending else 0
+
+    def open_balances(self, product_ids: Optional[List[int]] = None) -> int:
+        """
+        Carry legacy counters into the ledger as OPENING movements
+        Applies to products without movements (created before the ledger or
+        inserted by scripts). The quantity columns already hold these values,
+        so only movements and balances are written.
+        """
+        query = self.db.query(Product.id, Product.quantity_on_hand, Product.quantity_reserved).filter(
+            ~exists().where(InventoryMovement.product_id == Product.id)
+        )
+        if product_ids is not None:
+            query = query.filter(Product.id.in_(product_ids))
+        products = query.all()
+        if not products:
+            return 0
+
+        ids = [product_id for product_id, _, _ in products]
+        skus = [(product_id, None, on_hand, reserved) for product_id, on_hand, reserved in products]
+        skus += self.db.query(
+            ProductVariant.product_id, ProductVariant.id,
+            ProductVariant.quantity_on_hand, ProductVariant.quantity_reserved
+        ).filter(ProductVariant.product_id.in_(ids)).all()
+
+        # Product counters already include variant reservations, so the
+        # product-level opening only carries the remainder
+        variant_reserved = defaultdict(int)
+        for product_id, variant_id, _, reserved in skus:
+            if variant_id:
+                variant_reserved[product_id] += reserved or 0
+
+        rows = self._movement_rows(
+            {
+                "product_id": product_id,
+                "variant_id": variant_id,
+                "movement_type": MovementType.OPENING,
+                "on_hand_delta": on_hand or 0,
+                "reserved_delta": (reserved or 0) - (0 if variant_id else variant_reserved[product_id]),
+                "reference_type": "product",
+                "reference_id": product_id
+            }
+            for product_id, variant_id, on_hand, reserved in skus
+        )
+
+        totals: Dict[SkuKey, List[int]] = defaultdict(lambda: [0, 0])
+        for row in rows:
+            _rollup(totals, row["product_id"], row["variant_id"] or 0, row["on_hand_delta"], row["reserved_delta"])
+
+        connection = self.db.connection()
+        connection.execute(_balances.delete().where(_balances.c.product_id.in_(ids)))
+        if rows:
+            connection.execute(_movements.insert(), rows)
+            connection.execute(_balances.insert(), [
+                {"product_id": product_id, "variant_id": variant_id,
+                 "quantity_on_hand": on_hand, "quantity_reserved": reserved, "updated_at": rows[0]["created_at"]}
+                for (product_id, variant_id), (on_hand, reserved) in totals.items()
+            ])
+
+        return len(rows)
+
+    def reconcile(self, product_ids: Optional[List[int]] = None, chunk_size: int = 500) -> Dict[str, int]:
+        """
+        Recompute balances from the full ledger in bulk and repair drift
+        Reserved stock is also audited against active reservations and any
+        gap is booked as an ADJUSTMENT movement. Works in chunks of products,
+        one transaction each; returns counts of what was opened and corrected.
+        """
+        opened = self.open_balances(product_ids)
+        self.db.commit()
+
+        if product_ids is None:
+            product_ids = [row[0] for row in self.db.query(InventoryMovement.product_id).distinct().all()]
+        ids = sorted(set(product_ids))
+
+        result = {"opened": opened, "skus": 0, "adjustments": 0, "balances_corrected": 0, "counters_corrected": 0}
+        for offset in range(0, len(ids), chunk_size):
+            for key, value in self._reconcile_chunk(ids[offset:offset + chunk_size]).items():
+                result[key] += value
+            self.db.commit()
+
+        self.db.expire_all()
+        if result["adjustments"] or result["balances_corrected"] or result["counters_corrected"]:
+            logger.warning("Inventory reconciliation repaired drift: %s", result)
+        return result
+
+    def _reconcile_chunk(self, product_ids: List[int]) -> Dict[str, int]:
+        """Audit reserved stock, then rewrite balances and mirror columns from movement sums"""
+        # Lock the balances first: writers block on them, so their movements
+        # are either in our sums or applied on top of our result afterwards
+        balances = {
+            (b.product_id, b.variant_id): b for b in self.db.query(InventoryBalance).filter(
+                InventoryBalance.product_id.in_(product_ids)
+            ).with_for_update().populate_existing().all()
+        }
+
+        def movement_sums() -> Dict[Tuple[int, Optional[int]], Tuple[int, int]]:
+            return {
+                (product_id, variant_id): (int(on_hand or 0), int(reserved or 0))
+                for product_id, variant_id, on_hand, reserved in self.db.query(
+                    InventoryMovement.product_id,
+                    InventoryMovement.variant_id,
+                    func.sum(InventoryMovement.on_hand_delta),
+                    func.sum(InventoryMovement.reserved_delta)
+                ).filter(
+                    InventoryMovement.product_id.in_(product_ids)
+                ).group_by(InventoryMovement.product_id, InventoryMovement.variant_id).all()
+            }
+
+        # Reserved stock must equal what active reservations hold
+        actual = {
+            (product_id, variant_id): int(quantity or 0)
+            for product_id, variant_id, quantity in self.db.query(
+                Reservation.product_id, Reservation.variant_id, func.sum(Reservation.quantity)
+            ).filter(
+                Reservation.product_id.in_(product_ids),
+                Reservation.status == ReservationStatus.ACTIVE
+            ).group_by(Reservation.product_id, Reservation.variant_id).all()
+        }
+        sums = movement_sums()
+        adjustments = [
+            {
+                "product_id": product_id,
+                "variant_id": variant_id,
+                "movement_type": MovementType.ADJUSTMENT,
+                "reserved_delta": actual.get((product_id, variant_id), 0) - sums.get((product_id, variant_id), (0, 0))[1],
+                "reference_type": "reconciliation",
+                "note": "Reserved stock realigned with active reservations"
+            }
+            for product_id, variant_id in set(actual) | set(sums)
+        ]
+        adjusted = self.record_many(adjustments)
+        if adjusted:
+            sums = movement_sums()
+            self.db.expire_all()
+            balances = {
+                (b.product_id, b.variant_id): b for b in self.db.query(InventoryBalance).filter(
+                    InventoryBalance.product_id.in_(product_ids)
+                ).all()
+            }
+
+        expected: Dict[SkuKey, List[int]] = defaultdict(lambda: [0, 0])
+        for (product_id, variant_id), (on_hand, reserved) in sums.items():
+            _rollup(expected, product_id, variant_id or 0, on_hand, reserved)
+
+        now = datetime.utcnow()
+        stale, missing = [], []
+        for (product_id, variant_id), (on_hand, reserved) in expected.items():
+            balance = balances.get((product_id, variant_id))
+            if balance is None:
+                missing.append({"product_id": product_id, "variant_id": variant_id,
+                                "quantity_on_hand": on_hand, "quantity_reserved": reserved, "updated_at": now})
+            elif (balance.quantity_on_hand, balance.quantity_reserved) != (on_hand, reserved):
+                stale.append({"key_product": product_id, "key_variant": variant_id,
+                              "on_hand": on_hand, "reserved": reserved, "now": now})
+
+        connection = self.db.connection()
+        if stale:
+            connection.execute(
+                _balances.update().where(
+                    _balances.c.product_id == bindparam("key_product"),
+                    _balances.c.variant_id == bindparam("key_variant")
+                ).values(
+                    quantity_on_hand=bindparam("on_hand"),
+                    quantity_reserved=bindparam("reserved"),
+                    updated_at=bindparam("now")
+                ),
+                stale
+            )
+        if missing:
+            connection.execute(_balances.insert(), missing)
+
+        return {
+            "skus": len(expected),
+            "adjustments": adjusted,
+            "balances_corrected": len(stale) + len(missing),
+            "counters_corrected": self._sync_mirror(product_ids, expected)
+        }
+
+    def _sync_mirror(self, product_ids: List[int], expected: Dict[SkuKey, List[int]]) -> int:
+        """Rewrite product / variant quantity columns that disagree with the ledger"""
+        connection = self.db.connection()
+        product_rows = connection.execute(
+            _products.select().with_only_columns(
+                _products.c.id, _products.c.quantity_on_hand, _products.c.quantity_reserved
+            ).where(_products.c.id.in_(product_ids))
+        ).all()
+        variant_rows = connection.execute(
+            _variants.select().with_only_columns(
+                _variants.c.id, _variants.c.product_id, _variants.c.quantity_on_hand, _variants.c.quantity_reserved
+            ).where(_variants.c.product_id.in_(product_ids))
+        ).all()
+
+        fixes = 0
+        for table, rows in (
+            (_products, [((row.id, 0), row) for row in product_rows]),
+            (_variants, [((row.product_id, row.id), row) for row in variant_rows]),
+        ):
+            params = []
+            for key, row in rows:
+                on_hand, reserved = expected.get(key, (0, 0))
+                if (row.quantity_on_hand, row.quantity_reserved) != (on_hand, reserved):
+                    params.append({"row_id": row.id, "on_hand": on_hand, "reserved": reserved})
+            if params:
+                connection.execute(
+                    table.update().where(table.c.id == bindparam("row_id")).values(
+                        quantity_on_hand=bindparam("on_hand"),
+                        quantity_reserved=bindparam("reserved")
+                    ),
+                    params
+                )
+            fixes += len(params)
+
+        return fixes
+
+
+def reconcile_once() -> Dict[str, int]:
+    """Run a full reconciliation in a fresh session"""
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return InventoryLedger(db).reconcile()
+    finally:
+        db.close()
@@ -12,9 +12,12 @@ import hashlib
 
 from app.models.invoice import Invoice, InvoiceItem, InvoiceStatus
 from app.models.payment import Payment, PaymentStatus, PaymentMethod
-from app.models.order import Order, OrderStatus
+from app.models.order import Order
+from app.services.order_service import OrderService
 from app.models.user import User
 from app.core.config import settings
+from app.core.pagination import paginate
+from app.core.sequences import next_number
 
 
 class InvoiceService:
@@ -31,25 +34,14 @@ class InvoiceService:
             self.razorpay_client = None
     
     def generate_invoice_number(self) -> str:
-        """Generate unique invoice number"""
+        """Generate unique invoice number (INV/YYYY/ + per-year sequence)"""
         year = datetime.now().year
-        last_invoice = self.db.query(Invoice).filter(
-            Invoice.invoice_number.like(f"INV/{year}/%")
-        ).order_by(Invoice.id.desc()).first()
-        
-        if last_invoice:
-            last_num = int(last_invoice.invoice_number.split("/")[-1])
-            next_num = last_num + 1
-        else:
-            next_num = 1
-        
-        return f"INV/{year}/{next_num:05d}"
+        return next_number(self.db, f"invoice:{year}", Invoice.invoice_number, f"INV/{year}/")
     
     def generate_payment_number(self) -> str:
-        """Generate unique payment number"""
-        last_payment = self.db.query(Payment).order_by(Payment.id.desc()).first()
-        next_id = (last_payment.id + 1) if last_payment else 1
-        return f"PAY{datetime.now().strftime('%Y%m')}{next_id:05d}"
+        """Generate unique payment number (PAY + YYYYMM + per-month sequence)"""
+        period = datetime.now().strftime('%Y%m')
+        return next_number(self.db, f"payment:{period}", Payment.payment_number, f"PAY{period}")
     
     def create_invoice_from_order(self, order_id: int, due_days: int = 7, notes: str = None) -> Invoice:
         """Create invoice from confirmed order"""
@@ -177,7 +169,9 @@ class InvoiceService:
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         page: int = 1,
-        per_page: int = 20
+        per_page: int = 20,
+        cursor: Optional[str] = None,
+        count: str = "exact"
     ) -> Dict[str, Any]:
         """Get invoices with filters"""
         query = self.db.query(Invoice)
@@ -197,16 +191,7 @@ class InvoiceService:
         if end_date:
             query = query.filter(Invoice.invoice_date <= end_date)
         
-        total = query.count()
-        invoices = query.order_by(Invoice.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
-        
-        return {
-            "items": invoices,
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "pages": (total + per_page - 1) // per_page
-        }
+        return paginate(query, Invoice, page, per_page, cursor=cursor, count=count)
     
     def post_invoice(self, invoice_id: int) -> Invoice:
         """Post invoice (make it official)"""
@@ -316,10 +301,10 @@ class InvoiceService:
         if invoice.amount_due <= 0:
             invoice.status = InvoiceStatus.PAID
             
-            # Update order status
+            # A paid quotation is confirmed (availability, reservations) before
+            # it is marked paid, as in PaymentService; commits the payment with it
             order = self.db.query(Order).filter(Order.id == invoice.order_id).first()
-            if order and order.status == OrderStatus.SALE_ORDER:
-                order.status = OrderStatus.CONFIRMED
+            if order and OrderService(self.db).pay_order(order):
                 order.downpayment_paid = True
         else:
             invoice.status = InvoiceStatus.PARTIALLY_PAID
@@ -368,7 +353,9 @@ class InvoiceService:
         invoice_id: Optional[int] = None,
         status: Optional[str] = None,
         page: int = 1,
-        per_page: int = 20
+        per_page: int = 20,
+        cursor: Optional[str] = None,
+        count: str = "exact"
     ) -> Dict[str, Any]:
         """Get payments with filters"""
         query = self.db.query(Payment)
@@ -379,13 +366,4 @@ class InvoiceService:
         if status:
             query = query.filter(Payment.status == status)
         
-        total = query.count()
-        payments = query.order_by(Payment.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
-        
-        return {
-            "items": payments,
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "pages": (total + per_page - 1) // per_page
-        }
+        return paginate(query, Payment, page, per_page, cursor=cursor, count=count)
@@ -0,0 +1,36 @@
+"""
+Loading Profiles
+Named eager-loading option sets matching what each response schema serializes
+"""
+
+from sqlalchemy.orm import Query, joinedload, selectinload
+
+from app.models.invoice import Invoice
+from app.models.order import Order
+from app.models.product import Product
+
+
+# OrderResponse: items and the primary invoice (with its items and customer)
+ORDER_LIST = (
+    selectinload(Order.items),
+    selectinload(Order.invoice_list).options(
+        selectinload(Invoice.items),
+        joinedload(Invoice.customer)
+    ),
+)
+
+# ProductResponse: category and variants
+PRODUCT_LIST = (
+    joinedload(Product.category),
+    selectinload(Product.variants),
+)
+
+LOADING_PROFILES = {
+    "order_list": ORDER_LIST,
+    "product_list": PRODUCT_LIST,
+}
+
+
+def with_profile(query: Query, profile: str) -> Query:
+    """Apply a named loading profile to a query"""
+    return query.options(*LOADING_PROFILES[profile])
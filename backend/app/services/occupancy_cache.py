@@ -0,0 +1,77 @@
+"""
+Occupancy Cache
+Per-product cache of bucketed availability calendars
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from app.core.config import settings
+
+
+class OccupancyCache:
+    """
+    LRU cache of calendar results grouped by product
+    Entries expire after a TTL (bounding staleness across worker processes)
+    and a whole product is dropped whenever its reservations or stock change.
+    """
+
+    def __init__(self, max_products: int = 1000, max_windows: int = 32, ttl_seconds: int = 300):
+        self.max_products = max_products
+        self.max_windows = max_windows
+        self.ttl_seconds = ttl_seconds
+        self._products: "OrderedDict[int, OrderedDict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, product_id: int, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Get a cached calendar, or None when missing or expired"""
+        with self._lock:
+            windows = self._products.get(product_id)
+            if windows is None:
+                return None
+            entry = windows.get(key)
+            if entry is None:
+                return None
+
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del windows[key]
+                return None
+
+            self._products.move_to_end(product_id)
+            windows.move_to_end(key)
+            return value
+
+    def set(self, product_id: int, key: Hashable, value: Dict[str, Any]) -> None:
+        """Store a calendar for a product window"""
+        with self._lock:
+            windows = self._products.get(product_id)
+            if windows is None:
+                windows = self._products[product_id] = OrderedDict()
+            windows[key] = (time.monotonic(), value)
+            windows.move_to_end(key)
+            self._products.move_to_end(product_id)
+
+            while len(windows) > self.max_windows:
+                windows.popitem(last=False)
+            while len(self._products) > self.max_products:
+                self._products.popitem(last=False)
+
+    def invalidate(self, product_id: int) -> None:
+        """Drop every cached calendar of a product"""
+        with self._lock:
+            self._products.pop(product_id, None)
+
+    def clear(self) -> None:
+        """Drop everything"""
+        with self._lock:
+            self._products.clear()
+
+
+# Process-wide cache instance
+occupancy_cache = OccupancyCache(
+    max_products=settings.OCCUPANCY_CACHE_MAX_PRODUCTS,
+    ttl_seconds=settings.OCCUPANCY_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,343 @@
+"""
+Order Lifecycle
+Order state machine: validated status transitions with before/after/commit hooks, applied to batches of orders
+"""
+
+import enum
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.models.order import Order, OrderStatus
+from app.models.inventory import MovementType
+from app.models.reservation import Reservation, PickupDocument, ReturnDocument, ReservationStatus, StockStatus
+from app.schemas.product import ProductAvailabilityCheck
+from app.services.availability_index import apply_reservation_changes, span_from_reservation
+from app.services.cart_store import cart_store
+from app.services.inventory_ledger import InventoryLedger
+from app.services.product_service import ProductService
+
+
+class OrderEvent(str, enum.Enum):
+    """Things that move an order from one status to another"""
+    CONFIRM = "confirm"
+    PAY = "pay"
+    PICKUP = "pickup"
+    RETURN = "return"
+    CANCEL = "cancel"
+
+
+# Statuses an event is allowed from, the status it leads to, and the error otherwise
+Transition = namedtuple("Transition", ["event", "sources", "target", "error"])
+
+TRANSITIONS = {
+    OrderEvent.CONFIRM: Transition(
+        OrderEvent.CONFIRM, frozenset({OrderStatus.QUOTATION}), OrderStatus.SALE_ORDER,
+        "Only quotations can be confirmed"
+    ),
+    OrderEvent.PAY: Transition(
+        OrderEvent.PAY, frozenset({OrderStatus.SALE_ORDER}), OrderStatus.CONFIRMED,
+        "Only sale orders can be paid"
+    ),
+    OrderEvent.PICKUP: Transition(
+        OrderEvent.PICKUP, frozenset({OrderStatus.SALE_ORDER, OrderStatus.CONFIRMED}), OrderStatus.PICKED_UP,
+        "Order must be confirmed before pickup"
+    ),
+    OrderEvent.RETURN: Transition(
+        OrderEvent.RETURN, frozenset({OrderStatus.PICKED_UP, OrderStatus.ACTIVE, OrderStatus.LATE}),
+        OrderStatus.RETURNED, "Order must be picked up before return"
+    ),
+    OrderEvent.CANCEL: Transition(
+        OrderEvent.CANCEL, frozenset(set(OrderStatus) - {OrderStatus.COMPLETED, OrderStatus.CANCELLED}),
+        OrderStatus.CANCELLED, "Cannot cancel completed or already cancelled order"
+    ),
+}
+
+# hook(db, orders, context); context holds the caller's keyword arguments and "now"
+Hook = Callable[[Session, List[Order], Dict[str, Any]], None]
+STAGES = ("before", "after", "commit")
+
+
+class InvalidTransition(ValueError):
+    """An event is not allowed from an order's current status"""
+
+    def __init__(self, message: str, order_id: int):
+        super().__init__(message)
+        self.order_id = order_id
+
+
+class OrderStateMachine:
+    """
+    Applies order events through the TRANSITIONS table
+    Every order in a batch is validated before anything changes, so a batch
+    moves as a whole or not at all. "before" hooks may still veto with a
+    ValueError; "after" hooks write the side effects (reservations,
+    documents, ledger) for the whole batch once the status is set; "commit"
+    hooks run after run() commits (in-memory indexes, caches).
+    """
+
+    def __init__(self):
+        self._hooks: Dict[str, Dict[OrderEvent, List[Hook]]] = {stage: defaultdict(list) for stage in STAGES}
+
+    def on(self, event: OrderEvent, stage: str = "after") -> Callable[[Hook], Hook]:
+        """Decorator registering a hook for an event"""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown hook stage: {stage}")
+
+        def register(hook: Hook) -> Hook:
+            self._hooks[stage][OrderEvent(event)].append(hook)
+            return hook
+        return register
+
+    @staticmethod
+    def can(order: Order, event: OrderEvent) -> bool:
+        """Whether the event is allowed from the order's status"""
+        return order.status in TRANSITIONS[OrderEvent(event)].sources
+
+    @staticmethod
+    def allowed_events(status: OrderStatus) -> List[OrderEvent]:
+        """Events allowed from a status"""
+        return [event for event, transition in TRANSITIONS.items() if status in transition.sources]
+
+    def check(self, orders: Sequence[Order], event: OrderEvent) -> Transition:
+        """Validate every order, naming the order in the error when there are several"""
+        transition = TRANSITIONS[OrderEvent(event)]
+        for order in orders:
+            if order.status not in transition.sources:
+                message = transition.error if len(orders) == 1 else f"Order {order.order_number}: {transition.error}"
+                raise InvalidTransition(message, order.id)
+        return transition
+
+    def apply(self, db: Session, orders: Sequence[Order], event: OrderEvent, **context) -> Dict[str, Any]:
+        """
+        Validate, run hooks and set the new status without committing
+        For callers that own the transaction (payments); returns the context
+        for finish(). Prefer run().
+        """
+        event = OrderEvent(event)
+        transition = self.check(orders, event)
+        context.setdefault("now", datetime.utcnow())
+
+        for hook in self._hooks["before"][event]:
+            hook(db, list(orders), context)
+        for order in orders:
+            order.status = transition.target
+        for hook in self._hooks["after"][event]:
+            hook(db, list(orders), context)
+        return context
+
+    def finish(self, db: Session, orders: Sequence[Order], event: OrderEvent, context: Dict[str, Any]) -> None:
+        """Run the commit hooks of an applied and committed transition (orders are expired by then)"""
+        for hook in self._hooks["commit"][OrderEvent(event)]:
+            hook(db, list(orders), context)
+
+    def run(self, db: Session, orders: Sequence[Order], event: OrderEvent, **context) -> Dict[str, Any]:
+        """Apply an event to a batch of orders in one transaction; returns the hooks' context"""
+        try:
+            context = self.apply(db, orders, event, **context)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        self.finish(db, orders, event, context)
+        return context
+
+
+# Process-wide state machine with the built-in side effects registered below
+order_state_machine = OrderStateMachine()
+
+
+def _reservations(db: Session, orders: List[Order]) -> List[Reservation]:
+    """All reservations of a batch of orders in one query"""
+    return db.query(Reservation).filter(Reservation.order_id.in_([order.id for order in orders])).all()
+
+
+# Confirm: availability, reservations, pickup documents
+
+@order_state_machine.on(OrderEvent.CONFIRM, "before")
+def _check_availability(db: Session, orders: List[Order], context: Dict[str, Any]) -> None:
+    items = [item for order in orders for item in order.items]
+    availability = ProductService(db).check_availability_bulk([
+        ProductAvailabilityCheck(
+            product_id=item.product_id,
+            variant_id=item.variant_id,
+            start_date=item.rental_start_date,
+            end_date=item.rental_end_date,
+            quantity=item.quantity
+        )
+        for item in items
+    ], for_update=True)
+
+    for item, result in zip(items, availability):
+        if not result["is_available"]:
+            raise ValueError(f"Product {item.product_name} is no longer available")
+
+
+@order_state_machine.on(OrderEvent.CONFIRM)
+def _reserve(db: Session, orders: List[Order], context: Dict[str, Any]) -> None:
+    data = context.get("data")
+    reservations = []
+    for order in orders:
+        if data is not None:
+            order.delivery_method = data.delivery_method
+            order.billing_address = data.billing_address
+            order.delivery_address = data.delivery_address
+            order.downpayment_amount = data.downpayment_amount or 0
+        order.confirmed_at = context["now"]
+
+        for item in order.items:
+            reservations.append(Reservation(
+                product_id=item.product_id,
+                variant_id=item.variant_id,
+                order_id=order.id,
+                quantity=item.quantity,
+                start_date=item.rental_start_date,
+                end_date=item.rental_end_date,
+                status=ReservationStatus.ACTIVE,
+                stock_status=StockStatus.RESERVED
+            ))
+
+        db.add(PickupDocument(
+            document_number=f"PU-{order.order_number}",
+            order_id=order.id,
+            pickup_instructions="Please bring a valid ID for verification",
+            pickup_location=order.delivery_address
+        ))
+
+    db.add_all(reservations)
+    InventoryLedger(db).reserve(reservations, by_order=True)
+    context["created_spans"] = [span_from_reservation(reservation) for reservation in reservations]
+    context["carts"] = [(order.customer_id, order.id) for order in orders]
+
+
+@order_state_machine.on(OrderEvent.CONFIRM, "commit")
+def _publish_reservations(db: Session, orders: List[Order], context: Dict[str, Any]) -> None:
+    apply_reservation_changes(created=context["created_spans"])
+    _discard_carts(context)
+
+
+# Pay
+
+@order_state_machine.on(OrderEvent.PAY)
+def _record_payment(db: Session, orders: List[Order], context: Dict[str, Any]) -> None:
+    for order in orders:
+        if order.confirmed_at is None:
+            order.confirmed_at = context["now"]
+
+
+# Pickup: reservations go with the customer, pickup documents are signed
+
+@order_state_machine.on(OrderEvent.PICKUP)
+def _record_pickup(db: Session, orders: List[Order], context: Dict[str, Any]) -> None:
+    order_ids = [order.id for order in orders]
+    for order in orders:
+        order.pickup_date = context["now"]
+        order.pickup_notes = context.get("notes")
+
+    db.query(Reservation).filter(Reservation.order_id.in_(order_ids)).update(
+        {Reservation.stock_status: StockStatus.WITH_CUSTOMER}, synchronize_session=False
+    )
+    db.query(PickupDocument).filter(PickupDocument.order_id.in_(order_ids)).update({
+        PickupDocument.is_picked_up: True,
+        PickupDocument.picked_up_at: context["now"],
+        PickupDocument.picked_up_by: context.get("picked_up_by")
+    }, synchronize_session=False)
+
+
+# Return: late fees, reservations fulfilled, return documents
+
+@order_state_machine.on(OrderEvent.RETURN)
+def _record_return(db: Session, orders: List[Order], context: Dict[str, Any]) -> None:
+    now = context["now"]
+    for order in orders:
+        is_late = now > order.rental_end_date
+        late_days = (now - order.rental_end_date).days if is_late else 0
+        if is_late:
+            order.late_fees_applied = late_days * order.total_amount * 0.05  # 5% per day
+
+        order.return_date = now
+        order.actual_return_date = now
+        order.return_notes = context.get("condition_notes")
+
+        db.add(ReturnDocument(
+            document_number=f"RT-{order.order_number}",
+            order_id=order.id,
+            is_returned=True,
+            returned_at=now,
+            received_by=context.get("received_by"),
+            condition_notes=context.get("condition_notes"),
+            damage_reported=context.get("damage_reported", False),
+            damage_description=context.get("damage_description"),
+            expected_return_date=order.rental_end_date,
+            actual_return_date=now,
+            is_late=is_late,
+            late_days=late_days,
+            late_fee_applied=order.late_fees_applied
+        ))
+
+    context["released_spans"] = _release(
+        db, orders, ReservationStatus.FULFILLED, MovementType.FULFILL, now, StockStatus.RETURNED
+    )
+
+
+# Cancel: reservations released (or expired, for the sweeper's stale holds)
+
+@order_state_machine.on(OrderEvent.CANCEL, "before")
+def _note_carts(db: Session, orders: List[Order], context: Dict[str, Any]) -> None:
+    context["carts"] = [
+        (order.customer_id, order.id) for order in orders if order.status == OrderStatus.QUOTATION
+    ]
+
+
+@order_state_machine.on(OrderEvent.CANCEL)
+def _record_cancel(db: Session, orders: List[Order], context: Dict[str, Any]) -> None:
+    notes = context.get("notes")
+    for order in orders:
+        if context.get("append_notes") and order.internal_notes:
+            order.internal_notes = f"{order.internal_notes}\n{notes}"
+        else:
+            order.internal_notes = notes
+
+    context["released_spans"] = _release(
+        db, orders,
+        context.get("reservation_status", ReservationStatus.RELEASED),
+        context.get("movement_type", MovementType.RELEASE),
+        context["now"]
+    )
+
+
+def _release(
+    db: Session,
+    orders: List[Order],
+    status: ReservationStatus,
+    movement_type: MovementType,
+    now: datetime,
+    stock_status: Optional[StockStatus] = None
+) -> list:
+    """Close the orders' reservations; only those still holding stock give it back"""
+    released = []
+    for reservation in _reservations(db, orders):
+        if reservation.status == ReservationStatus.ACTIVE:
+            released.append(reservation)
+        reservation.status = status
+        if stock_status is not None:
+            reservation.stock_status = stock_status
+        reservation.released_at = now
+
+    InventoryLedger(db).release(released, movement_type, by_order=True)
+    return [span_from_reservation(reservation) for reservation in released]
+
+
+@order_state_machine.on(OrderEvent.RETURN, "commit")
+@order_state_machine.on(OrderEvent.CANCEL, "commit")
+def _publish_releases(db: Session, orders: List[Order], context: Dict[str, Any]) -> None:
+    apply_reservation_changes(released=context["released_spans"])
+    _discard_carts(context)
+
+
+def _discard_carts(context: Dict[str, Any]) -> None:
+    """Drop cached carts of quotations that just left the quotation status"""
+    for customer_id, order_id in context.get("carts", []):
+        cart_store.discard(customer_id, order_id)
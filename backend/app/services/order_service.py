@@ -5,15 +5,23 @@ Handles quotations, orders, reservations, pickup and return
 
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, or_, insert
 
 from app.models.order import Order, OrderItem, OrderStatus, DeliveryMethod
 from app.models.product import Product
 from app.models.user import User
-from app.models.reservation import Reservation, PickupDocument, ReturnDocument, ReservationStatus, StockStatus
-from app.schemas.order import OrderCreate, OrderItemCreate, OrderConfirm
+from app.schemas.order import OrderCreate, OrderConfirm
+from app.schemas.product import ProductAvailabilityCheck
+from app.core.locking import lock_products
+from app.core.sequences import next_number
+from app.core.pagination import paginate
+from app.services.loading_profiles import with_profile
 from app.services.product_service import ProductService
+from app.services.inventory_ledger import InventoryLedger
+from app.services.pricing_engine import pricing_engine
+from app.services.batch_pricing import line_totals, order_totals
+from app.services.order_lifecycle import OrderEvent, order_state_machine
 
 
 class OrderService:
@@ -22,101 +30,134 @@ class OrderService:
     def __init__(self, db: Session):
         self.db = db
         self.product_service = ProductService(db)
+        self.ledger = InventoryLedger(db)
     
     def generate_order_number(self) -> str:
-        """Generate unique order number"""
-        last_order = self.db.query(Order).order_by(Order.id.desc()).first()
-        next_id = (last_order.id + 1) if last_order else 1
-        return f"S{datetime.now().strftime('%Y%m')}{next_id:05d}"
+        """Generate unique order number (S + YYYYMM + per-month sequence)"""
+        period = datetime.now().strftime('%Y%m')
+        return next_number(self.db, f"order:{period}", Order.order_number, f"S{period}")
     
     def create_quotation(self, customer_id: int, data: OrderCreate) -> Order:
-        """Create a new quotation (cart)"""
-        # Group items by vendor
-        vendor_orders = {}
-        
-        for item in data.items:
-            product = self.product_service.get_product(item.product_id)
-            if not product:
-                raise ValueError(f"Product {item.product_id} not found")
-            
-            # Check availability
-            availability = self.product_service.check_availability(
-                item.product_id,
-                item.rental_start_date,
-                item.rental_end_date,
-                item.quantity,
-                item.variant_id
+        """Create a new quotation (cart); returns the first vendor's order, see checkout()"""
+        return self.checkout(customer_id, data)[0]
+    
+    def checkout(self, customer_id: int, data: OrderCreate) -> List[Order]:
+        """
+        Create one quotation per vendor for a multi-vendor cart
+        Products, availability and prices are resolved for the whole cart up
+        front, totals are computed in memory, and all orders and their items
+        are written with two bulk INSERTs in a single transaction, so the
+        number of statements does not grow with the number of lines.
+        Returns every created order, in the order vendors first appear.
+        """
+        if not data.items:
+            raise ValueError("No items to check out")
+        
+        # Resolve products and availability for the whole cart at once
+        product_ids = {item.product_id for item in data.items}
+        products = {
+            p.id: p for p in self.db.query(
+                Product.id, Product.name, Product.sku, Product.vendor_id, Product.security_deposit
+            ).filter(Product.id.in_(product_ids)).all()
+        }
+        missing = product_ids - products.keys()
+        if missing:
+            raise ValueError(f"Product {min(missing)} not found")
+        
+        availability = self.product_service.check_availability_bulk([
+            ProductAvailabilityCheck(
+                product_id=item.product_id,
+                variant_id=item.variant_id,
+                start_date=item.rental_start_date,
+                end_date=item.rental_end_date,
+                quantity=item.quantity
             )
-            
-            if not availability["is_available"]:
+            for item in data.items
+        ])
+        
+        # Price every line in one pass over the cached price tables
+        quotes = pricing_engine.quote_many(self.db, [
+            (item.product_id, item.variant_id, item.rental_start_date, item.rental_end_date, item.rental_period_type)
+            for item in data.items
+        ])
+        
+        # Group lines by vendor
+        vendor_lines: Dict[int, list] = {}
+        for item, result, quote in zip(data.items, availability, quotes):
+            product = products[item.product_id]
+            if not result["is_available"]:
                 raise ValueError(f"Product {product.name} is not available for the selected dates")
+            vendor_lines.setdefault(product.vendor_id, []).append((item, product, quote.unit_amount))
+        
+        # Orders and items as rows, totals computed in memory
+        tax_rate = Order.__table__.c.tax_rate.default.arg
+        order_rows, item_rows, order_index = [], [], []
+        for vendor_id, lines in vendor_lines.items():
+            order_number = self.generate_order_number()
+            security_deposit = 0.0
+            for item, product, unit_price in lines:
+                item_rows.append({
+                    "order_number": order_number,
+                    "product_id": product.id,
+                    "variant_id": item.variant_id,
+                    "product_name": product.name,
+                    "product_sku": product.sku,
+                    "rental_start_date": item.rental_start_date,
+                    "rental_end_date": item.rental_end_date,
+                    "quantity": item.quantity,
+                    "unit_price": unit_price,
+                    "rental_period_type": item.rental_period_type
+                })
+                order_index.append(len(order_rows))
+                security_deposit += (product.security_deposit or 0.0) * item.quantity
             
-            vendor_id = product.vendor_id
-            if vendor_id not in vendor_orders:
-                vendor_orders[vendor_id] = []
-            vendor_orders[vendor_id].append((item, product))
-        
-        created_orders = []
-        
-        # Create separate order for each vendor
-        for vendor_id, items in vendor_orders.items():
-            order = Order(
-                order_number=self.generate_order_number(),
-                customer_id=customer_id,
-                vendor_id=vendor_id,
-                status=OrderStatus.QUOTATION,
-                rental_start_date=data.rental_start_date,
-                rental_end_date=data.rental_end_date,
-                delivery_method=DeliveryMethod(data.delivery_method.value),
-                billing_address=data.billing_address,
-                delivery_address=data.delivery_address,
-                customer_notes=data.customer_notes,
-                discount_code=data.discount_code
-            )
-            
-            self.db.add(order)
-            self.db.flush()
-            
-            # Add items
-            for item_data, product in items:
-                # Get price based on rental period type
-                unit_price = self._get_rental_price(product, item_data.rental_period_type)
-                
-                order_item = OrderItem(
-                    order_id=order.id,
-                    product_id=product.id,
-                    variant_id=item_data.variant_id,
-                    product_name=product.name,
-                    product_sku=product.sku,
-                    rental_start_date=item_data.rental_start_date,
-                    rental_end_date=item_data.rental_end_date,
-                    quantity=item_data.quantity,
-                    unit_price=unit_price,
-                    rental_period_type=item_data.rental_period_type
-                )
-                order_item.calculate_total(order.tax_rate)
-                
-                order.security_deposit += product.security_deposit * item_data.quantity
-                
-                self.db.add(order_item)
-            
-            order.calculate_totals()
-            created_orders.append(order)
-        
+            order_rows.append({
+                "order_number": order_number,
+                "customer_id": customer_id,
+                "vendor_id": vendor_id,
+                "status": OrderStatus.QUOTATION,
+                "rental_start_date": data.rental_start_date,
+                "rental_end_date": data.rental_end_date,
+                "delivery_method": DeliveryMethod(data.delivery_method.value),
+                "billing_address": data.billing_address,
+                "delivery_address": data.delivery_address,
+                "customer_notes": data.customer_notes,
+                "discount_code": data.discount_code,
+                "tax_rate": tax_rate,
+                "security_deposit": security_deposit
+            })
+        
+        # Line and order totals for the whole cart in one columnar pass
+        subtotals, taxes, totals = line_totals(
+            [row["quantity"] for row in item_rows],
+            [row["unit_price"] for row in item_rows],
+            [tax_rate] * len(item_rows)
+        )
+        for row, subtotal, tax, total in zip(item_rows, subtotals, taxes, totals):
+            row.update(line_subtotal=subtotal, tax_amount=tax, line_total=total)
+        no_charges = [0.0] * len(order_rows)
+        subtotals, taxes, totals = order_totals(
+            order_index, subtotals, taxes,
+            no_charges, [row["security_deposit"] for row in order_rows], no_charges
+        )
+        for row, subtotal, tax, total in zip(order_rows, subtotals, taxes, totals):
+            row.update(subtotal=subtotal, tax_amount=tax, total_amount=total)
+        
+        self.db.execute(insert(Order), order_rows)
+        order_ids = dict(self.db.query(Order.order_number, Order.id).filter(
+            Order.order_number.in_([row["order_number"] for row in order_rows])
+        ).all())
+        for row in item_rows:
+            row["order_id"] = order_ids[row.pop("order_number")]
+        self.db.execute(insert(OrderItem), item_rows)
         self.db.commit()
         
-        # Return first order (or could return all)
-        return created_orders[0] if created_orders else None
-    
-    def _get_rental_price(self, product: Product, period_type: str) -> float:
-        """Get rental price based on period type"""
-        prices = {
-            "hourly": product.rental_price_hourly,
-            "daily": product.rental_price_daily,
-            "weekly": product.rental_price_weekly,
-            "monthly": product.rental_price_monthly
+        orders = {
+            order.id: order for order in with_profile(
+                self.db.query(Order).filter(Order.id.in_(order_ids.values())), "order_list"
+            ).all()
         }
-        return prices.get(period_type, product.rental_price_daily)
+        return [orders[order_ids[row["order_number"]]] for row in order_rows]
     
     def get_order(self, order_id: int) -> Optional[Order]:
         """Get order by ID"""
@@ -134,7 +175,9 @@ class OrderService:
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         page: int = 1,
-        per_page: int = 20
+        per_page: int = 20,
+        cursor: Optional[str] = None,
+        count: str = "exact"
     ) -> Dict[str, Any]:
         """Get orders with filters"""
         query = self.db.query(Order)
@@ -154,217 +197,103 @@ class OrderService:
         if end_date:
             query = query.filter(Order.order_date <= end_date)
         
-        total = query.count()
-        orders = query.order_by(Order.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
-        
-        return {
-            "items": orders,
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "pages": (total + per_page - 1) // per_page
-        }
-    
-    def get_customer_cart(self, customer_id: int) -> Optional[Order]:
-        """Get customer's active cart (quotation)"""
-        cart = self.db.query(Order).filter(
-            Order.customer_id == customer_id,
-            Order.status == OrderStatus.QUOTATION
-        ).first()
-        
-        if cart:
-            cart.calculate_totals()
-            self.db.commit()
-            self.db.refresh(cart)
-            
-        return cart
-    
-    def add_to_cart(self, customer_id: int, item: OrderItemCreate) -> Order:
-        """Add item to cart (create or update quotation)"""
-        cart = self.get_customer_cart(customer_id)
-        
-        product = self.product_service.get_product(item.product_id)
-        if not product:
-            raise ValueError("Product not found")
-        
-        # Check availability
-        availability = self.product_service.check_availability(
-            item.product_id,
-            item.rental_start_date,
-            item.rental_end_date,
-            item.quantity,
-            item.variant_id
-        )
-        
-        if not availability["is_available"]:
-            raise ValueError(f"Product {product.name} is not available")
-        
-        if not cart:
-            # Create new cart
-            cart = Order(
-                order_number=self.generate_order_number(),
-                customer_id=customer_id,
-                vendor_id=product.vendor_id,
-                status=OrderStatus.QUOTATION,
-                rental_start_date=item.rental_start_date,
-                rental_end_date=item.rental_end_date
-            )
-            self.db.add(cart)
-            self.db.flush()
-        
-        # Check if item already exists
-        existing_item = self.db.query(OrderItem).filter(
-            OrderItem.order_id == cart.id,
-            OrderItem.product_id == item.product_id,
-            OrderItem.variant_id == item.variant_id
-        ).first()
-        
-        unit_price = self._get_rental_price(product, item.rental_period_type)
-        
-        if existing_item:
-            existing_item.quantity += item.quantity
-            existing_item.calculate_total(cart.tax_rate)
-        else:
-            order_item = OrderItem(
-                product_id=product.id,
-                variant_id=item.variant_id,
-                product_name=product.name,
-                product_sku=product.sku,
-                rental_start_date=item.rental_start_date,
-                rental_end_date=item.rental_end_date,
-                quantity=item.quantity,
-                unit_price=unit_price,
-                rental_period_type=item.rental_period_type
-            )
-            order_item.calculate_total(cart.tax_rate)
-            cart.items.append(order_item)
-            cart.security_deposit += product.security_deposit * item.quantity
-        
-        
-        self.db.flush()
-        cart.calculate_totals()
-        self.db.commit()
-        self.db.refresh(cart)
-        
-        return cart
-    
-    def remove_from_cart(self, customer_id: int, item_id: int) -> Optional[Order]:
-        """Remove item from cart"""
-        cart = self.get_customer_cart(customer_id)
-        
-        if not cart:
-            return None
-        
-        item = self.db.query(OrderItem).filter(
-            OrderItem.id == item_id,
-            OrderItem.order_id == cart.id
-        ).first()
-        
-        if item:
-            self.db.delete(item)
-            cart.calculate_totals()
-            self.db.commit()
-            self.db.refresh(cart)
-        
-        return cart
+        return paginate(with_profile(query, "order_list"), Order, page, per_page, cursor=cursor, count=count)
     
     def confirm_order(self, order_id: int, data: OrderConfirm) -> Order:
         """
         Confirm quotation and convert to sale order
-        Creates reservations to prevent double-booking
+        Creates reservations to prevent double-booking. Validation and
+        reservation run as one critical section per product, so concurrent
+        confirmations cannot both pass the availability check.
         """
         order = self.get_order(order_id)
         
         if not order:
             raise ValueError("Order not found")
         
-        if order.status != OrderStatus.QUOTATION:
+        if order.status == OrderStatus.SALE_ORDER:
+            return order
+        order_state_machine.check([order], OrderEvent.CONFIRM)
+        
+        product_ids = {item.product_id for item in order.items}
+        
+        with lock_products(self.db, product_ids):
+            # Re-read the order now that competing bookings are serialized
+            self.db.refresh(order, with_for_update=True)
             if order.status == OrderStatus.SALE_ORDER:
+                self.db.commit()
                 return order
-            raise ValueError("Only quotations can be confirmed")
-        
-        # Verify availability for all items
-        for item in order.items:
-            availability = self.product_service.check_availability(
-                item.product_id,
-                item.rental_start_date,
-                item.rental_end_date,
-                item.quantity,
-                item.variant_id
-            )
-            
-            if not availability["is_available"]:
-                raise ValueError(f"Product {item.product_name} is no longer available")
-        
-        # Update order
-        order.status = OrderStatus.SALE_ORDER
-        order.delivery_method = data.delivery_method
-        order.billing_address = data.billing_address
-        order.delivery_address = data.delivery_address
-        order.downpayment_amount = data.downpayment_amount or 0
-        order.confirmed_at = datetime.utcnow()
-        
-        # Create reservations for each item
-        for item in order.items:
-            reservation = Reservation(
-                product_id=item.product_id,
-                variant_id=item.variant_id,
-                order_id=order.id,
-                quantity=item.quantity,
-                start_date=item.rental_start_date,
-                end_date=item.rental_end_date,
-                status=ReservationStatus.ACTIVE,
-                stock_status=StockStatus.RESERVED
-            )
-            self.db.add(reservation)
             
-            # Update product reserved quantity
-            product = self.product_service.get_product(item.product_id)
-            product.quantity_reserved += item.quantity
-        
-        # Create pickup document
-        pickup_doc = PickupDocument(
-            document_number=f"PU-{order.order_number}",
-            order_id=order.id,
-            pickup_instructions="Please bring a valid ID for verification",
-            pickup_location=order.delivery_address
-        )
-        self.db.add(pickup_doc)
+            # Availability, reservations, stock and pickup document (see order_lifecycle)
+            order_state_machine.run(self.db, [order], OrderEvent.CONFIRM, data=data)
         
-        self.db.commit()
         self.db.refresh(order)
         
         return order
     
-    def mark_picked_up(self, order_id: int, picked_up_by: str = None, notes: str = None) -> Order:
-        """Mark order as picked up"""
-        order = self.get_order(order_id)
-        
-        if not order:
-            raise ValueError("Order not found")
-        
-        if order.status not in [OrderStatus.SALE_ORDER, OrderStatus.CONFIRMED]:
-            raise ValueError("Order must be confirmed before pickup")
-        
-        order.status = OrderStatus.PICKED_UP
-        order.pickup_date = datetime.utcnow()
-        order.pickup_notes = notes
+    def pay_order(self, order: Order) -> bool:
+        """
+        Mark a paid order CONFIRMED, committing the caller's pending changes with it
+        A quotation paid outright is confirmed first, inside the same
+        per-product critical section as confirm_order, so it is checked for
+        availability and reserved like any other confirmation. If it can no
+        longer be confirmed the payment is still committed and the order is
+        left for the vendor. Returns whether the order moved.
+        """
+        product_ids = set()
+        if order_state_machine.can(order, OrderEvent.CONFIRM):
+            product_ids = {item.product_id for item in order.items}
         
-        # Update reservations
-        for reservation in order.reservations:
-            reservation.stock_status = StockStatus.WITH_CUSTOMER
+        self.db.flush()
+        applied = []
+        with lock_products(self.db, product_ids):
+            # Re-read the order now that competing bookings are serialized
+            self.db.refresh(order, with_for_update=True)
+            events = [OrderEvent.CONFIRM, OrderEvent.PAY] if product_ids else [OrderEvent.PAY]
+            try:
+                for event in events:
+                    applied.append((event, order_state_machine.apply(self.db, [order], event)))
+            except ValueError:
+                # Vetoed (status or availability) before anything was written
+                if applied:
+                    raise
+            self.db.commit()
         
-        # Update pickup document
-        pickup_doc = self.db.query(PickupDocument).filter(
-            PickupDocument.order_id == order_id
-        ).first()
+        for event, context in applied:
+            order_state_machine.finish(self.db, [order], event, context)
+        return bool(applied)
+    
+    def transition(self, order_ids: List[int], event: OrderEvent, **context) -> List[Order]:
+        """
+        Apply one event to many orders in a single transaction
+        Orders are loaded (and row-locked) with one query, every order is
+        validated before anything changes, and reservations, documents and
+        stock movements are written in bulk by the state machine hooks.
+        Returns the orders in the requested order (expired after the commit).
+        """
+        order_ids = list(dict.fromkeys(order_ids))
+        orders = {
+            order.id: order for order in self.db.query(Order).options(
+                selectinload(Order.items)
+            ).filter(Order.id.in_(order_ids)).with_for_update().all()
+        }
         
-        if pickup_doc:
-            pickup_doc.is_picked_up = True
-            pickup_doc.picked_up_at = datetime.utcnow()
-            pickup_doc.picked_up_by = picked_up_by
+        missing = [order_id for order_id in order_ids if order_id not in orders]
+        if missing:
+            self.db.rollback()
+            raise ValueError("Order not found" if len(order_ids) == 1 else f"Orders not found: {missing}")
         
-        self.db.commit()
+        ordered = [orders[order_id] for order_id in order_ids]
+        order_state_machine.run(self.db, ordered, event, **context)
+        return ordered
+    
+    def get_order_vendors(self, order_ids: List[int]) -> Dict[int, int]:
+        """Vendor id of each existing order"""
+        return dict(self.db.query(Order.id, Order.vendor_id).filter(Order.id.in_(order_ids)).all())
+    
+    def mark_picked_up(self, order_id: int, picked_up_by: str = None, notes: str = None) -> Order:
+        """Mark order as picked up"""
+        order, = self.transition([order_id], OrderEvent.PICKUP, picked_up_by=picked_up_by, notes=notes)
         self.db.refresh(order)
         
         return order
@@ -377,84 +306,22 @@ class OrderService:
         damage_reported: bool = False,
         damage_description: str = None
     ) -> Order:
-        """Mark order as returned"""
-        order = self.get_order(order_id)
-        
-        if not order:
-            raise ValueError("Order not found")
-        
-        if order.status not in [OrderStatus.PICKED_UP, OrderStatus.ACTIVE, OrderStatus.LATE]:
-            raise ValueError("Order must be picked up before return")
-        
-        now = datetime.utcnow()
-        
-        # Calculate late fees if applicable
-        if now > order.rental_end_date:
-            days_late = (now - order.rental_end_date).days
-            late_fee_per_day = order.total_amount * 0.05  # 5% per day
-            order.late_fees_applied = days_late * late_fee_per_day
-        
-        order.status = OrderStatus.RETURNED
-        order.return_date = now
-        order.actual_return_date = now
-        order.return_notes = condition_notes
-        
-        # Release reservations
-        for reservation in order.reservations:
-            reservation.status = ReservationStatus.FULFILLED
-            reservation.stock_status = StockStatus.RETURNED
-            reservation.released_at = now
-            
-            # Update product quantity
-            product = self.product_service.get_product(reservation.product_id)
-            product.quantity_reserved -= reservation.quantity
-        
-        # Create return document
-        return_doc = ReturnDocument(
-            document_number=f"RT-{order.order_number}",
-            order_id=order.id,
-            is_returned=True,
-            returned_at=now,
+        """Mark order as returned (late fees, return document, reservations fulfilled)"""
+        order, = self.transition(
+            [order_id],
+            OrderEvent.RETURN,
             received_by=received_by,
             condition_notes=condition_notes,
             damage_reported=damage_reported,
-            damage_description=damage_description,
-            expected_return_date=order.rental_end_date,
-            actual_return_date=now,
-            is_late=now > order.rental_end_date,
-            late_days=(now - order.rental_end_date).days if now > order.rental_end_date else 0,
-            late_fee_applied=order.late_fees_applied
+            damage_description=damage_description
         )
-        self.db.add(return_doc)
-        
-        self.db.commit()
         self.db.refresh(order)
         
         return order
     
     def cancel_order(self, order_id: int, notes: str = None) -> Order:
         """Cancel order and release reservations"""
-        order = self.get_order(order_id)
-        
-        if not order:
-            raise ValueError("Order not found")
-        
-        if order.status in [OrderStatus.COMPLETED, OrderStatus.CANCELLED]:
-            raise ValueError("Cannot cancel completed or already cancelled order")
-        
-        order.status = OrderStatus.CANCELLED
-        order.internal_notes = notes
-        
-        # Release reservations
-        for reservation in order.reservations:
-            reservation.status = ReservationStatus.RELEASED
-            reservation.released_at = datetime.utcnow()
-            
-            # Update product quantity
-            product = self.product_service.get_product(reservation.product_id)
-            product.quantity_reserved -= reservation.quantity
-        
-        self.db.commit()
+        order, = self.transition([order_id], OrderEvent.CANCEL, notes=notes)
         self.db.refresh(order)
         
         return order
@@ -468,7 +335,7 @@ class OrderService:
         if vendor_id:
             query = query.filter(Order.vendor_id == vendor_id)
         
-        return query.all()
+        return with_profile(query, "order_list").all()
     
     def get_upcoming_returns(self, vendor_id: Optional[int] = None, days: int = 1) -> List[Order]:
         """Get orders with upcoming returns (within specified days)"""
@@ -486,7 +353,7 @@ class OrderService:
         if vendor_id:
             query = query.filter(Order.vendor_id == vendor_id)
         
-        return query.all()
+        return with_profile(query, "order_list").all()
     
     def get_overdue_orders(self, vendor_id: Optional[int] = None) -> List[Order]:
         """Get overdue orders"""
@@ -500,4 +367,4 @@ class OrderService:
         if vendor_id:
             query = query.filter(Order.vendor_id == vendor_id)
         
-        return query.all()
+        return with_profile(query, "order_list").all()
@@ -8,31 +8,30 @@ import hmac
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import Optional, Any, Dict
-import random
-import string
 
 from app.models.payment import Payment, PaymentStatus, PaymentMethod
 from app.models.invoice import Invoice, InvoiceStatus
-from app.models.order import Order, OrderStatus
+from app.models.order import Order
+from app.services.order_service import OrderService
 from app.core.config import settings
+from app.core.sequences import next_number
 class PaymentService:
     def __init__(self, db: Session):
         self.db = db
         self.client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
 
     def generate_payment_number(self) -> str:
-        """Generate a custom payment number"""
-        prefix = "PAY"
-        timestamp = datetime.now().strftime("%Y%m")
-        random_str = ''.join(random.choices(string.digits, k=5))
-        return f"{prefix}{timestamp}{random_str}"
+        """Generate unique payment number (PAY + YYYYMM + per-month sequence)"""
+        period = datetime.now().strftime("%Y%m")
+        return next_number(self.db, f"payment:{period}", Payment.payment_number, f"PAY{period}")
 
     def create_razorpay_order(self, customer_id: int, amount: float, order_id: Optional[int] = None, invoice_id: Optional[int] = None) -> Dict[str, Any]:
         """Create a Razorpay order"""
         # Razorpay expects amount in paise (1 INR = 100 paise)
         amount_paise = int(amount * 100)
 
-        receipt = f"rec_{self.generate_payment_number()}"
+        payment_number = self.generate_payment_number()
+        receipt = f"rec_{payment_number}"
 
         data = {
             "amount": amount_paise,
@@ -52,7 +51,7 @@ class PaymentService:
 
             # Create a pending payment record in our DB
             payment = Payment(
-                payment_number=self.generate_payment_number(),
+                payment_number=payment_number,
                 customer_id=customer_id,
                 order_id=order_id,
                 invoice_id=invoice_id or 0,  # Default if not found
@@ -123,22 +122,12 @@ class PaymentService:
         if payment.order_id:
             order = self.db.query(Order).filter(Order.id == payment.order_id).first()
             if order:
-                # If it was a pending or confirmed order, mark as paid
-                if order.status in [OrderStatus.QUOTATION, OrderStatus.SALE_ORDER]:
-                    order.status = OrderStatus.CONFIRMED
-                    order.confirmed_at = datetime.utcnow()
+                # A paid quotation is confirmed (availability, reservations) before
+                # it is marked paid; commits the payment with it
+                OrderService(self.db).pay_order(order)
                 
-                # Update product inventory
-                from app.models.product import Product, ProductVariant
-                for item in order.items:
-                    if item.variant_id:
-                        variant = self.db.query(ProductVariant).filter(ProductVariant.id == item.variant_id).first()
-                        if variant:
-                            variant.quantity_on_hand = max(0, variant.quantity_on_hand - item.quantity)
-                    
-                    product = self.db.query(Product).filter(Product.id == item.product_id).first()
-                    if product:
-                        product.quantity_on_hand = max(0, product.quantity_on_hand - item.quantity)
+                # Stock is held by the order's reservations (see InventoryLedger);
+                # rented units stay on hand, so nothing is deducted here
 
         self.db.commit()
         self.db.refresh(payment)
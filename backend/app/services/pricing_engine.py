@@ -0,0 +1,236 @@
+"""
+Pricing Engine
+Cheapest rental price for a SKU and window from precomputed per-SKU price tables
+"""
+
+import math
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import reduce
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.product import Product, ProductVariant
+from app.services.availability_engine import naive_utc
+
+# Billing periods, shortest first, and their length in hours (a month is 30 days)
+PERIODS = ("hourly", "daily", "weekly", "monthly")
+PERIOD_HOURS = {"hourly": 1, "daily": 24, "weekly": 168, "monthly": 720}
+
+# Price of one unit for a window: amount plus (period, count, rate) components
+Quote = namedtuple("Quote", ["product_id", "variant_id", "period_type", "unit_amount", "breakdown"])
+
+# One line of a batch: (product_id, variant_id, start, end, period_type)
+QuoteRequest = Tuple[int, Optional[int], datetime, datetime, str]
+
+
+def window_error(start_date: datetime, end_date: datetime) -> Optional[str]:
+    """Why a rental window cannot be quoted (None if it can)"""
+    start_date, end_date = naive_utc(start_date), naive_utc(end_date)
+    if end_date <= start_date:
+        return "end_date must be after start_date"
+    if end_date - start_date > timedelta(days=settings.MAX_RENTAL_WINDOW_DAYS):
+        return f"Rental window cannot exceed {settings.MAX_RENTAL_WINDOW_DAYS} days"
+    return None
+
+
+class PriceTable:
+    """
+    Rates of one SKU with memoized cheapest-cover arrays
+    For each billing granularity the table keeps cost[t] = cheapest exact
+    combination of period "coins" adding up to t base units, extended on
+    demand, so a quote is an O(longest period) scan of a cached array.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        # Only priced periods can be combined (a zero rate means "not offered")
+        self.rates = {period: rate for period, rate in rates.items() if rate and rate > 0}
+        self._plans: Dict[str, Tuple[int, Dict[str, int], List[float], List[Optional[str]]]] = {}
+        self._lock = threading.Lock()
+
+    def allowed_periods(self, period_type: str) -> List[str]:
+        """Priced periods no shorter than the billing granularity (all priced ones if none are)"""
+        floor = PERIOD_HOURS.get(period_type, PERIOD_HOURS["daily"])
+        allowed = [period for period in PERIODS if period in self.rates and PERIOD_HOURS[period] >= floor]
+        return allowed or [period for period in PERIODS if period in self.rates]
+
+    def _plan(self, period_type: str, units: int):
+        """(unit hours, coin sizes, cost array, choice array) covering at least `units` base units"""
+        with self._lock:
+            plan = self._plans.get(period_type)
+            if plan is None:
+                periods = self.allowed_periods(period_type)
+                unit_hours = reduce(math.gcd, [PERIOD_HOURS[period] for period in periods])
+                coins = {period: PERIOD_HOURS[period] // unit_hours for period in periods}
+                plan = self._plans[period_type] = (unit_hours, coins, [0.0], [None])
+
+            unit_hours, coins, cost, choice = plan
+            for t in range(len(cost), units + max(coins.values())):
+                best, best_period = math.inf, None
+                for period, size in coins.items():
+                    if size <= t and cost[t - size] + self.rates[period] < best:
+                        best, best_period = cost[t - size] + self.rates[period], period
+                cost.append(best)
+                choice.append(best_period)
+            return plan
+
+    def quote(self, hours: float, period_type: str) -> Tuple[float, Tuple[Tuple[str, int, float], ...]]:
+        """Cheapest (amount, breakdown) covering `hours`, billed in whole `period_type` units
+
+        As before, only whole elapsed units are billed (at least one), so a
+        36 hour daily rental is charged as one day.
+        """
+        if not self.rates:
+            return 0.0, ()
+
+        granularity = PERIOD_HOURS.get(period_type, PERIOD_HOURS["daily"])
+        billed_hours = max(1, math.floor(hours / granularity + 1e-9)) * granularity
+        unit_hours, coins, _, _ = self._plan(period_type, 1)
+        target = math.ceil(billed_hours / unit_hours)
+        _, coins, cost, choice = self._plan(period_type, target)
+
+        # Covering may overshoot by less than the longest period
+        best = min(range(target, target + max(coins.values())), key=lambda t: cost[t])
+
+        counts: Dict[str, int] = {}
+        t = best
+        while t > 0:
+            period = choice[t]
+            counts[period] = counts.get(period, 0) + 1
+            t -= coins[period]
+        breakdown = tuple(
+            (period, counts[period], self.rates[period]) for period in reversed(PERIODS) if period in counts
+        )
+        return round(cost[best], 2), breakdown
+
+    def from_daily_rate(self) -> Optional[float]:
+        """Lowest effective per-day rate of any priced period (for "from ₹X/day")"""
+        if not self.rates:
+            return None
+        return round(min(rate * 24 / PERIOD_HOURS[period] for period, rate in self.rates.items()), 2)
+
+
+class PricingEngine:
+    """
+    Quotes rentals from per-SKU price tables cached in memory
+    Variant rates override the product's per period. Tables are loaded for
+    many products in one query, dropped when a product's prices change, and
+    expire after PRICE_TABLE_TTL_SECONDS for changes made by other workers.
+    """
+
+    def __init__(self, ttl_seconds: int = 300):
+        self.ttl_seconds = ttl_seconds
+        # product_id -> (loaded_at, {variant_id or 0: PriceTable})
+        self._products: Dict[int, Tuple[float, Dict[int, PriceTable]]] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, product_id: int) -> None:
+        """Drop a product's tables after its prices change"""
+        with self._lock:
+            self._products.pop(product_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._products.clear()
+
+    def _load(self, db: Session, product_ids: Iterable[int]) -> Dict[int, Dict[int, PriceTable]]:
+        """Tables of the given products, loading missing or stale ones with one query"""
+        now = time.monotonic()
+        product_ids = set(product_ids)
+        with self._lock:
+            cached = {
+                pid: entry[1] for pid, entry in self._products.items()
+                if pid in product_ids and now - entry[0] <= self.ttl_seconds
+            }
+        missing = product_ids - cached.keys()
+        if not missing:
+            return cached
+
+        rows = db.query(
+            Product.id,
+            Product.rental_price_hourly, Product.rental_price_daily,
+            Product.rental_price_weekly, Product.rental_price_monthly,
+            ProductVariant.id.label("variant_id"),
+            ProductVariant.rental_price_hourly.label("variant_hourly"),
+            ProductVariant.rental_price_daily.label("variant_daily"),
+            ProductVariant.rental_price_weekly.label("variant_weekly"),
+            ProductVariant.rental_price_monthly.label("variant_monthly")
+        ).outerjoin(ProductVariant, ProductVariant.product_id == Product.id).filter(Product.id.in_(missing)).all()
+
+        loaded: Dict[int, Dict[int, PriceTable]] = {}
+        for row in rows:
+            base = {period: getattr(row, f"rental_price_{period}") for period in PERIODS}
+            tables = loaded.setdefault(row.id, {0: PriceTable(base)})
+            if row.variant_id is not None:
+                overrides = {period: getattr(row, f"variant_{period}") for period in PERIODS}
+                tables[row.variant_id] = PriceTable({
+                    period: overrides[period] if overrides[period] is not None else base[period]
+                    for period in PERIODS
+                })
+
+        with self._lock:
+            for pid, tables in loaded.items():
+                self._products[pid] = (now, tables)
+        return {**cached, **loaded}
+
+    def quote(
+        self,
+        db: Session,
+        product_id: int,
+        start_date: datetime,
+        end_date: datetime,
+        period_type: str = "daily",
+        variant_id: Optional[int] = None
+    ) -> Quote:
+        """Cheapest price of one unit of a SKU for a window"""
+        return self.quote_many(db, [(product_id, variant_id, start_date, end_date, period_type)])[0]
+
+    def quote_many(self, db: Session, requests: Sequence[QuoteRequest]) -> List[Quote]:
+        """
+        Quote many lines at once
+        All tables come from one query, identical (SKU, duration, period)
+        lines are priced once, and each SKU's cost array is extended a single
+        time to the longest window in the batch. Windows must be positive and
+        at most MAX_RENTAL_WINDOW_DAYS long.
+        """
+        for request in requests:
+            error = window_error(request[2], request[3])
+            if error:
+                raise ValueError(error)
+
+        tables = self._load(db, {request[0] for request in requests})
+
+        results: Dict[Tuple, Tuple[float, tuple]] = {}
+        quotes = []
+        for product_id, variant_id, start_date, end_date, period_type in requests:
+            product_tables = tables.get(product_id)
+            if product_tables is None:
+                raise ValueError(f"Product {product_id} not found")
+            table = product_tables.get(variant_id or 0)
+            if table is None:
+                raise ValueError(f"Variant {variant_id} not found for product {product_id}")
+
+            period_type = period_type if period_type in PERIOD_HOURS else "daily"
+            hours = (naive_utc(end_date) - naive_utc(start_date)).total_seconds() / 3600
+            key = (product_id, variant_id or 0, period_type, hours)
+            if key not in results:
+                results[key] = table.quote(hours, period_type)
+            amount, breakdown = results[key]
+            quotes.append(Quote(product_id, variant_id, period_type, amount, breakdown))
+        return quotes
+
+    def from_daily_rates(self, db: Session, product_ids: Iterable[int]) -> Dict[int, Optional[float]]:
+        """Lowest per-day rate over each product and its variants"""
+        rates = {}
+        for product_id, tables in self._load(db, product_ids).items():
+            candidates = [rate for rate in (table.from_daily_rate() for table in tables.values()) if rate is not None]
+            rates[product_id] = min(candidates) if candidates else None
+        return rates
+
+
+# Process-wide engine instance
+pricing_engine = PricingEngine(ttl_seconds=settings.PRICE_TABLE_TTL_SECONDS)
@@ -0,0 +1,370 @@
+"""
+Product Bulk Service
+Streaming product import (CSV / XLSX / NDJSON) and export for vendor catalogs
+"""
+
+import csv
+import io
+import json
+import os
+import zipfile
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.core.http_cache import response_cache
+from app.models.inventory import MovementType
+from app.models.product import Product, ProductVariant, Category
+from app.schemas.product import ProductCreate
+from app.services.attribute_index import index_attributes
+from app.services.facet_index import facet_index
+from app.services.inventory_ledger import InventoryLedger
+from app.services.search_index import product_search
+
+BULK_FORMATS = ("csv", "xlsx", "ndjson")
+
+# File extension -> format
+EXTENSIONS = {".csv": "csv", ".xlsx": "xlsx", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+# Flat file layout shared by import and export; JSON_COLUMNS hold JSON text in CSV/XLSX cells
+COLUMNS = (
+    "sku", "name", "description", "category_id", "brand", "color",
+    "cost_price", "sales_price",
+    "rental_price_hourly", "rental_price_daily", "rental_price_weekly", "rental_price_monthly",
+    "security_deposit", "quantity_on_hand", "is_rentable", "is_published",
+    "image_url", "gallery_images", "attributes", "variants"
+)
+JSON_COLUMNS = ("gallery_images", "attributes", "variants")
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "ndjson": "application/x-ndjson"
+}
+
+
+def detect_format(filename: Optional[str], file_format: Optional[str] = None) -> str:
+    """Resolve the upload format from an explicit value or the file extension"""
+    if file_format:
+        if file_format not in BULK_FORMATS:
+            raise ValueError(f"Unsupported format '{file_format}' (use {', '.join(BULK_FORMATS)})")
+        return file_format
+
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in EXTENSIONS:
+        raise ValueError(f"Cannot tell the format of '{filename}'; use a .csv, .xlsx or .ndjson file")
+    return EXTENSIONS[extension]
+
+
+def read_rows(stream: BinaryIO, file_format: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield (row number, record) pairs without loading the whole file
+    Records are dicts for CSV/XLSX and raw JSON lines for NDJSON; row numbers
+    count the header row, matching what a spreadsheet shows.
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+        for row_number, row in enumerate(reader, start=2):
+            yield row_number, row
+
+    elif file_format == "xlsx":
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+
+        try:
+            workbook = load_workbook(stream, read_only=True, data_only=True)
+        except (InvalidFileException, zipfile.BadZipFile, KeyError) as e:
+            raise ValueError(f"Could not read the workbook: {e}")
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(cell).strip() if cell is not None else None for cell in next(rows, ())]
+            for row_number, values in enumerate(rows, start=2):
+                if any(value is not None for value in values):
+                    yield row_number, {key: value for key, value in zip(header, values) if key}
+        finally:
+            workbook.close()
+
+    else:
+        for row_number, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8-sig"), start=1):
+            if line.strip():
+                yield row_number, line
+
+
+def _parse_record(record: Any) -> Dict[str, Any]:
+    """Turn a raw record into ProductCreate input (blank cells fall back to defaults)"""
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except ValueError:
+            raise ValueError("Invalid JSON")
+        if not isinstance(record, dict):
+            raise ValueError("Each line must be a JSON object")
+        return record
+
+    data = {}
+    for key, value in record.items():
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == "":
+            continue
+        if key in JSON_COLUMNS and isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise ValueError(f"{key}: invalid JSON")
+        data[key] = value
+    return data
+
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" if err["loc"] else err["msg"]
+        for err in error.errors()
+    ]
+
+
+class ProductBulkService:
+    """Bulk catalog import and export for one vendor"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # Import
+
+    def import_products(
+        self,
+        vendor_id: int,
+        stream: BinaryIO,
+        filename: Optional[str] = None,
+        file_format: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Create products (with variants and opening stock) from an uploaded file
+        Rows are validated with ProductCreate and written in chunks of
+        IMPORT_BATCH_SIZE, each chunk in its own transaction with executemany
+        INSERTs. Invalid rows are skipped and reported; a chunk that fails in
+        the database is rolled back and all of its rows are reported.
+        """
+        file_format = detect_format(filename, file_format)
+        batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+
+        report = {"total_rows": 0, "created": 0, "failed": 0, "errors": []}
+        seen_skus = set()
+        chunk: List[Tuple[int, ProductCreate]] = []
+
+        try:
+            for row_number, record in read_rows(stream, file_format):
+                report["total_rows"] += 1
+                sku = record.get("sku") if isinstance(record, dict) else None
+
+                try:
+                    data = ProductCreate.model_validate(_parse_record(record))
+                    sku = data.sku = (data.sku or "").strip()
+                    if not sku:
+                        raise ValueError("sku: required for bulk import")
+                    skus = {sku} | {self._variant_sku(data, variant) for variant in data.variants}
+                    if len(skus) != 1 + len(data.variants) or skus & seen_skus:
+                        raise ValueError("Duplicate SKU in file")
+                except ValidationError as e:
+                    self._fail(report, row_number, sku, _validation_messages(e))
+                    continue
+                except ValueError as e:
+                    self._fail(report, row_number, sku, [str(e)])
+                    continue
+
+                seen_skus |= skus
+                chunk.append((row_number, data))
+                if len(chunk) >= batch_size:
+                    self._write_chunk(vendor_id, chunk, report)
+                    chunk = []
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Rows read so far are still imported; the rest of the file is not
+            report["errors"].append({"row": None, "sku": None, "errors": [f"Could not read the file: {e}"]})
+
+        if chunk:
+            self._write_chunk(vendor_id, chunk, report)
+
+        return report
+
+    @staticmethod
+    def _variant_sku(data: ProductCreate, variant) -> str:
+        """Variant SKU, defaulting like ProductService.create_product"""
+        return variant.sku or f"{data.sku}-{variant.name}"
+
+    @staticmethod
+    def _fail(report: Dict[str, Any], row_number: int, sku: Optional[str], errors: List[str]) -> None:
+        report["failed"] += 1
+        report["errors"].append({"row": row_number, "sku": sku or None, "errors": errors})
+
+    def _reject_conflicts(
+        self,
+        chunk: List[Tuple[int, ProductCreate]],
+        report: Dict[str, Any]
+    ) -> List[Tuple[int, ProductCreate]]:
+        """Drop rows whose SKUs already exist or whose category is unknown (three queries per chunk)"""
+        product_skus = [data.sku for _, data in chunk]
+        variant_skus = [self._variant_sku(data, v) for _, data in chunk for v in data.variants]
+        category_ids = {data.category_id for _, data in chunk if data.category_id}
+
+        taken = {sku for sku, in self.db.query(Product.sku).filter(Product.sku.in_(product_skus))}
+        if variant_skus:
+            taken |= {sku for sku, in self.db.query(ProductVariant.sku).filter(ProductVariant.sku.in_(variant_skus))}
+        known_categories = {
+            category_id for category_id, in self.db.query(Category.id).filter(Category.id.in_(category_ids))
+        } if category_ids else set()
+
+        accepted = []
+        for row_number, data in chunk:
+            errors = []
+            clashes = ({data.sku} | {self._variant_sku(data, v) for v in data.variants}) & taken
+            if clashes:
+                errors.append(f"SKU already exists: {', '.join(sorted(clashes))}")
+            if data.category_id and data.category_id not in known_categories:
+                errors.append("category_id: category not found")
+            if errors:
+                self._fail(report, row_number, data.sku, errors)
+            else:
+                accepted.append((row_number, data))
+        return accepted
+
+    def _write_chunk(self, vendor_id: int, chunk: List[Tuple[int, ProductCreate]], report: Dict[str, Any]) -> None:
+        """Insert one chunk of validated rows and commit it"""
+        chunk = self._reject_conflicts(chunk, report)
+        if not chunk:
+            return
+
+        skus = [data.sku for _, data in chunk]
+        try:
+            # Stock starts at zero and enters through the ledger below
+            self.db.execute(insert(Product), [
+                {
+                    **data.model_dump(exclude={"variants", "quantity_on_hand"}),
+                    "vendor_id": vendor_id,
+                    "quantity_on_hand": 0,
+                    "quantity_reserved": 0
+                }
+                for _, data in chunk
+            ])
+            products = self.db.query(
+                Product.id, Product.sku, Product.name, Product.description, Product.brand, Product.color,
+                Product.category_id, Product.rental_price_daily, Product.is_published, Product.is_rentable
+            ).filter(Product.vendor_id == vendor_id, Product.sku.in_(skus)).all()
+            product_ids = {product.sku: product.id for product in products}
+
+            receipts = [{
+                "product_id": product_ids[data.sku],
+                "movement_type": MovementType.RECEIPT,
+                "on_hand_delta": data.quantity_on_hand,
+                "reference_type": "product",
+                "reference_id": product_ids[data.sku]
+            } for _, data in chunk]
+            attributes = [(product_ids[data.sku], None, data.attributes) for _, data in chunk]
+
+            variants = [
+                (data, variant, self._variant_sku(data, variant))
+                for _, data in chunk for variant in data.variants
+            ]
+            if variants:
+                self.db.execute(insert(ProductVariant), [
+                    {
+                        **variant.model_dump(exclude={"quantity_on_hand"}),
+                        "product_id": product_ids[data.sku],
+                        "sku": variant_sku,
+                        "quantity_on_hand": 0,
+                        "quantity_reserved": 0
+                    }
+                    for data, variant, variant_sku in variants
+                ])
+                variant_ids = dict(self.db.query(ProductVariant.sku, ProductVariant.id).filter(
+                    ProductVariant.sku.in_([variant_sku for _, _, variant_sku in variants])
+                ).all())
+                receipts.extend({
+                    "product_id": product_ids[data.sku],
+                    "variant_id": variant_ids[variant_sku],
+                    "movement_type": MovementType.RECEIPT,
+                    "on_hand_delta": variant.quantity_on_hand,
+                    "reference_type": "product",
+                    "reference_id": product_ids[data.sku]
+                } for data, variant, variant_sku in variants)
+                attributes.extend(
+                    (product_ids[data.sku], variant_ids[variant_sku], variant.attributes)
+                    for data, variant, variant_sku in variants
+                )
+
+            InventoryLedger(self.db).record_many(receipts)
+            index_attributes(self.db, attributes)
+            product_search.index_products(self.db, products)
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            message = f"Database error: {getattr(e, 'orig', None) or e}"
+            for row_number, data in chunk:
+                self._fail(report, row_number, data.sku, [message])
+            return
+
+        for product in products:
+            facet_index.upsert(product)
+        response_cache.invalidate("catalog")
+        report["created"] += len(chunk)
+
+    # Export
+
+    def export_rows(self, vendor_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Products in the import layout, oldest first (all vendors when vendor_id is None)"""
+        query = self.db.query(Product).options(selectinload(Product.variants)).order_by(Product.id)
+        if vendor_id:
+            query = query.filter(Product.vendor_id == vendor_id)
+
+        for product in query.yield_per(1000):
+            row = {column: getattr(product, column) for column in COLUMNS if column != "variants"}
+            row["variants"] = [
+                {
+                    "name": variant.name,
+                    "sku": variant.sku,
+                    "attributes": variant.attributes or {},
+                    "rental_price_hourly": variant.rental_price_hourly,
+                    "rental_price_daily": variant.rental_price_daily,
+                    "rental_price_weekly": variant.rental_price_weekly,
+                    "rental_price_monthly": variant.rental_price_monthly,
+                    "quantity_on_hand": variant.quantity_on_hand
+                }
+                for variant in product.variants
+            ]
+            yield row
+
+    def export_products(self, file_format: str, vendor_id: Optional[int] = None) -> bytes:
+        """Serialize the catalog as CSV, XLSX or NDJSON (re-importable as is)"""
+        detect_format(None, file_format)
+        rows = self.export_rows(vendor_id)
+
+        def cell(column: str, value: Any) -> Any:
+            if column in JSON_COLUMNS:
+                return json.dumps(value or ([] if column != "attributes" else {}))
+            return value
+
+        if file_format == "ndjson":
+            return "".join(json.dumps(row, default=str) + "\n" for row in rows).encode("utf-8")
+
+        if file_format == "csv":
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow(COLUMNS)
+            for row in rows:
+                writer.writerow([cell(column, row[column]) for column in COLUMNS])
+            return output.getvalue().encode("utf-8")
+
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Products")
+        sheet.append(list(COLUMNS))
+        for row in rows:
+            sheet.append([cell(column, row[column]) for column in COLUMNS])
+        output = io.BytesIO()
+        workbook.save(output)
+        return output.getvalue()
@@ -3,19 +3,37 @@ Product Service
 Handles product CRUD and availability checking
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, or_, case, func
 
-from app.models.product import Product, ProductVariant, Category, ProductAttribute
+from app.models.product import Product, ProductVariant, Category, CategoryClosure, ProductAttribute
 from app.models.reservation import Reservation, ReservationStatus
-from app.schemas.product import ProductCreate, ProductUpdate, ProductAvailabilityCheck
+from app.schemas.product import ProductCreate, ProductUpdate, ProductAvailabilityCheck, CategoryUpdate, PriceQuoteItem
+from app.services.availability_index import availability_index, ReservationSpan
+from app.services.availability_engine import naive_utc, fetch_spans, peak_reserved, peak_reserved_bulk, bucketed_peaks, OccupancyProfile
+from app.services.occupancy_cache import occupancy_cache
+from app.services.availability_cache import availability_cache
+from app.services.search_index import product_search
+from app.core.pagination import paginate
+from app.services.loading_profiles import with_profile
+from app.services.facet_index import facet_index
+from app.services.category_tree import category_tree, rebuild_closure
+from app.services.attribute_index import attribute_criteria, index_product_attributes, remove_product_attributes
+from app.core.http_cache import response_cache
+from app.services.pricing_engine import pricing_engine
+from app.services.inventory_ledger import InventoryLedger
+from app.models.inventory import MovementType
 
 
 class ProductService:
     """Product management service"""
     
+    # Calendar bucket sizes and the largest range served in one response
+    CALENDAR_STEPS = {"day": timedelta(days=1), "hour": timedelta(hours=1)}
+    MAX_CALENDAR_BUCKETS = 24 * 366
+    
     def __init__(self, db: Session):
         self.db = db
     
@@ -23,6 +41,9 @@ class ProductService:
     
     def create_category(self, name: str, description: str = None, parent_id: int = None, image_url: str = None) -> Category:
         """Create a new category"""
+        if parent_id and not self.get_category(parent_id):
+            raise ValueError("Parent category not found")
+        
         category = Category(
             name=name,
             description=description,
@@ -30,10 +51,51 @@ class ProductService:
             image_url=image_url
         )
         self.db.add(category)
+        self.db.flush()
+        rebuild_closure(self.db)
         self.db.commit()
         self.db.refresh(category)
+        category_tree.invalidate()
+        response_cache.invalidate("categories")
         return category
     
+    def update_category(self, category_id: int, data: CategoryUpdate) -> Optional[Category]:
+        """Rename or move a category; moving it below its own subtree is rejected"""
+        category = self.get_category(category_id)
+        
+        if not category:
+            return None
+        
+        update_data = data.model_dump(exclude_unset=True)
+        
+        if "parent_id" in update_data:
+            parent_id = update_data.pop("parent_id") or None
+            if parent_id is not None:
+                if not self.get_category(parent_id):
+                    raise ValueError("Parent category not found")
+                in_subtree = self.db.query(CategoryClosure).filter(
+                    CategoryClosure.ancestor_id == category_id,
+                    CategoryClosure.descendant_id == parent_id
+                ).first()
+                if in_subtree:
+                    raise ValueError("A category cannot be moved below itself")
+            category.parent_id = parent_id
+        
+        for field, value in update_data.items():
+            setattr(category, field, value)
+        
+        self.db.flush()
+        rebuild_closure(self.db)
+        self.db.commit()
+        self.db.refresh(category)
+        category_tree.invalidate()
+        response_cache.invalidate("categories")
+        return category
+    
+    def get_category_tree(self, root_id: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """Nested category hierarchy from the in-process tree cache"""
+        return category_tree.get_tree(self.db, root_id)
+    
     def get_categories(self) -> List[Category]:
         """Get all categories"""
         return self.db.query(Category).all()
@@ -50,6 +112,7 @@ class ProductService:
         self.db.add(attribute)
         self.db.commit()
         self.db.refresh(attribute)
+        response_cache.invalidate("attributes")
         return attribute
     
     def get_attributes(self) -> List[ProductAttribute]:
@@ -63,6 +126,7 @@ class ProductService:
             attribute.values = values
             self.db.commit()
             self.db.refresh(attribute)
+            response_cache.invalidate("attributes")
         return attribute
     
     # Product Methods
@@ -87,7 +151,8 @@ class ProductService:
             rental_price_weekly=data.rental_price_weekly,
             rental_price_monthly=data.rental_price_monthly,
             security_deposit=data.security_deposit,
-            quantity_on_hand=data.quantity_on_hand,
+            quantity_on_hand=0,
+            quantity_reserved=0,
             category_id=data.category_id,
             brand=data.brand,
             color=data.color,
@@ -97,7 +162,16 @@ class ProductService:
         )
         
         self.db.add(product)
-        self.db.commit()
+        self.db.flush()
+        
+        # Stock enters through the ledger
+        receipts = [{
+            "product_id": product.id,
+            "movement_type": MovementType.RECEIPT,
+            "on_hand_delta": data.quantity_on_hand,
+            "reference_type": "product",
+            "reference_id": product.id
+        }]
         
         # Create variants
         for variant_data in data.variants:
@@ -110,12 +184,27 @@ class ProductService:
                 rental_price_daily=variant_data.rental_price_daily,
                 rental_price_weekly=variant_data.rental_price_weekly,
                 rental_price_monthly=variant_data.rental_price_monthly,
-                quantity_on_hand=variant_data.quantity_on_hand
+                quantity_on_hand=0,
+                quantity_reserved=0
             )
             self.db.add(variant)
+            self.db.flush()
+            receipts.append({
+                "product_id": product.id,
+                "variant_id": variant.id,
+                "movement_type": MovementType.RECEIPT,
+                "on_hand_delta": variant_data.quantity_on_hand,
+                "reference_type": "product",
+                "reference_id": product.id
+            })
         
+        InventoryLedger(self.db).record_many(receipts)
+        product_search.index_product(self.db, product)
+        index_product_attributes(self.db, product)
         self.db.commit()
         self.db.refresh(product)
+        facet_index.upsert(product)
+        response_cache.invalidate_product(product.id)
         
         return product
     
@@ -127,24 +216,160 @@ class ProductService:
         self,
         vendor_id: Optional[int] = None,
         category_id: Optional[int] = None,
+        include_subcategories: bool = True,
+        is_published: Optional[bool] = None,
+        is_rentable: Optional[bool] = None,
+        search: Optional[str] = None,
+        brand: Optional[str] = None,
+        color: Optional[str] = None,
+        attributes: Optional[Dict[str, List[str]]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_from: Optional[datetime] = None,
+        available_to: Optional[datetime] = None,
+        min_quantity: int = 1,
+        page: int = 1,
+        per_page: int = 20,
+        cursor: Optional[str] = None,
+        count: str = "exact"
+    ) -> Dict[str, Any]:
+        """
+        Get products with filters and pagination
+        With available_from/available_to only products that can supply
+        min_quantity units for the whole window are returned. Search results
+        are ranked by relevance in page mode and by recency with a cursor.
+        A category filter covers its whole subtree via the closure table
+        unless include_subcategories is False. attributes ({name: [values]})
+        is matched case-insensitively through the attribute index against
+        the product's and its variants' attributes.
+        """
+        query, relevance = self._filtered_products(
+            vendor_id=vendor_id,
+            category_id=category_id,
+            include_subcategories=include_subcategories,
+            is_published=is_published,
+            is_rentable=is_rentable,
+            search=search,
+            brand=brand,
+            color=color,
+            attributes=attributes,
+            min_price=min_price,
+            max_price=max_price,
+            available_from=available_from,
+            available_to=available_to,
+            min_quantity=min_quantity
+        )
+        return paginate(
+            with_profile(query, "product_list"), Product, page, per_page,
+            cursor=cursor, count=count, ordering=self._relevance_ordering(relevance)
+        )
+    
+    def get_product_cards(
+        self,
+        vendor_id: Optional[int] = None,
+        category_id: Optional[int] = None,
+        include_subcategories: bool = True,
         is_published: Optional[bool] = None,
         is_rentable: Optional[bool] = None,
         search: Optional[str] = None,
         brand: Optional[str] = None,
         color: Optional[str] = None,
+        attributes: Optional[Dict[str, List[str]]] = None,
         min_price: Optional[float] = None,
         max_price: Optional[float] = None,
+        available_from: Optional[datetime] = None,
+        available_to: Optional[datetime] = None,
+        min_quantity: int = 1,
         page: int = 1,
-        per_page: int = 20
+        per_page: int = 20,
+        cursor: Optional[str] = None,
+        count: str = "exact"
     ) -> Dict[str, Any]:
-        """Get products with filters and pagination"""
+        """
+        Listing-grid rows for the same filters as get_products
+        Selects only the card columns (plus the category name) as plain rows,
+        so no Product objects, JSON columns or variants are loaded.
+        """
+        query, relevance = self._filtered_products(
+            vendor_id=vendor_id,
+            category_id=category_id,
+            include_subcategories=include_subcategories,
+            is_published=is_published,
+            is_rentable=is_rentable,
+            search=search,
+            brand=brand,
+            color=color,
+            attributes=attributes,
+            min_price=min_price,
+            max_price=max_price,
+            available_from=available_from,
+            available_to=available_to,
+            min_quantity=min_quantity
+        )
+        available = func.coalesce(Product.quantity_on_hand, 0) - func.coalesce(Product.quantity_reserved, 0)
+        query = query.outerjoin(Category, Category.id == Product.category_id).with_entities(
+            Product.id,
+            Product.name,
+            Product.sku,
+            Product.image_url,
+            Product.brand,
+            Product.color,
+            Product.category_id,
+            Category.name.label("category_name"),
+            Product.rental_price_hourly,
+            Product.rental_price_daily,
+            case((available > 0, available), else_=0).label("available_quantity"),
+            Product.vendor_id,
+            Product.created_at
+        )
+        result = paginate(
+            query, Product, page, per_page,
+            cursor=cursor, count=count, ordering=self._relevance_ordering(relevance)
+        )
+        
+        # "From ₹X/day" comes from the cached price tables, variants included
+        from_prices = pricing_engine.from_daily_rates(self.db, [row.id for row in result["items"]])
+        result["items"] = [
+            {**row._mapping, "from_price_daily": from_prices.get(row.id)} for row in result["items"]
+        ]
+        return result
+    
+    @staticmethod
+    def _relevance_ordering(relevance) -> Optional[list]:
+        """Page-mode ordering for ranked search results"""
+        return None if relevance is None else [relevance, Product.created_at.desc(), Product.id.desc()]
+    
+    def _filtered_products(
+        self,
+        vendor_id: Optional[int] = None,
+        category_id: Optional[int] = None,
+        include_subcategories: bool = True,
+        is_published: Optional[bool] = None,
+        is_rentable: Optional[bool] = None,
+        search: Optional[str] = None,
+        brand: Optional[str] = None,
+        color: Optional[str] = None,
+        attributes: Optional[Dict[str, List[str]]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        available_from: Optional[datetime] = None,
+        available_to: Optional[datetime] = None,
+        min_quantity: int = 1
+    ):
+        """Product query with the list filters applied, and its search relevance ordering (or None)"""
         query = self.db.query(Product)
         
         if vendor_id:
             query = query.filter(Product.vendor_id == vendor_id)
         
         if category_id:
-            query = query.filter(Product.category_id == category_id)
+            if include_subcategories:
+                subtree = self.db.query(CategoryClosure.descendant_id).filter(
+                    CategoryClosure.ancestor_id == category_id
+                )
+                query = query.filter(Product.category_id.in_(subtree))
+            else:
+                query = query.filter(Product.category_id == category_id)
         
         if is_published is not None:
             query = query.filter(Product.is_published == is_published)
@@ -152,15 +377,9 @@ class ProductService:
         if is_rentable is not None:
             query = query.filter(Product.is_rentable == is_rentable)
         
+        relevance = None
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Product.name.ilike(search_term),
-                    Product.description.ilike(search_term),
-                    Product.sku.ilike(search_term)
-                )
-            )
+            query, relevance = product_search.apply(self.db, query, search)
         
         if brand:
             query = query.filter(Product.brand == brand)
@@ -168,21 +387,74 @@ class ProductService:
         if color:
             query = query.filter(Product.color == color)
         
+        if attributes:
+            query = query.filter(*attribute_criteria(attributes))
+        
         if min_price is not None:
             query = query.filter(Product.rental_price_daily >= min_price)
         
         if max_price is not None:
             query = query.filter(Product.rental_price_daily <= max_price)
         
-        total = query.count()
-        products = query.order_by(Product.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
+        if available_from or available_to:
+            if not (available_from and available_to):
+                raise ValueError("Both available_from and available_to are required")
+            available_from, available_to = naive_utc(available_from), naive_utc(available_to)
+            if available_from >= available_to:
+                raise ValueError("available_from must be before available_to")
+            
+            query = query.filter(Product.quantity_on_hand >= min_quantity)
+            query = query.filter(~self._short_over_window(available_from, available_to, min_quantity))
+        
+        return query, relevance
+    
+    def get_facets(
+        self,
+        category_id: Optional[int] = None,
+        brand: Optional[str] = None,
+        color: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        search: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Storefront facet counts (brand, color, category, price bucket) for a filter
+        Served from the in-memory facet index; only a search term costs a query.
+        """
+        facet_index.ensure_fresh(self.db)
+        
+        restrict_to = None
+        if search:
+            matches, _ = product_search.apply(self.db, self.db.query(Product.id), search)
+            restrict_to = [row.id for row in matches.all()]
+        
+        counts = facet_index.counts(
+            category_ids=category_tree.descendant_ids(self.db, category_id) if category_id else None,
+            brand=brand,
+            color=color,
+            min_price=min_price,
+            max_price=max_price,
+            restrict_to=restrict_to
+        )
+        
+        category_names = dict(
+            self.db.query(Category.id, Category.name).filter(
+                Category.id.in_([value for value, _ in counts["category"]])
+            ).all()
+        ) if counts["category"] else {}
         
         return {
-            "items": products,
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "pages": (total + per_page - 1) // per_page
+            "total": counts["total"],
+            "brands": [{"value": value, "count": count} for value, count in counts["brand"]],
+            "colors": [{"value": value, "count": count} for value, count in counts["color"]],
+            "categories": [
+                {"value": value, "label": category_names.get(value), "count": count}
+                for value, count in counts["category"]
+            ],
+            "price_ranges": [
+                {**facet_index.bucket_range(bucket), "count": count}
+                for bucket, count in counts["price"]
+            ]
         }
     
     def update_product(self, product_id: int, data: ProductUpdate) -> Optional[Product]:
@@ -193,13 +465,33 @@ class ProductService:
             return None
         
         update_data = data.dict(exclude_unset=True)
+        
+        # On-hand stock changes are booked as ledger adjustments
+        new_on_hand = update_data.pop("quantity_on_hand", None)
+        if new_on_hand is not None and new_on_hand != product.quantity_on_hand:
+            InventoryLedger(self.db).record(
+                product.id,
+                MovementType.ADJUSTMENT,
+                on_hand_delta=new_on_hand - (product.quantity_on_hand or 0),
+                reference_type="product",
+                reference_id=product.id
+            )
+        
         for key, value in update_data.items():
             if value is not None:
                 setattr(product, key, value)
         
         product.updated_at = datetime.utcnow()
+        product_search.index_product(self.db, product)
+        if "attributes" in update_data:
+            index_product_attributes(self.db, product)
         self.db.commit()
+        occupancy_cache.invalidate(product_id)
+        availability_cache.invalidate(product_id)
+        pricing_engine.invalidate(product_id)
         self.db.refresh(product)
+        facet_index.upsert(product)
+        response_cache.invalidate_product(product.id)
         
         return product
     
@@ -210,11 +502,47 @@ class ProductService:
         if not product:
             return False
         
+        remove_product_attributes(self.db, product_id)
         self.db.delete(product)
+        product_search.remove_product(self.db, product_id)
         self.db.commit()
+        occupancy_cache.invalidate(product_id)
+        availability_cache.invalidate(product_id)
+        facet_index.remove(product_id)
+        pricing_engine.invalidate(product_id)
+        response_cache.invalidate_product(product_id)
         
         return True
     
+    def get_stock(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """Get stock balances of a product and its variants (read-only)"""
+        product = self.get_product(product_id)
+        if not product:
+            return None
+        
+        stock = InventoryLedger(self.db).get_stock(product_id)
+        if stock is not None:
+            return stock
+        
+        # No ledger yet (never held stock): the counters are what it would open with
+        def row(sku) -> Dict[str, Any]:
+            on_hand, reserved = sku.quantity_on_hand or 0, sku.quantity_reserved or 0
+            return {
+                "quantity_on_hand": on_hand,
+                "quantity_reserved": reserved,
+                "available_quantity": max(0, on_hand - reserved),
+                "updated_at": None
+            }
+        
+        return {
+            "product_id": product_id,
+            **row(product),
+            "variants": [
+                {"variant_id": variant.id, **row(variant)}
+                for variant in product.variants
+            ]
+        }
+    
     def toggle_publish(self, product_id: int) -> Optional[Product]:
         """Toggle product publish status"""
         product = self.get_product(product_id)
@@ -225,32 +553,63 @@ class ProductService:
         product.is_published = not product.is_published
         self.db.commit()
         self.db.refresh(product)
+        facet_index.upsert(product)
+        response_cache.invalidate_product(product.id)
         
         return product
     
     # Availability Methods
     
-    def check_availability(
+    def _short_over_window(
         self,
-        product_id: int,
         start_date: datetime,
         end_date: datetime,
-        quantity: int = 1,
-        variant_id: Optional[int] = None
-    ) -> Dict[str, Any]:
+        min_quantity: int
+    ):
         """
-        Check if product is available for the given date range and quantity
-        Prevents double-booking by checking existing reservations
+        SQL predicate: the product cannot supply min_quantity over the window
+        The reserved level only rises at a reservation start, so its peak over
+        the window is the load at the window start or at a reservation start
+        inside it. A correlated EXISTS sums the load at each of those points
+        through the covering reservations index, so the filter stays in the
+        database whatever the catalog size.
         """
+        point_reservation = aliased(Reservation)
+        covering = aliased(Reservation)
+        point = case(
+            (point_reservation.start_date > start_date, point_reservation.start_date),
+            else_=start_date
+        )
+        
+        return self.db.query(point_reservation.id).join(
+            covering,
+            and_(
+                covering.product_id == point_reservation.product_id,
+                covering.status == ReservationStatus.ACTIVE,
+                covering.start_date <= point,
+                covering.end_date > point
+            )
+        ).filter(
+            point_reservation.product_id == Product.id,
+            point_reservation.status == ReservationStatus.ACTIVE,
+            point_reservation.start_date < end_date,
+            point_reservation.end_date > start_date
+        ).group_by(point_reservation.id).having(
+            func.sum(covering.quantity) > func.coalesce(Product.quantity_on_hand, 0) - min_quantity
+        ).exists()
+    
+    def _available_quantity(
+        self,
+        product_id: int,
+        start_date: datetime,
+        end_date: datetime,
+        variant_id: Optional[int] = None
+    ) -> Optional[int]:
+        """Stock minus the peak reserved quantity over the window (None if the product is missing)"""
         product = self.get_product(product_id)
         
         if not product:
-            return {
-                "is_available": False,
-                "available_quantity": 0,
-                "requested_quantity": quantity,
-                "message": "Product not found"
-            }
+            return None
         
         # Get total quantity
         if variant_id:
@@ -259,21 +618,52 @@ class ProductService:
         else:
             total_quantity = product.quantity_on_hand
         
-        # Find overlapping reservations
-        overlapping_reservations = self.db.query(Reservation).filter(
-            Reservation.product_id == product_id,
-            Reservation.status == ReservationStatus.ACTIVE,
-            Reservation.start_date < end_date,
-            Reservation.end_date > start_date
-        )
-        
-        if variant_id:
-            overlapping_reservations = overlapping_reservations.filter(
-                Reservation.variant_id == variant_id
+        # Peak reserved quantity over the window (index when current, else sweep)
+        if availability_index.is_trusted:
+            availability_index.sync(self.db, [product_id])
+            reserved_quantity = availability_index.peak_reserved(
+                product_id, start_date, end_date, variant_id or None
             )
+        else:
+            spans = fetch_spans(self.db, product_id, start_date, end_date, variant_id)
+            reserved_quantity = peak_reserved(spans, start_date, end_date)
         
-        reserved_quantity = sum(r.quantity for r in overlapping_reservations.all())
-        available_quantity = total_quantity - reserved_quantity
+        return total_quantity - reserved_quantity
+    
+    def check_availability(
+        self,
+        product_id: int,
+        start_date: datetime,
+        end_date: datetime,
+        quantity: int = 1,
+        variant_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Check if product is available for the given date range and quantity
+        Prevents double-booking by checking existing reservations
+        """
+        # Read the generation before computing so a concurrent change is never masked
+        cache_key = None
+        available_quantity = None
+        if availability_cache.enabled:
+            cache_key = availability_cache.key(
+                product_id, availability_cache.generation(product_id), start_date, end_date, variant_id
+            )
+            available_quantity = availability_cache.get(cache_key)
+        
+        if available_quantity is None:
+            available_quantity = self._available_quantity(product_id, start_date, end_date, variant_id)
+            
+            if available_quantity is None:
+                return {
+                    "is_available": False,
+                    "available_quantity": 0,
+                    "requested_quantity": quantity,
+                    "message": "Product not found"
+                }
+            
+            if cache_key:
+                availability_cache.set(cache_key, available_quantity)
         
         is_available = available_quantity >= quantity
         
@@ -288,6 +678,156 @@ class ProductService:
             "conflicts": [] if is_available else [{"message": f"Only {available_quantity} available"}]
         }
     
+    def quote_prices(self, items: List[PriceQuoteItem]) -> Dict[str, Any]:
+        """Cheapest price of every cart line (variant rates and period combinations applied)"""
+        quotes = pricing_engine.quote_many(self.db, [
+            (item.product_id, item.variant_id, item.start_date, item.end_date, item.rental_period_type)
+            for item in items
+        ])
+        lines = [
+            {
+                "product_id": item.product_id,
+                "variant_id": item.variant_id,
+                "rental_period_type": quote.period_type,
+                "quantity": item.quantity,
+                "unit_price": quote.unit_amount,
+                "line_subtotal": round(quote.unit_amount * item.quantity, 2),
+                "breakdown": [
+                    {"period": period, "count": count, "rate": rate}
+                    for period, count, rate in quote.breakdown
+                ]
+            }
+            for item, quote in zip(items, quotes)
+        ]
+        return {"subtotal": round(sum(line["line_subtotal"] for line in lines), 2), "items": lines}
+    
+    def check_availability_bulk(
+        self,
+        items: List[ProductAvailabilityCheck],
+        for_update: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Check availability for many cart lines at once
+        Resolves products, variants and overlapping reservations with a
+        constant number of queries regardless of cart size. Lines for the same
+        product count against each other where their windows overlap, so a
+        cart cannot pass line by line while exceeding stock in total. With
+        for_update the in-memory index is bypassed and reservations are read
+        with a locking read, so the result reflects the latest committed bookings.
+        """
+        if not items:
+            return []
+        
+        product_ids = {item.product_id for item in items}
+        variant_ids = {item.variant_id for item in items if item.variant_id}
+        
+        products = {
+            p.id: p for p in self.db.query(Product).filter(Product.id.in_(product_ids)).all()
+        }
+        variants = {}
+        if variant_ids:
+            variants = {
+                v.id: v for v in self.db.query(ProductVariant).filter(ProductVariant.id.in_(variant_ids)).all()
+            }
+        
+        use_index = availability_index.is_trusted and not for_update
+        
+        # Products with several lines are checked against their reservations
+        # plus the cart's own lines, which needs the spans rather than the index
+        line_counts = {}
+        for item in items:
+            line_counts[item.product_id] = line_counts.get(item.product_id, 0) + 1
+        shared = {product_id for product_id, count in line_counts.items() if count > 1}
+        from_db = shared if use_index else set(products)
+        if use_index:
+            availability_index.sync(self.db, set(products) - from_db)
+        
+        # One reservation query covering every line the index does not answer
+        profiles = {}
+        db_items = [item for item in items if item.product_id in from_db and item.product_id in products]
+        if db_items:
+            window_start = min(item.start_date for item in db_items)
+            window_end = max(item.end_date for item in db_items)
+            rows = self.db.query(
+                Reservation.product_id,
+                Reservation.variant_id,
+                Reservation.start_date,
+                Reservation.end_date,
+                Reservation.quantity
+            ).filter(
+                Reservation.product_id.in_({item.product_id for item in db_items}),
+                Reservation.status == ReservationStatus.ACTIVE,
+                Reservation.start_date < window_end,
+                Reservation.end_date > window_start
+            )
+            if for_update:
+                rows = rows.with_for_update(read=True)
+            rows = rows.all()
+            
+            spans = [ReservationSpan(*row) for row in rows]
+            spans.extend(
+                ReservationSpan(
+                    item.product_id, item.variant_id or None,
+                    naive_utc(item.start_date), naive_utc(item.end_date), item.quantity
+                )
+                for item in db_items if item.product_id in shared
+            )
+            
+            spans_by_key = {}
+            for span in spans:
+                spans_by_key.setdefault((span.product_id, None), []).append(span)
+                if span.variant_id:
+                    spans_by_key.setdefault((span.product_id, span.variant_id), []).append(span)
+            profiles = {key: OccupancyProfile(key_spans) for key, key_spans in spans_by_key.items()}
+        
+        results = []
+        for item in items:
+            product = products.get(item.product_id)
+            variant_id = item.variant_id or None
+            variant = variants.get(variant_id) if variant_id else None
+            
+            if not product or (variant_id and (not variant or variant.product_id != product.id)):
+                results.append({
+                    "product_id": item.product_id,
+                    "variant_id": item.variant_id,
+                    "is_available": False,
+                    "available_quantity": 0,
+                    "requested_quantity": item.quantity,
+                    "start_date": item.start_date,
+                    "end_date": item.end_date,
+                    "conflicts": [{"message": "Product not found" if not product else "Variant not found"}]
+                })
+                continue
+            
+            total_quantity = variant.quantity_on_hand if variant else product.quantity_on_hand
+            
+            if item.product_id in from_db:
+                profile = profiles.get((item.product_id, variant_id))
+                reserved_quantity = profile.peak(item.start_date, item.end_date) if profile else 0
+                if item.product_id in shared and item.start_date < item.end_date:
+                    # The line itself covers its whole window, so this leaves the other lines' demand
+                    reserved_quantity -= item.quantity
+            else:
+                reserved_quantity = availability_index.peak_reserved(
+                    item.product_id, item.start_date, item.end_date, variant_id
+                )
+            
+            available_quantity = total_quantity - reserved_quantity
+            is_available = available_quantity >= item.quantity
+            
+            results.append({
+                "product_id": item.product_id,
+                "variant_id": item.variant_id,
+                "is_available": is_available,
+                "available_quantity": available_quantity,
+                "requested_quantity": item.quantity,
+                "start_date": item.start_date,
+                "end_date": item.end_date,
+                "conflicts": [] if is_available else [{"message": f"Only {available_quantity} available"}]
+            })
+        
+        return results
+    
     def get_availability_calendar(
         self,
         product_id: int,
@@ -300,21 +840,93 @@ class ProductService:
         if not product:
             return []
         
-        # Get all reservations in date range
-        reservations = self.db.query(Reservation).filter(
+        # Get active reservations in date range (narrow columns + order reference)
+        reservations = self.db.query(
+            Reservation.product_id,
+            Reservation.variant_id,
+            Reservation.start_date,
+            Reservation.end_date,
+            Reservation.quantity,
+            Reservation.order_id
+        ).filter(
             Reservation.product_id == product_id,
             Reservation.status == ReservationStatus.ACTIVE,
             Reservation.start_date < end_date,
             Reservation.end_date > start_date
-        ).all()
+        ).order_by(Reservation.start_date).all()
+        
+        # Peak concurrent usage during each reservation, computed in one sweep
+        spans = [ReservationSpan(*row[:5]) for row in reservations]
+        windows = [
+            (max(row.start_date, start_date), min(row.end_date, end_date))
+            for row in reservations
+        ]
+        peaks = peak_reserved_bulk(spans, windows)
         
         calendar_data = []
-        for reservation in reservations:
+        for reservation, peak in zip(reservations, peaks):
             calendar_data.append({
                 "start_date": reservation.start_date.isoformat(),
                 "end_date": reservation.end_date.isoformat(),
                 "quantity_reserved": reservation.quantity,
-                "order_id": reservation.order_id
+                "order_id": reservation.order_id,
+                "peak_reserved": peak,
+                "available_quantity": max(0, product.quantity_on_hand - peak)
             })
         
         return calendar_data
+    
+    def get_availability_buckets(
+        self,
+        product_id: int,
+        start_date: datetime,
+        end_date: datetime,
+        granularity: str = "day",
+        variant_id: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get per-day or per-hour reserved/available quantity arrays
+        Results are served from the per-product occupancy cache when possible
+        """
+        step = self.CALENDAR_STEPS.get(granularity)
+        if step is None:
+            raise ValueError("Granularity must be 'day' or 'hour'")
+        
+        if end_date <= start_date:
+            raise ValueError("End date must be after start date")
+        
+        if (end_date - start_date) / step > self.MAX_CALENDAR_BUCKETS:
+            raise ValueError(f"Date range too large (max {self.MAX_CALENDAR_BUCKETS} buckets)")
+        
+        cache_key = (variant_id, granularity, start_date, end_date)
+        cached = occupancy_cache.get(product_id, cache_key)
+        if cached is not None:
+            return cached
+        
+        product = self.get_product(product_id)
+        if not product:
+            return None
+        
+        if variant_id:
+            variant = self.db.query(ProductVariant).filter(ProductVariant.id == variant_id).first()
+            total_quantity = variant.quantity_on_hand if variant else 0
+        else:
+            total_quantity = product.quantity_on_hand
+        
+        spans = fetch_spans(self.db, product_id, start_date, end_date, variant_id)
+        reserved = bucketed_peaks(spans, start_date, end_date, step)
+        
+        result = {
+            "product_id": product_id,
+            "variant_id": variant_id,
+            "granularity": granularity,
+            "start_date": start_date,
+            "end_date": end_date,
+            "total_quantity": total_quantity,
+            "buckets": [(start_date + step * i).isoformat() for i in range(len(reserved))],
+            "reserved": reserved,
+            "available": [max(0, total_quantity - r) for r in reserved]
+        }
+        
+        occupancy_cache.set(product_id, cache_key, result)
+        return result
@@ -0,0 +1,206 @@
+"""
+Reservation Sweeper
+Background expiry of stale reservation holds and abandoned carts
+"""
+
+import argparse
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.order import Order, OrderStatus
+from app.models.inventory import MovementType
+from app.models.reservation import ReservationStatus
+from app.services.order_lifecycle import OrderEvent, order_state_machine
+
+logger = logging.getLogger(__name__)
+
+
+class SweeperMetrics:
+    """Process-wide counters describing what the sweeper has done"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.holds_expired = 0
+        self.reservations_expired = 0
+        self.carts_expired = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_run_duration_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def record_run(self, result: Dict[str, int], started_at: datetime, duration_ms: float) -> None:
+        """Add the outcome of one sweep"""
+        with self._lock:
+            self.runs += 1
+            self.holds_expired += result["holds_expired"]
+            self.reservations_expired += result["reservations_expired"]
+            self.carts_expired += result["carts_expired"]
+            self.last_run_at = started_at
+            self.last_run_duration_ms = duration_ms
+            self.last_error = None
+
+    def record_error(self, error: Exception) -> None:
+        """Remember the last failure"""
+        with self._lock:
+            self.last_error = repr(error)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a copy of the counters"""
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "holds_expired": self.holds_expired,
+                "reservations_expired": self.reservations_expired,
+                "carts_expired": self.carts_expired,
+                "last_run_at": self.last_run_at,
+                "last_run_duration_ms": self.last_run_duration_ms,
+                "last_error": self.last_error
+            }
+
+
+sweeper_metrics = SweeperMetrics()
+
+
+class ReservationSweeper:
+    """
+    Expires stale holds and abandoned carts in batches
+    A hold is an unpaid sale order whose rental start passed more than
+    RESERVATION_HOLD_TTL_HOURS ago without pickup: the order is cancelled and
+    its active reservations become EXPIRED. A cart is a quotation untouched
+    for CART_TTL_HOURS and is cancelled. Each batch is locked with SKIP
+    LOCKED, so rows busy elsewhere wait for the next sweep, and goes through
+    the order state machine's CANCEL event in one transaction: stock,
+    availability index and cart store are updated by the same hooks as any
+    other cancellation.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        hold_ttl_hours: Optional[int] = None,
+        cart_ttl_hours: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ):
+        self.db = db
+        self.hold_ttl = timedelta(hours=hold_ttl_hours if hold_ttl_hours is not None else settings.RESERVATION_HOLD_TTL_HOURS)
+        self.cart_ttl = timedelta(hours=cart_ttl_hours if cart_ttl_hours is not None else settings.CART_TTL_HOURS)
+        self.batch_size = batch_size or settings.SWEEP_BATCH_SIZE
+
+    def _next_batch(self, *criteria) -> List[Order]:
+        """Lock and return the next batch of orders matching the criteria"""
+        return self.db.query(Order).filter(*criteria).order_by(Order.id).limit(
+            self.batch_size
+        ).with_for_update(skip_locked=True).populate_existing().all()
+
+    def expire_stale_holds(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Expire reservations of unpaid sale orders that were never picked up"""
+        now = now or datetime.utcnow()
+        cutoff = now - self.hold_ttl
+        holds_expired = reservations_expired = 0
+
+        while True:
+            orders = self._next_batch(
+                Order.status == OrderStatus.SALE_ORDER,
+                Order.rental_start_date < cutoff
+            )
+            if not orders:
+                break
+
+            context = order_state_machine.run(
+                self.db, orders, OrderEvent.CANCEL,
+                now=now,
+                notes="Reservation hold expired",
+                append_notes=True,
+                reservation_status=ReservationStatus.EXPIRED,
+                movement_type=MovementType.EXPIRE
+            )
+
+            holds_expired += len(orders)
+            reservations_expired += len(context["released_spans"])
+
+        return {"holds_expired": holds_expired, "reservations_expired": reservations_expired}
+
+    def expire_abandoned_carts(self, now: Optional[datetime] = None) -> int:
+        """Cancel quotations nobody has touched within the cart TTL"""
+        now = now or datetime.utcnow()
+        cutoff = now - self.cart_ttl
+        carts_expired = 0
+
+        while True:
+            orders = self._next_batch(
+                Order.status == OrderStatus.QUOTATION,
+                Order.updated_at < cutoff
+            )
+            if not orders:
+                break
+
+            order_state_machine.run(
+                self.db, orders, OrderEvent.CANCEL, now=now, notes="Cart abandoned", append_notes=True
+            )
+            carts_expired += len(orders)
+
+        return carts_expired
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Run one full sweep and record it in the metrics"""
+        started_at = now or datetime.utcnow()
+        clock = datetime.utcnow()
+
+        try:
+            holds = self.expire_stale_holds(started_at)
+            carts = self.expire_abandoned_carts(started_at)
+        except Exception as exc:
+            self.db.rollback()
+            sweeper_metrics.record_error(exc)
+            raise
+
+        result = {**holds, "carts_expired": carts}
+        duration_ms = (datetime.utcnow() - clock).total_seconds() * 1000
+        sweeper_metrics.record_run(result, started_at, duration_ms)
+
+        if any(result.values()):
+            logger.info("Reservation sweep: %s", result)
+
+        return result
+
+
+def sweep_once() -> Dict[str, int]:
+    """Run one sweep in a fresh session"""
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return ReservationSweeper(db).run_once()
+    finally:
+        db.close()
+
+
+async def run_sweeper_loop(interval_seconds: Optional[int] = None) -> None:
+    """Sweep forever on a fixed interval (started from the app lifespan)"""
+    interval = interval_seconds or settings.RESERVATION_SWEEP_INTERVAL_SECONDS
+
+    while True:
+        try:
+            await asyncio.to_thread(sweep_once)
+        except Exception:
+            logger.exception("Reservation sweep failed")
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    # Standalone worker: python -m app.services.reservation_sweeper [--once]
+    parser = argparse.ArgumentParser(description="Expire stale reservation holds and abandoned carts")
+    parser.add_argument("--once", action="store_true", help="run a single sweep and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.once:
+        print(sweep_once())
+    else:
+        asyncio.run(run_sweeper_loop())
@@ -0,0 +1,203 @@
+"""
+Product Search Index
+Ranked full-text product search on the database's native engine (SQLite FTS5 / MySQL FULLTEXT)
+"""
+
+import logging
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Float, Integer, false, literal, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+
+from app.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+# Indexed columns: name, description, sku
+FTS_TABLE = "product_search"
+FULLTEXT_INDEX = "ix_products_fulltext"
+
+# bm25 column weights for SQLite (name, description, sku)
+BM25_WEIGHTS = (10.0, 1.0, 5.0)
+
+# Search terms are words; punctuation (e.g. the dash in a SKU) separates them
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(search: str) -> List[str]:
+    """Split free text into search terms"""
+    return [token.lower() for token in _TOKEN.findall(search or "")]
+
+
+class ProductSearchIndex:
+    """
+    Full-text index over product name, description and sku
+    SQLite keeps a separate FTS5 table that is written in the same transaction
+    as the product (create/update/delete). MySQL uses a FULLTEXT index on the
+    products table, which InnoDB maintains itself. Every term is prefix
+    matched and results are ordered by relevance. Databases without either
+    engine fall back to ILIKE scans.
+    """
+
+    def __init__(self):
+        self._ready: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _dialect(bind) -> str:
+        return bind.dialect.name
+
+    def ensure(self, engine: Engine) -> bool:
+        """Create the index if missing (filling it on first creation); False if unsupported"""
+        with self._lock:
+            key = str(engine.url)
+            if key in self._ready:
+                return self._ready[key]
+
+            dialect = self._dialect(engine)
+            try:
+                if dialect == "sqlite":
+                    ready = self._ensure_sqlite(engine)
+                elif dialect == "mysql":
+                    ready = self._ensure_mysql(engine)
+                else:
+                    ready = False
+            except Exception:
+                logger.exception("Full-text search unavailable, falling back to ILIKE")
+                ready = False
+
+            self._ready[key] = ready
+            return ready
+
+    def _ensure_sqlite(self, engine: Engine) -> bool:
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE}
+            ).first()
+            if not exists:
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                    "name, description, sku, "
+                    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+                ))
+                self._fill_sqlite(conn)
+        return True
+
+    def _ensure_mysql(self, engine: Engine) -> bool:
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text(
+                    "SELECT 1 FROM information_schema.statistics "
+                    "WHERE table_schema = DATABASE() AND table_name = 'products' AND index_name = :name"
+                ),
+                {"name": FULLTEXT_INDEX}
+            ).first()
+            if not exists:
+                conn.execute(text(f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} ON products (name, description, sku)"))
+        return True
+
+    @staticmethod
+    def _fill_sqlite(conn) -> int:
+        return conn.execute(text(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description, sku) "
+            "SELECT id, name, COALESCE(description, ''), COALESCE(sku, '') FROM products"
+        )).rowcount
+
+    def is_ready(self, db: Session) -> bool:
+        """Whether full-text search is available for this session's database"""
+        return self.ensure(db.get_bind())
+
+    # Sync
+
+    def index_product(self, db: Session, product: Product) -> None:
+        """Write a product's searchable text (caller commits)"""
+        self.index_products(db, [product])
+
+    def index_products(self, db: Session, products: Iterable[Any]) -> None:
+        """Write searchable text for many products in two batched statements (caller commits)"""
+        if self._dialect(db.get_bind()) != "sqlite" or not self.is_ready(db):
+            return
+        params = [
+            {"id": product.id, "name": product.name, "description": product.description or "", "sku": product.sku or ""}
+            for product in products
+        ]
+        if not params:
+            return
+        db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), [{"id": p["id"]} for p in params])
+        db.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, name, description, sku) VALUES (:id, :name, :description, :sku)"),
+            params
+        )
+
+    def remove_product(self, db: Session, product_id: int) -> None:
+        """Drop a product from the index (caller commits)"""
+        if self._dialect(db.get_bind()) != "sqlite" or not self.is_ready(db):
+            return
+        db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": product_id})
+
+    def rebuild(self, db: Session) -> int:
+        """Re-index every product from scratch; returns the number indexed"""
+        if not self.is_ready(db):
+            return 0
+        if self._dialect(db.get_bind()) == "sqlite":
+            db.execute(text(f"DELETE FROM {FTS_TABLE}"))
+            count = self._fill_sqlite(db.connection())
+            db.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"))
+        else:
+            # InnoDB rebuilds a FULLTEXT index by recreating it
+            db.execute(text(f"ALTER TABLE products DROP INDEX {FULLTEXT_INDEX}"))
+            db.execute(text(f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} ON products (name, description, sku)"))
+            count = db.query(Product).count()
+        db.commit()
+        return count
+
+    # Querying
+
+    def apply(self, db: Session, query: Query, search: str) -> Tuple[Query, Optional[Any]]:
+        """
+        Restrict a product query to matches of the search text
+        Returns the filtered query and a relevance ordering (None when
+        there is nothing to rank by). Text without any word (e.g. "!!")
+        matches nothing.
+        """
+        if not search or not search.strip():
+            return query, None
+
+        terms = search_terms(search)
+        if not terms:
+            return query.filter(false()), None
+
+        if not self.is_ready(db):
+            search_term = f"%{search}%"
+            return query.filter(
+                or_(
+                    Product.name.ilike(search_term),
+                    Product.description.ilike(search_term),
+                    Product.sku.ilike(search_term)
+                )
+            ), None
+
+        if self._dialect(db.get_bind()) == "sqlite":
+            matches = text(
+                f"SELECT rowid AS product_id, bm25({FTS_TABLE}, {', '.join(map(str, BM25_WEIGHTS))}) AS rank "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+            ).bindparams(match=" ".join(f'"{term}"*' for term in terms)).columns(
+                product_id=Integer, rank=Float
+            ).subquery("search_matches")
+            return query.join(matches, matches.c.product_id == Product.id), matches.c.rank.asc()
+
+        from sqlalchemy.dialects.mysql import match
+
+        score = match(
+            Product.name, Product.description, Product.sku,
+            against=literal(" ".join(f"+{term}*" for term in terms))
+        ).in_boolean_mode()
+        return query.filter(score > 0), score.desc()
+
+
+# Process-wide search index instance
+product_search = ProductSearchIndex()
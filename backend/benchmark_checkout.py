@@ -0,0 +1,187 @@
+"""
+Benchmark for multi-vendor checkout
+Compares OrderService.checkout (bulk INSERTs, one transaction) with the
+previous per-order path (flush per order, one ORM insert per line) for carts
+of 1, 10 and 100 lines spread over 5 vendors, printing median latency and
+SQL statements per checkout.
+
+Uses a temp SQLite file by default. Set BENCH_DATABASE_URL to an empty MySQL
+database to benchmark there instead:
+
+    python benchmark_checkout.py --repeats 20
+    BENCH_DATABASE_URL=mysql+pymysql://root@localhost:3306/rental_bench python benchmark_checkout.py
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import User, UserRole, Product, Order, OrderItem, OrderStatus, DeliveryMethod
+from app.schemas.order import OrderCreate, OrderItemCreate
+from app.schemas.product import ProductAvailabilityCheck
+from app.services.order_service import OrderService
+from app.services.pricing_engine import pricing_engine
+
+VENDORS = 5
+CART_SIZES = (1, 10, 100)
+START = datetime(2030, 1, 1)
+
+
+def make_engine():
+    """Engine for the benchmark database (SQLite temp file unless overridden)"""
+    url = os.getenv("BENCH_DATABASE_URL")
+    if url:
+        return create_engine(url), None
+
+    path = os.path.join(tempfile.mkdtemp(), "checkout.db")
+    return create_engine(f"sqlite:///{path}"), path
+
+
+def seed(Session, products_per_vendor: int):
+    """VENDORS vendors with products_per_vendor products each, and one customer"""
+    db = Session()
+    try:
+        vendors = [
+            User(email=f"vendor{i}@bench.local", password_hash="x", first_name="Vendor",
+                 last_name=str(i), role=UserRole.VENDOR)
+            for i in range(VENDORS)
+        ]
+        customer = User(email="customer@bench.local", password_hash="x", first_name="Bench",
+                        last_name="Customer", role=UserRole.CUSTOMER)
+        db.add_all(vendors + [customer])
+        db.flush()
+
+        products = [
+            Product(name=f"Product {v}-{i}", sku=f"BENCH-{v}-{i}", vendor_id=vendor.id,
+                    quantity_on_hand=1000, quantity_reserved=0, is_published=True,
+                    rental_price_daily=100, rental_price_weekly=500, security_deposit=50)
+            for v, vendor in enumerate(vendors) for i in range(products_per_vendor)
+        ]
+        db.add_all(products)
+        db.commit()
+        # Interleave vendors so every cart spans all of them
+        return customer.id, [products[v * products_per_vendor + i].id
+                             for i in range(products_per_vendor) for v in range(VENDORS)]
+    finally:
+        db.close()
+
+
+def cart(product_ids, lines: int) -> OrderCreate:
+    """A cart of `lines` ten-day rentals"""
+    end = START + timedelta(days=10)
+    return OrderCreate(
+        items=[OrderItemCreate(product_id=product_id, quantity=1, rental_start_date=START, rental_end_date=end)
+               for product_id in product_ids[:lines]],
+        rental_start_date=START,
+        rental_end_date=end
+    )
+
+
+def per_order_quotation(service: OrderService, customer_id: int, data: OrderCreate) -> Order:
+    """The previous create_quotation: one flush per order and one ORM insert per line"""
+    db = service.db
+    product_ids = {item.product_id for item in data.items}
+    products = {p.id: p for p in db.query(Product).filter(Product.id.in_(product_ids)).all()}
+    availability = service.product_service.check_availability_bulk([
+        ProductAvailabilityCheck(product_id=item.product_id, variant_id=item.variant_id,
+                                 start_date=item.rental_start_date, end_date=item.rental_end_date,
+                                 quantity=item.quantity)
+        for item in data.items
+    ])
+    quotes = pricing_engine.quote_many(db, [
+        (item.product_id, item.variant_id, item.rental_start_date, item.rental_end_date, item.rental_period_type)
+        for item in data.items
+    ])
+
+    vendor_orders = {}
+    for item, result, quote in zip(data.items, availability, quotes):
+        product = products[item.product_id]
+        if not result["is_available"]:
+            raise ValueError(f"Product {product.name} is not available for the selected dates")
+        vendor_orders.setdefault(product.vendor_id, []).append((item, product, quote.unit_amount))
+
+    created_orders = []
+    for vendor_id, items in vendor_orders.items():
+        order = Order(order_number=service.generate_order_number(), customer_id=customer_id,
+                      vendor_id=vendor_id, status=OrderStatus.QUOTATION,
+                      rental_start_date=data.rental_start_date, rental_end_date=data.rental_end_date,
+                      delivery_method=DeliveryMethod(data.delivery_method.value))
+        db.add(order)
+        db.flush()
+        for item_data, product, unit_price in items:
+            order_item = OrderItem(order_id=order.id, product_id=product.id, variant_id=item_data.variant_id,
+                                   product_name=product.name, product_sku=product.sku,
+                                   rental_start_date=item_data.rental_start_date,
+                                   rental_end_date=item_data.rental_end_date, quantity=item_data.quantity,
+                                   unit_price=unit_price, rental_period_type=item_data.rental_period_type)
+            order_item.calculate_total(order.tax_rate)
+            order.security_deposit += product.security_deposit * item_data.quantity
+            order.items.append(order_item)
+        order.calculate_totals()
+        created_orders.append(order)
+
+    db.commit()
+    return created_orders[0]
+
+
+def measure(engine, Session, run, repeats: int):
+    """Median milliseconds and statements of `repeats` calls of run(session)"""
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+
+    event.listen(engine, "before_cursor_execute", count)
+    samples, counts = [], []
+    try:
+        for _ in range(repeats):
+            db = Session()
+            try:
+                before = len(statements)
+                clock = time.perf_counter()
+                run(db)
+                samples.append((time.perf_counter() - clock) * 1000)
+                counts.append(len(statements) - before)
+            finally:
+                db.close()
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return statistics.median(samples), statistics.median(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-vendor checkout")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    engine, path = make_engine()
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    try:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        customer_id, product_ids = seed(Session, max(CART_SIZES) // VENDORS)
+
+        print(f"{'lines':>6} {'path':>10} {'median ms':>10} {'statements':>11}")
+        for lines in CART_SIZES:
+            data = cart(product_ids, lines)
+            for label, run in (
+                ("per-order", lambda db: per_order_quotation(OrderService(db), customer_id, data)),
+                ("checkout", lambda db: OrderService(db).checkout(customer_id, data)),
+            ):
+                run_ms, statements = measure(engine, Session, run, args.repeats)
+                print(f"{lines:>6} {label:>10} {run_ms:>10.2f} {statements:>11.0f}")
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+Benchmark for the composite query indexes
+Seeds a throwaway database, then prints query plans and timings for the hot
+filters with and without the indexes from migration 3f9c2a7d1b04.
+
+Uses a temp SQLite file by default. Set BENCH_DATABASE_URL to an empty MySQL
+database to benchmark there instead:
+
+    python benchmark_query_indexes.py --reservations 1000000
+    BENCH_DATABASE_URL=mysql+pymysql://root@localhost:3306/rental_bench python benchmark_query_indexes.py
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+from app.core.database import Base
+from app.models import (
+    User, Product, Order, Invoice, Payment, Reservation
+)
+
+# Index name -> (table, columns); kept in sync with the migration
+INDEXES = {
+    "ix_reservations_availability": (
+        "reservations", ["product_id", "status", "start_date", "end_date", "variant_id", "quantity"]
+    ),
+    "ix_reservations_order_id": ("reservations", ["order_id"]),
+    "ix_orders_customer_status": ("orders", ["customer_id", "status"]),
+    "ix_orders_vendor_status_end": ("orders", ["vendor_id", "status", "rental_end_date"]),
+    "ix_orders_status_updated": ("orders", ["status", "updated_at"]),
+    "ix_payments_status_date": ("payments", ["status", "payment_date"]),
+    "ix_invoices_vendor_status": ("invoices", ["vendor_id", "status"]),
+}
+
+# Hot queries, written the way SQLAlchemy emits them (enums stored by name)
+QUERIES = {
+    "availability overlap": (
+        "SELECT product_id, variant_id, start_date, end_date, quantity FROM reservations "
+        "WHERE product_id = :product_id AND status = 'ACTIVE' "
+        "AND start_date < :end_date AND end_date > :start_date"
+    ),
+    "customer cart": (
+        "SELECT id FROM orders WHERE customer_id = :customer_id AND status = 'QUOTATION'"
+    ),
+    "vendor upcoming returns": (
+        "SELECT id FROM orders WHERE vendor_id = :vendor_id AND status IN ('PICKED_UP', 'ACTIVE') "
+        "AND rental_end_date >= :start_date AND rental_end_date <= :end_date"
+    ),
+    "payments by status/date": (
+        "SELECT COUNT(*), SUM(amount) FROM payments WHERE status = 'COMPLETED' "
+        "AND payment_date >= :start_date"
+    ),
+    "vendor invoices by status": (
+        "SELECT COUNT(*) FROM invoices WHERE vendor_id = :vendor_id AND status = 'PAID'"
+    ),
+}
+
+EPOCH = datetime(2025, 1, 1)
+CHUNK = 10000
+
+
+def make_engine():
+    """Engine for the benchmark database (SQLite temp file unless overridden)"""
+    url = os.getenv("BENCH_DATABASE_URL")
+    if url:
+        return create_engine(url), None
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    return create_engine(f"sqlite:///{path}"), path
+
+
+def insert_chunked(conn, table, rows):
+    """Insert rows with executemany in fixed-size chunks"""
+    for offset in range(0, len(rows), CHUNK):
+        conn.execute(table.insert(), rows[offset:offset + CHUNK])
+
+
+def seed(engine, reservations: int, products: int, customers: int, vendors: int):
+    """Seed users, products, orders, invoices, payments and reservations"""
+    rng = random.Random(42)
+    orders = max(reservations // 4, 1)
+
+    with engine.begin() as conn:
+        insert_chunked(conn, User.__table__, [
+            {"id": i, "email": f"user{i}@bench.local", "password_hash": "x",
+             "first_name": "Bench", "last_name": str(i),
+             "role": "VENDOR" if i <= vendors else "CUSTOMER", "is_active": True}
+            for i in range(1, vendors + customers + 1)
+        ])
+        insert_chunked(conn, Product.__table__, [
+            {"id": i, "name": f"Product {i}", "sku": f"BENCH-{i}",
+             "vendor_id": rng.randint(1, vendors), "quantity_on_hand": 10,
+             "quantity_reserved": 0, "is_published": True, "rental_price_daily": 100}
+            for i in range(1, products + 1)
+        ])
+
+        statuses = ["QUOTATION", "SALE_ORDER", "CONFIRMED", "PICKED_UP", "RETURNED", "COMPLETED", "CANCELLED"]
+        order_rows, invoice_rows, payment_rows = [], [], []
+        for i in range(1, orders + 1):
+            start = EPOCH + timedelta(hours=rng.randint(0, 24 * 730))
+            order_rows.append({
+                "id": i, "order_number": f"B{i:08d}",
+                "customer_id": rng.randint(vendors + 1, vendors + customers),
+                "vendor_id": rng.randint(1, vendors), "status": rng.choice(statuses),
+                "rental_start_date": start, "rental_end_date": start + timedelta(days=rng.randint(1, 14)),
+                "order_date": start, "created_at": start, "updated_at": start, "total_amount": 1000
+            })
+            if i % 2 == 0:
+                invoice_rows.append({
+                    "id": len(invoice_rows) + 1, "invoice_number": f"BI{i:08d}", "order_id": i,
+                    "customer_id": order_rows[-1]["customer_id"], "vendor_id": order_rows[-1]["vendor_id"],
+                    "status": rng.choice(["DRAFT", "SENT", "PARTIAL", "PAID"]),
+                    "rental_start_date": start, "rental_end_date": order_rows[-1]["rental_end_date"],
+                    "total_amount": 1000, "amount_due": 1000
+                })
+                payment_rows.append({
+                    "id": len(payment_rows) + 1, "payment_number": f"BP{i:08d}",
+                    "invoice_id": len(invoice_rows), "order_id": i, "amount": 1000,
+                    "status": rng.choice(["PENDING", "COMPLETED", "FAILED"]), "payment_date": start
+                })
+        insert_chunked(conn, Order.__table__, order_rows)
+        insert_chunked(conn, Invoice.__table__, invoice_rows)
+        insert_chunked(conn, Payment.__table__, payment_rows)
+
+        batch = []
+        for i in range(1, reservations + 1):
+            order = order_rows[rng.randrange(orders)]
+            start = EPOCH + timedelta(hours=rng.randint(0, 24 * 730))
+            batch.append({
+                "id": i, "product_id": rng.randint(1, products), "order_id": order["id"],
+                "quantity": rng.randint(1, 3), "start_date": start,
+                "end_date": start + timedelta(days=rng.randint(1, 14)),
+                "status": "ACTIVE" if rng.random() < 0.3 else rng.choice(["RELEASED", "FULFILLED", "EXPIRED"]),
+                "stock_status": "RESERVED", "created_at": start
+            })
+            if len(batch) == CHUNK:
+                conn.execute(Reservation.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(Reservation.__table__.insert(), batch)
+
+
+def set_indexes(engine, enabled: bool):
+    """Create or drop every benchmarked index"""
+    with engine.begin() as conn:
+        for name, (table, columns) in INDEXES.items():
+            if enabled:
+                conn.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+            else:
+                conn.execute(text(
+                    f"DROP INDEX {name}" if engine.dialect.name == "sqlite" else f"DROP INDEX {name} ON {table}"
+                ))
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+        else:
+            for table in {table for table, _ in INDEXES.values()}:
+                conn.execute(text(f"ANALYZE TABLE {table}"))
+
+
+def explain(conn, sql: str, params: dict) -> str:
+    """Query plan as printable text"""
+    if conn.dialect.name == "sqlite":
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+        return "\n".join(f"    {row[-1]}" for row in rows)
+    rows = conn.execute(text(f"EXPLAIN {sql}"), params).mappings().all()
+    return "\n".join(
+        f"    table={row['table']} type={row['type']} key={row['key']} rows={row['rows']} extra={row['Extra']}"
+        for row in rows
+    )
+
+
+def run_queries(engine, label: str, repeats: int, products: int, customers: int, vendors: int):
+    """Print the plan and median latency of each hot query"""
+    rng = random.Random(7)
+    print(f"\n=== {label} ===")
+
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            samples = []
+            for _ in range(repeats):
+                start = EPOCH + timedelta(days=rng.randint(0, 700))
+                params = {
+                    "product_id": rng.randint(1, products),
+                    "customer_id": rng.randint(vendors + 1, vendors + customers),
+                    "vendor_id": rng.randint(1, vendors),
+                    "start_date": start,
+                    "end_date": start + timedelta(days=7),
+                }
+                clock = time.perf_counter()
+                conn.execute(text(sql), params).all()
+                samples.append((time.perf_counter() - clock) * 1000)
+
+            print(f"\n{name}: median {statistics.median(samples):.3f} ms, "
+                  f"p95 {sorted(samples)[int(len(samples) * 0.95) - 1]:.3f} ms")
+            print(explain(conn, sql, params))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark composite query indexes")
+    parser.add_argument("--reservations", type=int, default=1000000)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--customers", type=int, default=20000)
+    parser.add_argument("--vendors", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    engine, path = make_engine()
+    try:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+
+        clock = time.perf_counter()
+        seed(engine, args.reservations, args.products, args.customers, args.vendors)
+        print(f"Seeded {args.reservations} reservations in {time.perf_counter() - clock:.1f}s")
+
+        sizes = (args.repeats, args.products, args.customers, args.vendors)
+        set_indexes(engine, enabled=False)
+        run_queries(engine, "BEFORE (single-column indexes only)", *sizes)
+        set_indexes(engine, enabled=True)
+        run_queries(engine, "AFTER (composite indexes)", *sizes)
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark for repricing open quotations
+Compares reprice_open_quotations (columnar totals, bulk UPDATEs per batch)
+with the per-order ORM path (load each order, calculate_total per line,
+calculate_totals, commit) over N quotations of 3 lines each, printing
+seconds, quotations per second and SQL statements.
+
+Uses a temp SQLite file by default. Set BENCH_DATABASE_URL to an empty MySQL
+database to benchmark there instead:
+
+    python benchmark_reprice.py --quotations 5000
+    BENCH_DATABASE_URL=mysql+pymysql://root@localhost:3306/rental_bench python benchmark_reprice.py
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import User, UserRole, Product, Order, OrderItem, OrderStatus
+from app.services.batch_pricing import reprice_open_quotations
+
+LINES_PER_ORDER = 3
+START = datetime(2030, 1, 1)
+
+
+def make_engine():
+    """Engine for the benchmark database (SQLite temp file unless overridden)"""
+    url = os.getenv("BENCH_DATABASE_URL")
+    if url:
+        return create_engine(url), None
+
+    path = os.path.join(tempfile.mkdtemp(), "reprice.db")
+    return create_engine(f"sqlite:///{path}"), path
+
+
+def seed(Session, quotations: int) -> None:
+    """One vendor, one customer, three products and `quotations` open quotations"""
+    db = Session()
+    try:
+        vendor = User(email="vendor@bench.local", password_hash="x", first_name="Vendor",
+                      last_name="Bench", role=UserRole.VENDOR)
+        customer = User(email="customer@bench.local", password_hash="x", first_name="Bench",
+                        last_name="Customer", role=UserRole.CUSTOMER)
+        db.add_all([vendor, customer])
+        db.flush()
+        products = [
+            Product(name=f"Product {i}", sku=f"BENCH-{i}", vendor_id=vendor.id, quantity_on_hand=1000,
+                    is_published=True, rental_price_daily=100, rental_price_weekly=500)
+            for i in range(LINES_PER_ORDER)
+        ]
+        db.add_all(products)
+        db.flush()
+
+        end = START + timedelta(days=10)
+        db.execute(insert(Order), [
+            {"order_number": f"BENCH{i:08d}", "customer_id": customer.id, "vendor_id": vendor.id,
+             "status": OrderStatus.QUOTATION, "rental_start_date": START, "rental_end_date": end,
+             "tax_rate": 18.0}
+            for i in range(quotations)
+        ])
+        order_ids = [order_id for order_id, in db.query(Order.id).order_by(Order.id)]
+        db.execute(insert(OrderItem), [
+            {"order_id": order_id, "product_id": product.id, "product_name": product.name,
+             "product_sku": product.sku, "rental_start_date": START, "rental_end_date": end,
+             "quantity": 1, "unit_price": 800.0, "rental_period_type": "daily"}
+            for order_id in order_ids for product in products
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def per_order_reprice(db, tax_rate: float) -> int:
+    """The ORM path: every quotation loaded, recalculated and committed on its own"""
+    orders = db.query(Order).filter(Order.status == OrderStatus.QUOTATION).all()
+    for order in orders:
+        order.tax_rate = tax_rate
+        for item in order.items:
+            item.calculate_total(order.tax_rate)
+        order.calculate_totals()
+        db.commit()
+    return len(orders)
+
+
+def measure(engine, Session, run):
+    """Seconds, result and statements of one run(session)"""
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+
+    event.listen(engine, "before_cursor_execute", count)
+    db = Session()
+    try:
+        clock = time.perf_counter()
+        result = run(db)
+        return time.perf_counter() - clock, result, len(statements)
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark repricing open quotations")
+    parser.add_argument("--quotations", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    engine, path = make_engine()
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    try:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        seed(Session, args.quotations)
+
+        print(f"{'path':>10} {'seconds':>9} {'quotations/s':>13} {'statements':>11}")
+        for label, run in (
+            ("per-order", lambda db: per_order_reprice(db, 12.0)),
+            ("batch", lambda db: reprice_open_quotations(db, tax_rate=18.0, batch_size=args.batch_size)["orders"]),
+        ):
+            seconds, orders, statements = measure(engine, Session, run)
+            print(f"{label:>10} {seconds:>9.2f} {orders / seconds:>13.0f} {statements:>11}")
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,20 +7,27 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
 import os
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, Base, SessionLocal
 from app.api.v1.router import api_router
+from app.services.availability_index import availability_index
+from app.services.reservation_sweeper import run_sweeper_loop
+from app.services.search_index import product_search
+from app.services.facet_index import facet_index
+from app.services.category_tree import category_tree, ensure_closure
 
 # Import all models so they are registered with SQLAlchemy
 from app.models import (
     User, UserRole,
-    Product, ProductVariant, Category, ProductAttribute,
+    Product, ProductVariant, Category, CategoryClosure, ProductAttribute, ProductAttributeValue,
     Order, OrderItem, OrderStatus,
     Invoice, InvoiceItem, Payment,
     Reservation, PickupDocument, ReturnDocument,
-    RentalPeriodConfig, CompanySettings, Coupon, Notification
+    RentalPeriodConfig, CompanySettings, Coupon, Notification,
+    InventoryMovement, InventoryBalance, SequenceCounter
 )
 
 
@@ -29,8 +36,34 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler - creates tables on startup"""
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    
+    # Full-text product search (FTS5 table / FULLTEXT index)
+    product_search.ensure(engine)
+    
+    # Warm the in-memory availability, catalog facet and category tree caches
+    db = SessionLocal()
+    try:
+        availability_index.load(db)
+        facet_index.load(db)
+        ensure_closure(db)
+        category_tree.load(db)
+    finally:
+        db.close()
+    
+    # Background jobs: expire stale holds / abandoned carts (reconcile_inventory.py --loop reconciles stock)
+    background_tasks = []
+    if settings.RESERVATION_SWEEPER_ENABLED.lower() == "true":
+        background_tasks.append(asyncio.create_task(run_sweeper_loop()))
+    
     yield
-    # Cleanup on shutdown (if needed)
+    
+    # Cleanup on shutdown
+    for task in background_tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
 
 
 app = FastAPI(
@@ -0,0 +1,28 @@
+"""
+Backfill the product attribute index
+Rewrites product_attribute_values from the attributes JSON of every product
+and variant. Products are kept in sync on create/update/import through the
+API; run this after upgrading, or after changing attributes with scripts or
+SQL that bypass it.
+
+    python rebuild_attribute_index.py [batch_size]
+"""
+import sys
+
+from app.core.database import SessionLocal
+from app.services.attribute_index import rebuild_attribute_index
+
+
+def main():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    db = SessionLocal()
+    try:
+        count = rebuild_attribute_index(db, batch_size=batch_size)
+    finally:
+        db.close()
+
+    print(f"Indexed {count} attribute values")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+"""
+Rebuild the full-text product search index
+Re-indexes every product's name, description and sku. Products are kept
+in sync on create/update/delete through the API; run this after loading
+products with scripts or SQL that bypass it.
+
+    python rebuild_search_index.py
+"""
+from app.core.database import SessionLocal
+from app.services.search_index import product_search
+
+
+def main():
+    db = SessionLocal()
+    try:
+        if not product_search.is_ready(db):
+            print("Full-text search is not supported on this database; searches use ILIKE")
+            return
+        count = product_search.rebuild(db)
+    finally:
+        db.close()
+
+    print(f"Indexed {count} products")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Rebuild inventory balances from the movement ledger
+Opens ledgers for products that predate it, realigns reserved stock with
+active reservations and repairs drifted balances and product counters.
+Run it from cron, or as one long-running process with --loop (every
+INVENTORY_RECONCILE_INTERVAL_SECONDS); the API workers do not run it.
+
+    python reconcile_inventory.py            # all products
+    python reconcile_inventory.py 12 15 40   # selected product ids
+    python reconcile_inventory.py --loop     # all products, forever
+"""
+import argparse
+import logging
+import time
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.inventory_ledger import InventoryLedger, reconcile_once
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild inventory balances from the movement ledger")
+    parser.add_argument("product_ids", type=int, nargs="*", help="only these products")
+    parser.add_argument("--loop", action="store_true", help="reconcile all products on a fixed interval")
+    args = parser.parse_args()
+
+    if args.loop:
+        logging.basicConfig(level=logging.INFO)
+        while True:
+            try:
+                logging.info("Inventory reconciliation: %s", reconcile_once())
+            except Exception:
+                logging.exception("Inventory reconciliation failed")
+            time.sleep(settings.INVENTORY_RECONCILE_INTERVAL_SECONDS)
+
+    db = SessionLocal()
+    try:
+        result = InventoryLedger(db).reconcile(args.product_ids or None)
+    finally:
+        db.close()
+
+    print(f"Opened {result['opened']} SKU ledgers, checked {result['skus']} balances")
+    print(f"Reserved adjustments: {result['adjustments']}")
+    print(f"Balances corrected: {result['balances_corrected']}")
+    print(f"Product counters corrected: {result['counters_corrected']}")
+
+
+if __name__ == '__main__':
+    main()
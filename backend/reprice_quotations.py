@@ -0,0 +1,40 @@
+"""
+Reprice open quotations
+Recomputes line and order totals of every open quotation (carts and sent
+quotations not yet confirmed) in batches. Run it after a tax change with the
+new rate, or with --units after changing rental rates with scripts or SQL so
+each line is re-quoted from the current price tables. Confirmed orders keep
+the prices they were sold at.
+
+    python reprice_quotations.py --tax-rate 12
+    python reprice_quotations.py --units [--batch-size 2000]
+"""
+import argparse
+import time
+
+from app.core.database import SessionLocal
+from app.services.batch_pricing import reprice_open_quotations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute totals of all open quotations")
+    parser.add_argument("--tax-rate", type=float, default=None, help="new tax rate in percent")
+    parser.add_argument("--units", action="store_true", help="re-quote unit prices from current rates")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        result = reprice_open_quotations(
+            db, tax_rate=args.tax_rate, reprice_units=args.units, batch_size=args.batch_size
+        )
+    finally:
+        db.close()
+
+    print(f"Repriced {result['orders']} quotations ({result['items']} lines) "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
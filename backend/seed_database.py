@@ -9,6 +9,7 @@ from app.core.security import get_password_hash
 from app.models.user import User, UserRole
 from app.models.product import Product, Category
 from app.models.settings import CompanySettings
+from app.services.category_tree import rebuild_closure
 
 def create_test_accounts(db: Session):
     """Create test accounts for admin, vendor, and customer"""
@@ -88,6 +89,8 @@ def create_categories(db: Session):
     for cat in categories:
         db.add(cat)
     
+    db.flush()
+    rebuild_closure(db)
     db.commit()
     print(f"[OK] Created {len(categories)} categories")
     return {cat.name: cat.id for cat in categories}
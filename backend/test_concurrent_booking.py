@@ -0,0 +1,132 @@
+"""
+Concurrency stress test for order confirmation
+Fires hundreds of parallel confirmations at one SKU and asserts zero oversell.
+
+Runs against a throwaway SQLite file by default (per-product in-process locks
+stand in for row locks). Set TEST_DATABASE_URL to an empty MySQL database to
+exercise SELECT ... FOR UPDATE instead:
+
+    TEST_DATABASE_URL=mysql+pymysql://root@localhost:3306/rental_stress python test_concurrent_booking.py
+"""
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import (
+    User, UserRole, Product, Order, OrderItem, OrderStatus,
+    Reservation, ReservationStatus
+)
+from app.schemas.order import OrderConfirm
+from app.services.order_service import OrderService
+
+STOCK = 10
+CONFIRMATIONS = 300
+WORKERS = 50
+
+
+def make_engine():
+    """Engine for the stress database (SQLite temp file unless overridden)"""
+    url = os.getenv("TEST_DATABASE_URL")
+    if url:
+        return create_engine(url, pool_size=WORKERS, max_overflow=0), None
+
+    path = os.path.join(tempfile.mkdtemp(), "stress.db")
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": 60},
+        pool_size=WORKERS,
+        max_overflow=0
+    )
+    return engine, path
+
+
+def seed(Session):
+    """Create one SKU and CONFIRMATIONS single-unit quotations for the same window"""
+    db = Session()
+    try:
+        vendor = User(email="stress-vendor@rental.com", password_hash="x", first_name="Stress",
+                      last_name="Vendor", role=UserRole.VENDOR)
+        customer = User(email="stress-customer@rental.com", password_hash="x", first_name="Stress",
+                        last_name="Customer", role=UserRole.CUSTOMER)
+        db.add_all([vendor, customer])
+        db.flush()
+
+        product = Product(name="Stress Camera", sku="STRESS-CAM", vendor_id=vendor.id,
+                          quantity_on_hand=STOCK, rental_price_daily=100, is_published=True)
+        db.add(product)
+        db.flush()
+
+        start = datetime.utcnow() + timedelta(days=30)
+        end = start + timedelta(days=3)
+        order_ids = []
+        for i in range(CONFIRMATIONS):
+            order = Order(order_number=f"STRESS{i:05d}", customer_id=customer.id, vendor_id=vendor.id,
+                          status=OrderStatus.QUOTATION, rental_start_date=start, rental_end_date=end)
+            order.items.append(OrderItem(product_id=product.id, product_name=product.name,
+                                         product_sku=product.sku, rental_start_date=start,
+                                         rental_end_date=end, quantity=1, unit_price=100))
+            db.add(order)
+            db.flush()
+            order_ids.append(order.id)
+
+        db.commit()
+        return product.id, order_ids
+    finally:
+        db.close()
+
+
+def confirm(Session, order_id):
+    """Confirm one quotation in its own session; True if it got stock"""
+    db = Session()
+    try:
+        OrderService(db).confirm_order(order_id, OrderConfirm())
+        return True
+    except ValueError:
+        return False
+    finally:
+        db.close()
+
+
+def test_no_oversell_under_concurrency():
+    engine, path = make_engine()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    try:
+        product_id, order_ids = seed(Session)
+
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            results = list(pool.map(lambda order_id: confirm(Session, order_id), order_ids))
+
+        db = Session()
+        try:
+            reserved = db.query(func.coalesce(func.sum(Reservation.quantity), 0)).filter(
+                Reservation.product_id == product_id,
+                Reservation.status == ReservationStatus.ACTIVE
+            ).scalar()
+            confirmed = db.query(Order).filter(Order.status == OrderStatus.SALE_ORDER).count()
+            product = db.query(Product).filter(Product.id == product_id).first()
+
+            print(f"Confirmed {sum(results)}/{len(results)}; reserved {reserved} of {STOCK}")
+            assert sum(results) == STOCK, "every unit should be booked exactly once"
+            assert confirmed == STOCK
+            assert reserved == STOCK, "oversold!"
+            assert product.quantity_reserved == STOCK
+        finally:
+            db.close()
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    test_no_oversell_under_concurrency()
+    print("NO_OVERSELL_OK")
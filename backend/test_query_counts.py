@@ -0,0 +1,159 @@
+"""
+Query-count test for list endpoints
+Seeds orders (with items and invoices) and products (with categories and
+variants), then runs each list service and serializes the result exactly as
+the endpoints do, asserting the number of SQL statements stays bounded and
+does not grow with the page size (no N+1 lazy loads).
+
+    python test_query_counts.py
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import (
+    User, UserRole, Product, ProductVariant, Category,
+    Order, OrderItem, OrderStatus, Invoice, InvoiceItem
+)
+from app.schemas.order import OrderListResponse, OrderResponse
+from app.schemas.product import ProductListResponse, ProductCardListResponse
+from app.services.order_service import OrderService
+from app.services.product_service import ProductService
+
+ROWS = 100
+
+# Statements allowed per list request regardless of size
+MAX_QUERIES = {
+    "get_orders": 6,
+    "get_pending_pickups": 5,
+    "get_upcoming_returns": 5,
+    "get_overdue_orders": 5,
+    "get_products": 4,
+    "get_product_cards": 3,  # page + count + price tables on a cold cache
+}
+
+
+def seed(db):
+    """Create ROWS orders in each list's state and ROWS products"""
+    vendor = User(email="qc-vendor@rental.com", password_hash="x", first_name="QC",
+                  last_name="Vendor", role=UserRole.VENDOR)
+    customer = User(email="qc-customer@rental.com", password_hash="x", first_name="QC",
+                    last_name="Customer", role=UserRole.CUSTOMER)
+    db.add_all([vendor, customer])
+    db.flush()
+
+    now = datetime.utcnow()
+    for i in range(ROWS):
+        category = Category(name=f"QC Category {i}")
+        product = Product(name=f"QC Product {i}", sku=f"QC-{i}", vendor_id=vendor.id, category=category,
+                          quantity_on_hand=5, rental_price_daily=100, is_published=True)
+        product.variants = [
+            ProductVariant(name=f"Variant {i}-{v}", sku=f"QC-{i}-{v}", quantity_on_hand=1) for v in range(2)
+        ]
+        db.add(product)
+        db.flush()
+
+        # Pending pickup, upcoming return and overdue return
+        for status, start, end in (
+            (OrderStatus.SALE_ORDER, now + timedelta(days=1), now + timedelta(days=3)),
+            (OrderStatus.PICKED_UP, now - timedelta(days=1), now + timedelta(hours=12)),
+            (OrderStatus.ACTIVE, now - timedelta(days=5), now - timedelta(days=1)),
+        ):
+            order = Order(order_number=f"QC-{status.value}-{i}", customer_id=customer.id, vendor_id=vendor.id,
+                          status=status, rental_start_date=start, rental_end_date=end)
+            order.items = [
+                OrderItem(product_id=product.id, product_name=product.name, quantity=1, unit_price=100,
+                          rental_start_date=start, rental_end_date=end)
+                for _ in range(2)
+            ]
+            db.add(order)
+            db.flush()
+            invoice = Invoice(invoice_number=f"INV-{order.order_number}", order_id=order.id,
+                              customer_id=customer.id, vendor_id=vendor.id,
+                              rental_start_date=start, rental_end_date=end)
+            invoice.items = [InvoiceItem(product_name=product.name, unit_price=100)]
+            db.add(invoice)
+
+    db.commit()
+    return vendor
+
+
+@contextmanager
+def count_queries(engine):
+    """Count SQL statements executed inside the block"""
+    counter = {"queries": 0}
+
+    def before_cursor_execute(*args):
+        counter["queries"] += 1
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "query_counts.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    db = Session()
+    vendor_id = seed(db).id
+    db.close()
+
+    def order_page(db):
+        return OrderListResponse(**OrderService(db).get_orders(vendor_id=vendor_id, per_page=ROWS))
+
+    def order_list(db, method):
+        orders = getattr(OrderService(db), method)(vendor_id)
+        assert len(orders) == ROWS, (method, len(orders))
+        return [OrderResponse.model_validate(order) for order in orders]
+
+    def product_page(db):
+        return ProductListResponse(**ProductService(db).get_products(per_page=ROWS))
+    
+    def card_page(db):
+        return ProductCardListResponse(**ProductService(db).get_product_cards(per_page=ROWS))
+
+    cases = {
+        "get_orders": order_page,
+        "get_pending_pickups": lambda db: order_list(db, "get_pending_pickups"),
+        "get_upcoming_returns": lambda db: order_list(db, "get_upcoming_returns"),
+        "get_overdue_orders": lambda db: order_list(db, "get_overdue_orders"),
+        "get_products": product_page,
+        "get_product_cards": card_page,
+    }
+
+    failures = 0
+    for name, run in cases.items():
+        db = Session()
+        try:
+            with count_queries(engine) as counter:
+                result = run(db)
+        finally:
+            db.close()
+
+        items = result.items if hasattr(result, "items") else result
+        assert all(getattr(item, "invoice", True) for item in items), f"{name}: invoice missing"
+        ok = counter["queries"] <= MAX_QUERIES[name]
+        failures += not ok
+        print(f"{name}: {len(items)} rows in {counter['queries']} queries "
+              f"(max {MAX_QUERIES[name]}) {'OK' if ok else 'FAIL'}")
+
+    engine.dispose()
+    os.remove(path)
+
+    if failures:
+        raise SystemExit(f"{failures} list request(s) exceeded their query budget")
+    print("QUERY_COUNTS_OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Concurrency stress test for document number allocation
+Many threads draw numbers at once, both through per-worker hi/lo blocks and
+through the order, invoice and payment generators, and every number must be
+unique. Also checks that new counters continue after existing numbers.
+
+Runs against a throwaway SQLite file by default. Set TEST_DATABASE_URL to an
+empty MySQL database to exercise block allocation as used in production:
+
+    TEST_DATABASE_URL=mysql+pymysql://root@localhost:3306/rental_stress python test_sequence_numbers.py
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.sequences import SequenceAllocator, highest_suffix
+from app.models import User, UserRole, Order, OrderStatus, SequenceCounter
+from app.services.order_service import OrderService
+from app.services.invoice_service import InvoiceService
+
+WORKERS = 4            # Simulated worker processes (one allocator each)
+THREADS = 32
+ALLOCATIONS = 20000
+MIN_RATE = 1000        # Allocations per second the block allocator must sustain
+ORDERS = 400
+
+
+def make_engine():
+    """Engine for the stress database (SQLite temp file unless overridden)"""
+    url = os.getenv("TEST_DATABASE_URL")
+    if url:
+        return create_engine(url, pool_size=THREADS, max_overflow=0), None
+
+    path = os.path.join(tempfile.mkdtemp(), "sequences.db")
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": 60},
+        pool_size=THREADS,
+        max_overflow=0
+    )
+    return engine, path
+
+
+def block_allocations(Session):
+    """ALLOCATIONS values from WORKERS allocators shared by THREADS threads"""
+    allocators = [SequenceAllocator(block_size=100, transactional=False) for _ in range(WORKERS)]
+
+    def draw(i):
+        db = Session()
+        try:
+            return allocators[i % WORKERS].next_value(db, "stress:block")
+        finally:
+            db.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        values = list(pool.map(draw, range(ALLOCATIONS)))
+    elapsed = time.perf_counter() - started
+
+    rate = ALLOCATIONS / elapsed
+    print(f"Block allocation: {ALLOCATIONS} values in {elapsed:.2f}s ({rate:,.0f}/s)")
+    assert len(set(values)) == ALLOCATIONS, "duplicate values!"
+    assert rate >= MIN_RATE, f"expected at least {MIN_RATE} allocations/s"
+
+
+def document_numbers(Session):
+    """Order, invoice and payment numbers drawn and committed from many threads"""
+    db = Session()
+    try:
+        customer = User(email="seq-customer@rental.com", password_hash="x", first_name="Seq",
+                        last_name="Customer", role=UserRole.CUSTOMER)
+        db.add(customer)
+        db.commit()
+        customer_id = customer.id
+    finally:
+        db.close()
+
+    def create(i):
+        db = Session()
+        try:
+            service = OrderService(db)
+            order = Order(order_number=service.generate_order_number(), customer_id=customer_id,
+                          vendor_id=customer_id, status=OrderStatus.QUOTATION,
+                          rental_start_date=datetime.utcnow(), rental_end_date=datetime.utcnow())
+            db.add(order)
+            db.commit()
+            invoices = InvoiceService(db)
+            numbers = (order.order_number, invoices.generate_invoice_number(), invoices.generate_payment_number())
+            db.commit()
+            return numbers
+        finally:
+            db.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        results = list(pool.map(create, range(ORDERS)))
+    elapsed = time.perf_counter() - started
+
+    print(f"Document numbers: {ORDERS * 3} numbers in {elapsed:.2f}s")
+    for kind, numbers in zip(("order", "invoice", "payment"), zip(*results)):
+        assert len(set(numbers)) == ORDERS, f"duplicate {kind} numbers!"
+
+
+def continues_after_existing(Session):
+    """A new counter starts after the highest number already in the table"""
+    db = Session()
+    try:
+        customer = db.query(User).first()
+        period = f"{datetime.now().year + 1}01"
+        db.add(Order(order_number=f"S{period}00041", customer_id=customer.id, vendor_id=customer.id,
+                     status=OrderStatus.QUOTATION, rental_start_date=datetime.utcnow(),
+                     rental_end_date=datetime.utcnow()))
+        db.commit()
+
+        allocator = SequenceAllocator(block_size=10, transactional=False)
+        floor = lambda: highest_suffix(db, Order.order_number, f"S{period}")
+        assert allocator.next_value(db, f"order:{period}", floor) == 42
+        assert allocator.next_value(db, f"order:{period}", floor) == 43
+        assert allocator.next_value(db, f"order:{datetime.now().year + 1}02", floor=lambda: 0) == 1, "periods reset"
+        counter = db.query(SequenceCounter).filter(SequenceCounter.name == f"order:{period}").one()
+        assert counter.next_value == 52, "one block reserved"
+    finally:
+        db.close()
+
+
+def test_sequences_under_concurrency():
+    engine, path = make_engine()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    try:
+        block_allocations(Session)
+        document_numbers(Session)
+        continues_after_existing(Session)
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    test_sequences_under_concurrency()
+    print("SEQUENCES_OK")